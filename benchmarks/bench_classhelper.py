@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""End to end latency of the classhelper popups in a headless browser.
+
+Goes through the flows of test_classhelper.py on the new issue page, for
+the keyword, nosy and superseder helpers, many times over:
+
+  time_to_first_row  click on the helper until the popup shows its table
+  page_flip          click on next or prev until the new page is shown
+  search             click on search until the results are shown
+
+then selects the first row and applies it. Nothing sleeps, every step
+waits for the classhelper:* performance.measure entry that ends it
+(see ClassHelper.recordTiming), the latency runs from the timeStamp of
+the click event to the end of that entry. The other classhelper:*
+entries of the runs are reported under phases. The response cache of
+the classhelper is cleared before each popup is opened, the pages the
+popup prefetches are kept.
+
+Builds a throwaway tracker with generate_tracker.py (same volume options)
+or uses the one given with --home and serves it like bench_tracker.py.
+--url runs against a tracker that is already up, like the demo tracker
+of test_classhelper.py. Latencies are in milliseconds, the results are
+JSON:
+
+    python3 benchmarks/bench_classhelper.py [--users 100000]
+        [--issues 500000] [--iterations 50] [--output results.json]
+    python3 benchmarks/bench_classhelper.py --home /tmp/bench-tracker
+    python3 benchmarks/bench_classhelper.py --url http://localhost:8080/demo/
+
+Needs roundup, selenium and Firefox.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+import generate_tracker
+from bench_tracker import Server, percentile
+
+HEADLESS = True
+
+# Seconds to wait for a step of a flow
+STEP_TIMEOUT = 30
+
+# form property of the helper, the search field typed into and the
+# search terms for it, the keyword helper has no search
+HELPERS = {
+    "keyword": (None, None),
+    "nosy": ("username", lambda rand: "user%d" % rand.randint(0, 99)),
+    "superseder": ("title", lambda rand: rand.choice(generate_tracker.WORDS)),
+}
+
+# Resolves window.benchmarkLatency with the milliseconds from the next
+# click on the element to the end of the classhelper:<name> measure,
+# on the clock of this window. The element may be in the popup, its
+# clock starts at another time.
+ARM = """
+const [helperSelector, selector, name] = arguments;
+const helper = document.querySelector(helperSelector);
+const root = selector == null ? document : helper.popupRef.document;
+const target = selector == null ? helper : root.querySelector(selector);
+const view = root.defaultView;
+window.benchmarkLatency = new Promise((resolve) => {
+    let clicked = null;
+    target.addEventListener("click", (event) => {
+        clicked = view.performance.timeOrigin + event.timeStamp - performance.timeOrigin;
+    }, { capture: true, once: true });
+    const observer = new PerformanceObserver((list) => {
+        for (const entry of list.getEntries()) {
+            if (clicked != null && entry.name === `classhelper:${name}` && entry.startTime >= clicked) {
+                observer.disconnect();
+                resolve(entry.startTime + entry.duration - clicked);
+            }
+        }
+    });
+    observer.observe({ type: "measure" });
+});
+"""
+
+LATENCY = """
+const done = arguments[arguments.length - 1];
+window.benchmarkLatency.then(done);
+"""
+
+# The classhelper:* measures since the last call, which clears them
+PHASES = """
+const entries = performance.getEntriesByType("measure")
+    .filter(entry => entry.name.startsWith("classhelper:"))
+    .map(entry => [entry.name.substring("classhelper:".length), entry.duration]);
+performance.clearMeasures();
+return entries;
+"""
+
+
+def distribution(samples):
+    """Milliseconds of the samples, unlike bench_tracker.summary there
+       is no rate, the flows wait between the steps.
+    """
+    samples = sorted(samples)
+    result = {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 3),
+        "max": round(samples[-1], 3),
+    }
+    for percent in (50, 95, 99):
+        result["p%d" % percent] = round(percentile(samples, percent), 3)
+    return result
+
+
+class Browser:
+    """Firefox logged into the tracker at url, on its new issue page."""
+
+    def __init__(self, url, user, password):
+        options = webdriver.FirefoxOptions()
+        if HEADLESS:
+            options.add_argument('--headless')
+        self.driver = webdriver.Firefox(options=options)
+        self.driver.set_script_timeout(STEP_TIMEOUT)
+        self.wait = WebDriverWait(self.driver, STEP_TIMEOUT)
+
+        self.driver.get(url)
+        self.driver.set_window_size(786, 824)
+        self.wait.until(EC.element_to_be_clickable((By.NAME, "__login_name"))).send_keys(user)
+        self.driver.find_element(By.NAME, "__login_password").send_keys(password)
+        self.driver.find_element(By.CSS_SELECTOR, '.userblock input[type="submit"]').click()
+        self.wait.until(EC.element_to_be_clickable((By.LINK_TEXT, "Create New"))).click()
+        self.main_window = self.driver.current_window_handle
+        self.popup_window = None
+
+    def version(self):
+        return self.driver.capabilities.get("browserVersion")
+
+    def timed_click(self, helper, name, selector=None):
+        """Click on the helper, or the element at selector in its popup,
+           and wait for the classhelper:<name> measure.
+        """
+        helper_selector = 'input[name="%s"] + roundup-classhelper' % helper
+        self.driver.switch_to.window(self.main_window)
+        self.driver.execute_script(ARM, helper_selector, selector, name)
+        if selector is None:
+            self.driver.find_element(By.CSS_SELECTOR, helper_selector).click()
+        else:
+            self.driver.switch_to.window(self.popup_window)
+            self.driver.find_element(By.CSS_SELECTOR, selector).click()
+            self.driver.switch_to.window(self.main_window)
+        return self.driver.execute_async_script(LATENCY)
+
+    def open(self, helper):
+        self.driver.switch_to.window(self.main_window)
+        self.driver.execute_script("ClassHelper.invalidateCache();")
+        latency = self.timed_click(helper, "openPopUp:swap")
+        self.wait.until(EC.number_of_windows_to_be(2))
+        self.popup_window = [handle for handle in self.driver.window_handles
+                             if handle != self.main_window][0]
+        return latency
+
+    def popup_has(self, selector):
+        self.driver.switch_to.window(self.popup_window)
+        return len(self.driver.find_elements(By.CSS_SELECTOR, selector)) > 0
+
+    def type_search(self, field, term):
+        self.driver.switch_to.window(self.popup_window)
+        search = self.driver.find_element(By.CSS_SELECTOR, '#popup-search [name="%s"]' % field)
+        search.clear()
+        search.send_keys(term)
+
+    def apply_first_row(self):
+        """Select the first row, if any, apply it and wait for the popup
+           to close.
+        """
+        self.driver.switch_to.window(self.popup_window)
+        rows = self.driver.find_elements(By.CSS_SELECTOR, ".popup-table > tbody tr")
+        if rows:
+            rows[0].find_element(By.TAG_NAME, "input").click()
+        self.driver.find_element(By.CSS_SELECTOR, ".popup-apply").click()
+        self.wait.until(EC.number_of_windows_to_be(1))
+        self.driver.switch_to.window(self.main_window)
+        self.popup_window = None
+
+    def phases(self):
+        self.driver.switch_to.window(self.main_window)
+        return self.driver.execute_script(PHASES)
+
+    def quit(self):
+        self.driver.quit()
+
+
+def bench_helper(browser, helper, iterations, warmup, flips, rand):
+    field, terms = HELPERS[helper]
+    next_page = "#popup-pagination button:last-child:not([disabled])"
+    prev_page = "#popup-pagination button:first-child:not([disabled])"
+    samples = {"time_to_first_row": [], "page_flip": [], "search": []}
+    phases = {}
+
+    for i in range(warmup + iterations):
+        timed = {name: [] for name in samples}
+        timed["time_to_first_row"].append(browser.open(helper))
+
+        forward = 0
+        while forward < flips and browser.popup_has(next_page):
+            timed["page_flip"].append(browser.timed_click(
+                helper, "pageChange:swap", next_page))
+            forward += 1
+        for _ in range(forward):
+            timed["page_flip"].append(browser.timed_click(
+                helper, "pageChange:swap", prev_page))
+
+        if field is not None:
+            browser.type_search(field, terms(rand))
+            timed["search"].append(browser.timed_click(
+                helper, "searchEvent:swap", "#popup-search .search-button"))
+
+        browser.apply_first_row()
+        entries = browser.phases()
+        if i < warmup:
+            continue
+        for name, latencies in timed.items():
+            samples[name].extend(latencies)
+        for name, duration in entries:
+            phases.setdefault(name, []).append(duration)
+
+    result = dict((name, distribution(latencies))
+                  for name, latencies in samples.items() if latencies)
+    result["phases"] = dict((name, distribution(durations))
+                            for name, durations in sorted(phases.items()))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', help='tracker that is already up to use '
+                        'instead of serving one')
+    parser.add_argument('--user', default='admin',
+                        help='user logged in with --url')
+    parser.add_argument('--password', default='admin',
+                        help='password of --user')
+    parser.add_argument('--home', help='tracker made by generate_tracker.py '
+                        'to use instead of a new one')
+    parser.add_argument('--keep', action='store_true',
+                        help='keep the new tracker')
+    parser.add_argument('--multiprocess', default=None,
+                        help='-t mode of roundup-server, its default if '
+                        'not given')
+    parser.add_argument('--helpers', nargs='+', default=list(HELPERS),
+                        choices=list(HELPERS))
+    parser.add_argument('--iterations', type=int, default=50,
+                        help='times each helper is gone through')
+    parser.add_argument('--warmup', type=int, default=2,
+                        help='iterations left out of the results')
+    parser.add_argument('--flips', type=int, default=3,
+                        help='pages flipped forward, and back again, per '
+                        'iteration')
+    parser.add_argument('--output', help='file for the results, stdout if '
+                        'not given')
+    generate_tracker.add_arguments(parser)
+    args = parser.parse_args()
+
+    home = server = None
+    volumes = {}
+    if args.url is None:
+        home = args.home
+        if home is None:
+            home = os.path.join(tempfile.mkdtemp(prefix='bench-tracker-'),
+                                generate_tracker.TRACKER_NAME)
+            generate_tracker.generate(home, args.users, args.issues,
+                                      args.keywords, args.journal_issues,
+                                      args.journal_length, args.backend,
+                                      args.port, args.seed)
+    try:
+        if home is not None:
+            server = Server(home, args.multiprocess)
+            for name in ('user', 'issue', 'keyword'):
+                volumes[name] = server.get_json(
+                    'rest/data/%s?@page_size=1' % name)['data']['@total_size']
+        browser = Browser(args.url or server.url, args.user, args.password)
+        try:
+            rand = random.Random(args.seed)
+            results = dict((helper, bench_helper(
+                browser, helper, args.iterations, args.warmup, args.flips,
+                rand)) for helper in args.helpers)
+            version = browser.version()
+        finally:
+            browser.quit()
+    finally:
+        if server is not None:
+            server.stop()
+        if args.url is None and args.home is None and not args.keep:
+            shutil.rmtree(os.path.dirname(home))
+
+    report = {
+        "date": datetime.datetime.now().isoformat(timespec='seconds'),
+        "firefox": version,
+        "url": args.url or server.url,
+        "volumes": volumes,
+        "iterations": args.iterations,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
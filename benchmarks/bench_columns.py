@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compare the row and column forms of a classhelper collection page.
+
+Builds a synthetic page of users in the form /rest/data/user returns
+it, turns it into the /rest/columns/user form with the _to_columns
+function of interfaces.py, and reports the payload size (plain and
+gzipped) and the time to parse each.
+
+    python3 benchmarks/bench_columns.py [--rows 1000] [--repeat 20]
+
+Needs roundup installed, no tracker is used.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TRACKER = os.path.join(HERE, os.pardir)
+
+
+def load_interfaces():
+    sys.path.insert(0, os.path.join(TRACKER, 'lib'))
+    env = {}
+    path = os.path.join(TRACKER, 'interfaces.py')
+    with open(path) as f:
+        exec(compile(f.read(), path, 'exec'), env)
+    return env
+
+
+def synthetic_page(rows):
+    base = 'https://tracker.example.com/demo/rest/data/user/'
+    return {
+        "collection": [{
+            "id": str(i),
+            "link": base + str(i),
+            "username": "user%d" % i,
+            "realname": "Some User Number %d" % i,
+            "roles": "User" if i % 7 else "User,Admin",
+        } for i in range(1, rows + 1)],
+        "@total_size": rows,
+        "@links": {"self": [{"rel": "self", "uri":
+                             base[:-1] + "?@page_index=1&@page_size=%d"
+                             % rows}]},
+    }
+
+
+def measure(payload, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        json.loads(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=1000,
+                        help='items on the page')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='timed parses per form, the best is reported')
+    args = parser.parse_args()
+
+    to_columns = load_interfaces()['_to_columns']
+    data = synthetic_page(args.rows)
+    forms = [('rows', {"data": data}),
+             ('columns', {"data": to_columns(data)})]
+
+    print('%8s  %10s  %10s  %10s' % ('form', 'bytes', 'gzipped', 'parse ms'))
+    for name, body in forms:
+        # the rest api pretty prints unless @pretty=false is given
+        for pretty in (4, None):
+            payload = json.dumps(body, indent=pretty)
+            print('%8s  %10d  %10d  %10.3f' % (
+                name + ('' if pretty else '/c'), len(payload),
+                len(gzip.compress(payload.encode('utf-8'))),
+                measure(payload, args.repeat) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Compare the summary made by detectors/messagesummary.py with the one
+parseContent makes from the whole message.
+
+Checks that both give the same summary on a set of ordinary messages,
+then reports time and peak memory of both on synthetic large messages.
+
+    python3 benchmarks/bench_messagesummary.py [--sizes 1,8,32] [--repeat 3]
+
+Sizes are in MiB. Needs roundup installed, no tracker is used.
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+import tracemalloc
+
+from roundup.configuration import CoreConfig
+from roundup.mailgw import parseContent
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_detector():
+    path = os.path.join(HERE, os.pardir, 'detectors', 'messagesummary.py')
+    spec = importlib.util.spec_from_file_location('messagesummary', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+LOG_LINE = ('2024-03-01 12:00:00,123 ERROR [worker-7] request failed: '
+            'connection reset by peer (retry 3 of 5)\n')
+
+ORDINARY = [
+    '',
+    'one line',
+    'First sentence. Second sentence.\nSecond line\n\nnext paragraph',
+    '\n\n\nleading newlines\n\ntext',
+    '> quoted\n> more\n\nthe answer. done',
+    '> quoted\n> more\nanswer inside the quote\n\nrest',
+    'On Monday someone wrote:\n> quoted\n\nreply here',
+    'body\n\n-- \nsignature',
+    'no punctuation at all\nsecond line',
+    '\r\nwindows\r\n\r\nline endings.\r\n',
+    '> ' + 'quote line\n> ' * 5000 + '\n\nreply after a long quote.',
+    'x' * 20000 + '. long paragraph\n\nnext',
+    LOG_LINE * 2000,
+    'Summary line.\n\n' + LOG_LINE * 2000,
+    '\n\n'.join('> quoted %d' % i for i in range(3000)) + '\n\nanswer.',
+]
+
+
+def synthetic(size):
+    """A short report followed by size bytes of pasted log."""
+    intro = 'The nightly job crashed again. Log attached below.\n\n'
+    return intro + LOG_LINE * (size // len(LOG_LINE) + 1)
+
+
+def measure(function, content, config, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(content, config)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    summary = function(content, config)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return summary, best, peak
+
+
+def full_summary(content, config):
+    return parseContent(content, config=config)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default='1,8,32',
+                        help='comma separated message sizes in MiB')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per size, the best is reported')
+    args = parser.parse_args()
+
+    config = CoreConfig()
+    detector = load_detector()
+
+    for content in ORDINARY:
+        expected = full_summary(content, config)
+        got = detector.make_summary(content, config)
+        assert got == expected, (content[:60], got[:60], expected[:60])
+    print('%d ordinary messages give the same summary' % len(ORDINARY))
+
+    print('%8s  %12s  %12s  %12s  %12s' % (
+        'MiB', 'full ms', 'bounded ms', 'full peak', 'bounded peak'))
+    for size in args.sizes.split(','):
+        content = synthetic(int(size) * 1024 * 1024)
+        full, full_time, full_peak = measure(
+            full_summary, content, config, args.repeat)
+        bounded, bounded_time, bounded_peak = measure(
+            detector.make_summary, content, config, args.repeat)
+        assert full == bounded, (full, bounded)
+        print('%8s  %12.3f  %12.3f  %12d  %12d' % (
+            size, full_time * 1000, bounded_time * 1000,
+            full_peak, bounded_peak))
+
+
+if __name__ == '__main__':
+    main()
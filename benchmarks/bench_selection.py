@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of the classhelper selection in a real browser.
+
+Compares the old comma joined string handling of the popup-preview
+with the Set kept by ClassHelper, for 1000 selections and a page of
+1000 rows:
+
+  select: toggling 1000 ids one after the other
+  render: checking 1000 rows against the 1000 selected ids
+
+Runs against a demo tracker like test_classhelper.py, the tracker page
+only has to load classhelper.js.
+
+    python3 benchmarks/bench_selection.py [--count 1000] [--repeat 5]
+"""
+
+import argparse
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+HEADLESS = True
+TRACKER_URL = "http://localhost:8080/demo/"
+
+BENCHMARK = """
+const count = arguments[0];
+const rows = Array.from({ length: count }, (_, i) => ({ id: String(i + 1), username: "user" + (i + 1) }));
+const ids = rows.map(row => row.id);
+const time = (f) => { const start = performance.now(); f(); return performance.now() - start; };
+
+// the string handling ClassHelper.selectionEvent and getTableFragment had
+const preview = document.createElement("input");
+preview.id = "popup-preview";
+document.body.appendChild(preview);
+const oldSelect = time(() => {
+    for (let value of ids) {
+        if (preview.value == "" || preview.value == null) {
+            preview.value = value;
+        } else {
+            const values = preview.value.split(",");
+            const exists = values.findIndex(v => v == value.toString());
+            if (exists > -1) {
+                values.splice(exists, 1);
+                preview.value = values.join(",");
+            } else {
+                preview.value += "," + value;
+            }
+        }
+    }
+});
+let checked = 0;
+const oldRender = time(() => {
+    const values = preview.value.split(",");
+    for (let row of rows) {
+        if (values.includes(row.id)) checked++;
+    }
+});
+
+// the Set of the component
+preview.value = "";
+// the login page has no classhelper, so classhelper.js did not register
+// the element, and an unregistered element is never upgraded
+if (!customElements.get("roundup-classhelper")) {
+    customElements.define("roundup-classhelper", ClassHelper);
+}
+const helper = document.createElement("roundup-classhelper");
+helper.popupRef = window;
+// every click updates the preview, like in the popup
+const newSelect = time(() => {
+    for (let value of ids) {
+        helper.selectionEvent(value);
+    }
+});
+const newRender = time(() => {
+    for (let row of rows) {
+        if (helper.selection.has(row.id)) checked++;
+    }
+});
+const consistent = preview.value === ids.join(",") && checked === 2 * count;
+preview.remove();
+return [oldSelect, newSelect, oldRender, newRender, consistent];
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--count', type=int, default=1000,
+                        help='selected ids and rows on the page')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs, the best is reported')
+    args = parser.parse_args()
+
+    options = webdriver.FirefoxOptions()
+    if HEADLESS:
+        options.add_argument('--headless')
+    driver = webdriver.Firefox(options=options)
+    try:
+        driver.get(TRACKER_URL)
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.NAME, "__login_name")))
+
+        results = [driver.execute_script(BENCHMARK, args.count)
+                   for _ in range(args.repeat)]
+    finally:
+        driver.quit()
+
+    if not all(result[4] for result in results):
+        raise SystemExit("the old and new selection do not agree")
+
+    print('%8s  %10s  %10s' % ('', 'string ms', 'Set ms'))
+    for name, column in (('select', 0), ('render', 2)):
+        print('%8s  %10.2f  %10.2f' % (
+            name, min(result[column] for result in results),
+            min(result[column + 1] for result in results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Benchmark of the classhelper table rendering in a real browser.
+
+Compares the old getTableFragment, which called createElement for every
+row, cell and checkbox in the opener document, with the rows cloned
+from the <template> of ClassHelperRowTemplate:
+
+  build:  the table of the first page, put into the document
+  change: the table of the next page of the same size, the old builder
+          replaces the whole table, the template rows are patched
+
+The old builder works in a second document that stands in for the
+opener, its table has to be moved over like before. Both force a
+layout after every step, so the time includes styling the rows.
+
+Runs against a demo tracker like test_classhelper.py, the tracker page
+only has to load classhelper.js.
+
+    python3 benchmarks/bench_table.py [--rows 100 1000 5000] [--repeat 5]
+"""
+
+import argparse
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+HEADLESS = True
+TRACKER_URL = "http://localhost:8080/demo/"
+
+BENCHMARK = """
+const count = arguments[0];
+const headers = ["id", "username", "realname", "address"];
+const page = (start) => {
+    const data = Array.from({ length: count }, (_, i) => ({
+        id: String(start + i), username: "user" + (start + i),
+        realname: "Real Name " + (start + i), address: "user" + (start + i) + "@example.com"
+    }));
+    return { data, cells: ClassHelper.getCells(headers, data) };
+};
+const first = page(1);
+const next = page(count + 1);
+const time = (f) => { const start = performance.now(); f(); document.body.offsetHeight; return performance.now() - start; };
+ClassHelper.translations = ClassHelper.translations ?? {};
+const selection = new Set(["2", "5", "9"]);
+
+// the builder getTableFragment had, in a document standing in for the opener
+const opener = document.implementation.createHTMLDocument("opener");
+function oldTableFragment(data) {
+    const fragment = opener.createDocumentFragment();
+    const container = opener.createElement('div');
+    container.id = "popup-tablediv";
+    container.classList.add("popup-tablediv");
+    const table = opener.createElement('table');
+    table.classList.add("popup-table");
+    const thead = opener.createElement('thead');
+    const tbody = opener.createElement('tbody');
+    const tfoot = opener.createElement('tfoot');
+    const headerRow = opener.createElement('tr');
+    let thx = opener.createElement("th");
+    thx.textContent = "X";
+    thx.classList.add("table-header");
+    headerRow.appendChild(thx);
+    headers.forEach(header => {
+        const th = opener.createElement('th');
+        th.textContent = ClassHelper.translations[header];
+        headerRow.appendChild(th);
+    });
+    thead.appendChild(headerRow);
+    data.forEach((entry) => {
+        const row = opener.createElement('tr');
+        row.dataset.id = entry[headers[0]];
+        row.setAttribute("tabindex", 0);
+        row.classList.add("row-style");
+        const td = opener.createElement('td');
+        const checkbox = opener.createElement("input");
+        checkbox.setAttribute("type", "checkbox");
+        checkbox.checked = false;
+        checkbox.setAttribute("tabindex", -1);
+        td.appendChild(checkbox);
+        row.appendChild(td);
+        if (selection.has(entry[headers[0]])) {
+            checkbox.checked = true;
+        }
+        headers.forEach(header => {
+            const td = opener.createElement('td');
+            td.textContent = entry[header];
+            row.appendChild(td);
+        });
+        tbody.appendChild(row);
+    });
+    tfoot.appendChild(headerRow.cloneNode(true));
+    table.appendChild(thead);
+    table.appendChild(tbody);
+    table.appendChild(tfoot);
+    container.appendChild(table);
+    fragment.appendChild(container);
+    return fragment;
+}
+
+const results = [];
+document.getElementById("popup-tablediv")?.remove();
+results.push(time(() => document.body.appendChild(oldTableFragment(first.data))));
+results.push(time(() => document.body.replaceChild(oldTableFragment(next.data), document.getElementById("popup-tablediv"))));
+document.getElementById("popup-tablediv").remove();
+
+// pages without a classhelper do not register the element
+if (!customElements.get("roundup-classhelper")) {
+    customElements.define("roundup-classhelper", ClassHelper);
+}
+const helper = document.createElement("roundup-classhelper");
+helper.popupRef = window;
+helper.selection = selection;
+results.push(time(() => document.body.appendChild(helper.getTableFragment(headers, first.data, first.cells))));
+results.push(time(() => helper.renderTable(headers, next.data, next.cells)));
+
+const rows = document.getElementById("popup-tablediv").querySelector("tbody").rows;
+const consistent = rows.length === count && rows[0].dataset.id === next.data[0].id &&
+    rows[count - 1].lastElementChild.textContent === next.data[count - 1].address;
+document.getElementById("popup-tablediv").remove();
+results.push(consistent);
+return results;
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[100, 1000, 5000],
+                        help='rows on a page')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs, the best is reported')
+    args = parser.parse_args()
+
+    options = webdriver.FirefoxOptions()
+    if HEADLESS:
+        options.add_argument('--headless')
+    driver = webdriver.Firefox(options=options)
+    try:
+        driver.get(TRACKER_URL)
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.NAME, "__login_name")))
+
+        results = {}
+        for rows in args.rows:
+            results[rows] = [driver.execute_script(BENCHMARK, rows)
+                             for _ in range(args.repeat)]
+    finally:
+        driver.quit()
+
+    print('%6s  %8s  %16s  %11s' % ('rows', '', 'createElement ms', 'template ms'))
+    for rows, runs in results.items():
+        if not all(run[4] for run in runs):
+            raise SystemExit("the template rows do not show the page")
+        for name, column in (('build', 0), ('change', 1)):
+            print('%6d  %8s  %16.2f  %11.2f' % (
+                rows, name, min(run[column] for run in runs),
+                min(run[column + 2] for run in runs)))
+
+
+if __name__ == '__main__':
+    main()
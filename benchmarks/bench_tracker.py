@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Benchmark suite of the tracker at scale, with the results as JSON.
+
+Builds a throwaway tracker with generate_tracker.py (same volume options)
+or uses the one given with --home, serves it with roundup-server and
+measures:
+
+  rest_data_page        GET rest/data/issue, a random page
+  rest_columns_page     GET rest/columns/issue, a random page
+  rest_cursor_page      GET rest/cursor/issue, following the next links
+  search_issues         GET rest/data/issue filtered on a title word
+                        and a status
+  search_users          GET rest/data/user filtered on the username
+  roles                 GET rest/roles
+  translation           GET ?@template=translation, the classhelper
+                        translations
+  detectors_issue_create, detectors_issue_set, detectors_user_create
+                        db.issue.create, db.issue.set and db.user.create
+                        with the detectors, in this process. Every
+                        COMMIT_EVERY-th operation includes the commit.
+
+The detector benchmarks add items to the tracker, rolling them back is
+not reliable as the full text indexer of some backends commits. The
+volumes reported are the ones before they ran.
+
+Every benchmark reports its ops, ops per second and the mean, p50, p95,
+p99 and max latency in milliseconds:
+
+    python3 benchmarks/bench_tracker.py [--users 100000] [--issues 500000]
+        [--requests 200] [--output results.json]
+    python3 benchmarks/bench_tracker.py --home /tmp/bench-tracker
+
+Needs roundup installed.
+"""
+
+import argparse
+import datetime
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import roundup
+from roundup import instance
+from roundup.configuration import CoreConfig
+
+import generate_tracker
+
+PAGE_SIZE = 50
+FIELDS = 'title,status,priority,assignedto'
+
+# Properties the classhelper of the issue page asks to translate
+TRANSLATION_PROPERTIES = ('username,realname,address,roles,title,status,'
+                          'keyword,name,apply,cancel,next,prev,search,reset')
+
+# Operations between two commits of the detector benchmarks
+COMMIT_EVERY = 100
+
+# Seconds to wait for roundup-server to answer
+SERVER_TIMEOUT = 30
+
+
+def percentile(samples, percent):
+    """Nearest rank percentile of sorted samples."""
+    rank = max(1, -(-len(samples) * percent // 100))
+    return samples[int(rank) - 1]
+
+
+def summary(samples, elapsed):
+    """samples are the seconds of each operation, elapsed the seconds of
+       all of them.
+    """
+    samples = sorted(sample * 1000 for sample in samples)
+    result = {
+        "ops": len(samples),
+        "ops_per_sec": round(len(samples) / elapsed, 2),
+        "mean": round(sum(samples) / len(samples), 3),
+        "max": round(samples[-1], 3),
+    }
+    for percent in (50, 95, 99):
+        result["p%d" % percent] = round(percentile(samples, percent), 3)
+    return result
+
+
+def run(operation, count, warmup=5):
+    """Time count calls of operation(i)."""
+    for i in range(warmup):
+        operation(i)
+    samples = []
+    start = time.perf_counter()
+    for i in range(count):
+        begin = time.perf_counter()
+        operation(i)
+        samples.append(time.perf_counter() - begin)
+    return summary(samples, time.perf_counter() - start)
+
+
+class Server:
+    """roundup-server serving the tracker at home, the requests are made
+       as admin with a session cookie. Basic auth would check the
+       password on every request, which takes longer than most requests.
+    """
+
+    def __init__(self, home, mode):
+        self.port = generate_tracker.tracker_port(home)
+        self.url = CoreConfig(home)['TRACKER_WEB']
+        command = [sys.executable, '-m', 'roundup.scripts.roundup_server',
+                   '-n', 'localhost', '-p', str(self.port),
+                   '-l', os.path.join(home, 'server.log')]
+        if mode:
+            command += ['-t', mode]
+        command.append('%s=%s' % (generate_tracker.TRACKER_NAME, home))
+        self.process = subprocess.Popen(command)
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+        deadline = time.time() + SERVER_TIMEOUT
+        while True:
+            try:
+                self.login()
+                return
+            except (urllib.error.URLError, ConnectionError):
+                if time.time() > deadline or self.process.poll() is not None:
+                    self.stop()
+                    raise SystemExit('roundup-server did not start, see %s'
+                                     % os.path.join(home, 'server.log'))
+                time.sleep(0.2)
+
+    def login(self):
+        body = urllib.parse.urlencode({
+            '__login_name': 'admin', '__login_password': 'admin',
+            '@action': 'login'}).encode('ascii')
+        request = urllib.request.Request(self.url, body, headers={
+            'Referer': self.url})
+        with self.opener.open(request) as response:
+            response.read()
+
+    def get(self, uri):
+        """GET uri, relative to the tracker or absolute."""
+        if not uri.startswith('http'):
+            uri = self.url + uri
+        request = urllib.request.Request(uri, headers={
+            'Accept': 'application/json'})
+        with self.opener.open(request) as response:
+            return response.read()
+
+    def get_json(self, uri):
+        return json.loads(self.get(uri))
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def bench_rest(server, count, seed):
+    rand = random.Random(seed)
+    results = {}
+    issues = server.get_json('rest/data/issue?@page_size=1')['data']
+    pages = max(1, -(-issues['@total_size'] // PAGE_SIZE))
+    statuses = [item['id'] for item in
+                server.get_json('rest/data/status')['data']['collection']]
+
+    for name, path in (('rest_data_page', 'rest/data/issue'),
+                       ('rest_columns_page', 'rest/columns/issue')):
+        results[name] = run(lambda i: server.get(
+            '%s?@page_size=%d&@page_index=%d&@fields=%s' % (
+                path, PAGE_SIZE, rand.randint(1, pages), FIELDS)), count)
+
+    first = 'rest/cursor/issue?@page_size=%d&@fields=%s' % (PAGE_SIZE, FIELDS)
+    cursor = [first]
+
+    def next_page(i):
+        links = server.get_json(cursor[0])['data']['@links']
+        cursor[0] = links['next'][0]['uri'] if 'next' in links else first
+    results['rest_cursor_page'] = run(next_page, count)
+
+    results['search_issues'] = run(lambda i: server.get(
+        'rest/data/issue?title=%s&status=%s&@page_size=%d&@fields=%s' % (
+            rand.choice(generate_tracker.WORDS), rand.choice(statuses),
+            PAGE_SIZE, FIELDS)), count)
+    results['search_users'] = run(lambda i: server.get(
+        'rest/data/user?username=user%d&@page_size=%d&@fields=username' % (
+            rand.randint(0, 99), PAGE_SIZE)), count)
+    results['roles'] = run(lambda i: server.get('rest/roles'), count)
+    results['translation'] = run(lambda i: server.get(
+        '?@template=translation&properties=' + TRANSLATION_PROPERTIES), count)
+    return results
+
+
+def bench_detectors(home, count, seed):
+    rand = random.Random(seed)
+    results = {}
+    db = instance.open(home).open('admin')
+    try:
+        volumes = dict((name, len(db.getclass(name).list()))
+                       for name in ('user', 'issue', 'keyword'))
+        issue_ids = db.issue.list()
+        statuses = db.status.list()
+        users = db.user.list()
+        # usernames are unique, also over several runs on the same tracker
+        run_id = int(time.time())
+
+        def committed(operation):
+            def wrapped(i):
+                operation(i)
+                if (i + 1) % COMMIT_EVERY == 0:
+                    db.commit()
+            return wrapped
+
+        results['detectors_issue_create'] = run(committed(
+            lambda i: db.issue.create(
+                title='benchmark issue %d' % i,
+                status=rand.choice(statuses),
+                nosy=rand.sample(users, min(3, len(users))))), count)
+        db.commit()
+        results['detectors_issue_set'] = run(committed(
+            lambda i: db.issue.set(rand.choice(issue_ids),
+                                   title='benchmark change %d' % i,
+                                   status=rand.choice(statuses))), count)
+        db.commit()
+        results['detectors_user_create'] = run(committed(
+            lambda i: db.user.create(
+                username='bench%d-%d' % (run_id, i),
+                address='bench%d-%d@example.com' % (run_id, i),
+                roles='User')), count, warmup=0)
+        db.commit()
+    finally:
+        db.close()
+    return results, volumes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--home', help='tracker made by generate_tracker.py '
+                        'to use instead of a new one')
+    parser.add_argument('--keep', action='store_true',
+                        help='keep the new tracker')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='operations timed per benchmark')
+    parser.add_argument('--multiprocess', default=None,
+                        help='-t mode of roundup-server, its default if '
+                        'not given')
+    parser.add_argument('--output', help='file for the results, stdout if '
+                        'not given')
+    generate_tracker.add_arguments(parser)
+    args = parser.parse_args()
+
+    home = args.home
+    if home is None:
+        home = os.path.join(tempfile.mkdtemp(prefix='bench-tracker-'),
+                            generate_tracker.TRACKER_NAME)
+        generate_tracker.generate(home, args.users, args.issues,
+                                  args.keywords, args.journal_issues,
+                                  args.journal_length, args.backend,
+                                  args.port, args.seed)
+    try:
+        server = Server(home, args.multiprocess)
+        try:
+            results = bench_rest(server, args.requests, args.seed)
+        finally:
+            server.stop()
+        detector_results, volumes = bench_detectors(home, args.requests,
+                                                    args.seed)
+        results.update(detector_results)
+    finally:
+        if args.home is None and not args.keep:
+            shutil.rmtree(os.path.dirname(home))
+
+    report = {
+        "date": datetime.datetime.now().isoformat(timespec='seconds'),
+        "roundup": roundup.__version__,
+        "python": platform.python_version(),
+        "backend": CoreConfig(home).RDBMS_BACKEND if args.home
+        else args.backend,
+        "volumes": volumes,
+        "page_size": PAGE_SIZE,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Build a throwaway tracker from this repository filled with synthetic data.
+
+Installs the classic template of roundup into HOME, copies the schema,
+initial data, interfaces.py, detectors, extensions, html and lib of this
+repository over it like the development setup in the README, initialises
+the database and fills it with the given volumes:
+
+    python3 benchmarks/generate_tracker.py HOME [--users 100000]
+        [--issues 500000] [--keywords 5000] [--journal-issues 100]
+        [--journal-length 500] [--backend sqlite] [--port 8081]
+
+Every item is created through the hyperdb with the detectors on, so the
+journals and indexes are the ones a real tracker has. --journal-issues
+issues get --journal-length more changes each, for long journals. The
+data only depends on --seed. bench_tracker.py serves the tracker on
+http://localhost:PORT/bench/.
+
+Needs roundup installed.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import time
+
+from roundup import instance, password
+from roundup.admin import AdminTool
+from roundup.configuration import CoreConfig
+from roundup.init import install
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TRACKER = os.path.join(HERE, os.pardir)
+
+# Parts of this repository copied over the classic template
+TRACKER_FILES = ['schema.py', 'initial_data.py', 'interfaces.py']
+TRACKER_DIRS = ['detectors', 'extensions', 'html', 'lib', 'locale']
+
+# Name of the tracker in its url
+TRACKER_NAME = 'bench'
+
+# Items created between two commits
+COMMIT_EVERY = 1000
+
+WORDS = ('crash error timeout login search page mail export import report '
+         'upload slow memory button layout printer network server client '
+         'database index cache permission password calendar').split()
+
+
+def install_tracker(home, backend, port):
+    """The classic template with the files of this repository on top,
+       with an empty database.
+    """
+    if os.path.exists(home):
+        raise SystemExit('%s exists, give a new directory' % home)
+    templates = AdminTool().listTemplates()
+    install(home, templates['classic']['path'], settings={
+        'rdbms_backend': backend,
+        'tracker_web': 'http://localhost:%d/%s/' % (port, TRACKER_NAME),
+        'mail_domain': 'localhost',
+        # the nosy reactor writes its mails here instead of sending them
+        'mail_debug': os.path.join(os.path.abspath(home), 'mail.log'),
+    })
+
+    for name in TRACKER_FILES:
+        shutil.copy(os.path.join(TRACKER, name), home)
+    for name in TRACKER_DIRS:
+        shutil.copytree(os.path.join(TRACKER, name), os.path.join(home, name),
+                        dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns('__pycache__'))
+
+    tracker = instance.open(home)
+    tracker.init(password.Password('admin', config=tracker.config))
+
+
+def progress(what, done, total):
+    sys.stderr.write('\r%s %d/%d' % (what, done, total))
+    if done == total:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
+
+
+def populate(home, users, issues, keywords, journal_issues, journal_length,
+             seed):
+    rand = random.Random(seed)
+    db = instance.open(home).open('admin')
+    try:
+        def create_all(what, count, create):
+            ids = []
+            for i in range(count):
+                ids.append(create(i))
+                if (i + 1) % COMMIT_EVERY == 0 or i + 1 == count:
+                    db.commit()
+                    progress(what, i + 1, count)
+            return ids
+
+        keyword_ids = create_all('keywords', keywords, lambda i:
+                                 db.keyword.create(name='keyword%d' % i))
+        user_ids = create_all('users', users, lambda i: db.user.create(
+            username='user%d' % i, realname='User %d' % i,
+            address='user%d@example.com' % i, roles='User'))
+        status_ids = db.status.list()
+        priority_ids = db.priority.list()
+
+        def create_issue(i):
+            people = rand.sample(user_ids, min(3, len(user_ids)))
+            return db.issue.create(
+                title='%s %s %d' % (rand.choice(WORDS), rand.choice(WORDS), i),
+                status=rand.choice(status_ids),
+                priority=rand.choice(priority_ids),
+                keyword=rand.sample(keyword_ids, min(rand.randint(0, 3),
+                                                     len(keyword_ids))),
+                assignedto=people[0] if people else None,
+                nosy=people)
+        issue_ids = create_all('issues', issues, create_issue)
+
+        journaled = issue_ids[:journal_issues]
+        changes = len(journaled) * journal_length
+        done = 0
+        for step in range(journal_length):
+            for issue_id in journaled:
+                db.issue.set(issue_id, status=rand.choice(status_ids),
+                             title='%s changed %d' % (rand.choice(WORDS),
+                                                      step))
+                done += 1
+                if done % COMMIT_EVERY == 0 or done == changes:
+                    db.commit()
+                    progress('journal entries', done, changes)
+    finally:
+        db.close()
+
+
+def generate(home, users=1000, issues=5000, keywords=100, journal_issues=10,
+             journal_length=100, backend='sqlite', port=8081, seed=0):
+    start = time.time()
+    install_tracker(home, backend, port)
+    populate(home, users, issues, keywords, journal_issues, journal_length,
+             seed)
+    return time.time() - start
+
+
+def tracker_port(home):
+    """The port in the tracker url set by install_tracker."""
+    return int(CoreConfig(home)['TRACKER_WEB'].split(':')[2].split('/')[0])
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--issues', type=int, default=5000)
+    parser.add_argument('--keywords', type=int, default=100)
+    parser.add_argument('--journal-issues', type=int, default=10,
+                        help='issues given a long journal')
+    parser.add_argument('--journal-length', type=int, default=100,
+                        help='changes made to each of them')
+    parser.add_argument('--backend', default='sqlite',
+                        help='rdbms backend of the tracker')
+    parser.add_argument('--port', type=int, default=8081,
+                        help='port the tracker is served on')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('home', help='directory of the new tracker')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    elapsed = generate(args.home, args.users, args.issues, args.keywords,
+                       args.journal_issues, args.journal_length,
+                       args.backend, args.port, args.seed)
+    print('generated %s in %.1f s' % (args.home, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# Bump the change counter of a class (see lib/classcache.py) when one
+# of its items changes. The bump is queued on the transaction so it
+# happens after the commit: bumping earlier would let another process
+# cache the old items under the new counter.
+
+from classcache import bump_counter
+
+def schedule_bump(db, cl, nodeid, oldvalues):
+    ''' Queue one bump per class and transaction.
+    '''
+    # commit and rollback both start a new transactions list, so the
+    # classes already queued are remembered together with that list
+    queued = getattr(db, 'classcache_queued', None)
+    if queued is None or queued[0] is not db.transactions:
+        queued = db.classcache_queued = (db.transactions, set())
+    if cl.classname in queued[1]:
+        return
+    queued[1].add(cl.classname)
+    db.transactions.append((bump_counter,
+                            (db.config.DATABASE, cl.classname)))
+
+def init(db):
+    for classname in db.getclasses():
+        cl = db.getclass(classname)
+        for event in ('create', 'set', 'retire', 'restore'):
+            cl.react(event, schedule_bump)
+
+# vim: set filetype=python ts=4 sw=4 et si
@@ -0,0 +1,25 @@
+# Time every auditor and reactor of the tracker (see lib/detectortimings.py)
+# when detectors/config.ini has
+#
+#   [detectortimings]
+#   enabled = yes
+#
+# The calls of each transaction are logged to roundup.detectortimings at
+# the info level, scripts/detector_timings.py reports the totals.
+
+from roundup.configuration import BooleanOption, InvalidOptionError
+
+from detectortimings import instrument
+
+def init(db):
+    try:
+        enabled = BooleanOption(None, "detector::Detectortimings",
+                                "ENABLED").str2value(
+            db.config.detectors['DETECTORTIMINGS_ENABLED'])
+    except InvalidOptionError:
+        # off unless asked for
+        return
+    if enabled:
+        instrument(db)
+
+# vim: set filetype=python ts=4 sw=4 et si
@@ -1,13 +1,57 @@
 from roundup.mailgw import parseContent
 
+# Size of the first part of a message searched for the summary. It is
+# doubled until the part holds the section the summary comes from.
+SUMMARY_FIRST_WINDOW = 8 * 1024
+
+# Never look further into a message than this for the summary. It is
+# only reached when a message starts with a huge quote or paragraph;
+# the summary then comes from the first SUMMARY_SCAN_LIMIT characters.
+SUMMARY_SCAN_LIMIT = 512 * 1024
+
+def make_summary(content, config):
+    ''' Return the summary parseContent makes of content, parsing only
+        the part of content up to the end of the section the summary
+        is taken from instead of the whole message.
+
+        The summary is the first line (or sentence) of the first section
+        that is not entirely quoted, so a prefix of the message that ends
+        at a blank line after that section gives the same summary.
+    '''
+    if len(content) <= SUMMARY_FIRST_WINDOW:
+        return parseContent(content, config=config)[0]
+
+    # Try the prefix ending at the first blank line, then the ones
+    # ending at the first blank line past a window that doubles each
+    # time. finditer finds the same blank lines parseContent splits on
+    # and endpos keeps it from reading past the scan limit.
+    window = 0
+    untried = None
+    for blankline in config["MAILGW_BLANKLINE_RE"].finditer(
+            content, 0, SUMMARY_SCAN_LIMIT):
+        untried = blankline.start()
+        if untried < window:
+            continue
+        summary = parseContent(content[:untried], config=config)[0]
+        if summary:
+            return summary
+        untried = None
+        window = max(window * 2, SUMMARY_FIRST_WINDOW)
+
+    if untried is not None:
+        summary = parseContent(content[:untried], config=config)[0]
+        if summary:
+            return summary
+
+    return parseContent(content[:SUMMARY_SCAN_LIMIT], config=config)[0]
+
 def summarygenerator(db, cl, nodeid, newvalues):
     ''' If the message doesn't have a summary, make one for it.
     '''
     if 'summary' in newvalues or 'content' not in newvalues:
         return
 
-    summary, content = parseContent(newvalues['content'], config=db.config)
-    newvalues['summary'] = summary
+    newvalues['summary'] = make_summary(newvalues['content'], db.config)
 
 
 def init(db):
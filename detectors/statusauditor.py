@@ -21,101 +21,134 @@
 
 from roundup.configuration import BooleanOption, InvalidOptionError
 
-def chatty(db, cl, nodeid, newvalues):
-    ''' If the issue is currently 'resolved', 'done-cbb' or None,
-        then set it to 'chatting'. If issue is 'unread' and
-        chatting_requires_two_users is true, set state
-        to 'chatting' if the person adding the new message is not
-        the same as the person who created the issue. This allows
-        somebody to submit multiple emails describing the problem
-        without changing it to 'chatting'. 'chatting' should
-        indicate at least two people are 'chatting'.
+class StatusAuditor:
+    ''' The status auditors of one db open and the state they share:
+        the chatting_requires_two_users option, parsed once, and the
+        ids of the status names they use, looked up once.
     '''
-    # If set to true, change state from 'unread' to 'chatting' only
-    # if the author of the update is not the person who created the
-    # first message (and thus the issue). If false (default ini file
-    # setting) set 'chatting' when the second message is received.
-    try:
-        chatting_requires_two_users = BooleanOption(None,
-                        "detector::Statusauditor",
-                        "CHATTING_REQUIRES_TWO_USERS").str2value(
-        db.config.detectors[
-        'STATUSAUDITOR_CHATTING_REQUIRES_TWO_USERS' ]
-    )
-    except InvalidOptionError:
-        raise InvalidOptionError("Option STATUSAUDITOR_CHATTING_REQUIRES_TWO_USERS not found in detectors/config.ini. Contact tracker admin to fix.")
-        
-    # don't fire if there's no new message (ie. chat)
-    if 'messages' not in newvalues:
-        return
-    if newvalues['messages'] == cl.get(nodeid, 'messages'):
-        return
-
-    # get the chatting state ID
-    try:
-        chatting_id = db.status.lookup('chatting')
-    except KeyError:
-        # no chatting state, ignore all this stuff
-        return
-
-    # get the current value
-    current_status = cl.get(nodeid, 'status')
-
-    # see if there's an explicit change in this transaction
-    if 'status' in newvalues:
-        # yep, skip
-        return
-
-    # determine the id of 'unread', 'resolved' and 'chatting'
-    fromstates = []
-    for state in 'unread resolved done-cbb'.split():
+
+    def __init__(self, db):
+        # If set to true, change state from 'unread' to 'chatting' only
+        # if the author of the update is not the person who created the
+        # first message (and thus the issue). If false (default ini file
+        # setting) set 'chatting' when the second message is received.
+        # A missing option is only reported when chatty runs, like before.
+        self.config_error = None
         try:
-            fromstates.append(db.status.lookup(state))
-        except KeyError:
-            pass
-
-    unread = fromstates[0] # grab the 'unread' state which is first
-
-    # ok, there's no explicit change, so check if we are in a state that
-    # should be changed. First see if we should set 'chatting' based on
-    # who opened the issue.
-    if current_status == unread and chatting_requires_two_users:
-        # find creator of issue and compare to currentuser making
-        # update. If the creator is same as initial author don't
-        # change to 'chatting'.
-        issue_creator = cl.get(nodeid, 'creator')
-        if issue_creator == db.getuid():
-            # person is chatting with themselves, don't set 'chatting'
+            self.chatting_requires_two_users = BooleanOption(None,
+                            "detector::Statusauditor",
+                            "CHATTING_REQUIRES_TWO_USERS").str2value(
+            db.config.detectors[
+            'STATUSAUDITOR_CHATTING_REQUIRES_TWO_USERS' ]
+        )
+        except InvalidOptionError:
+            self.config_error = InvalidOptionError("Option STATUSAUDITOR_CHATTING_REQUIRES_TWO_USERS not found in detectors/config.ini. Contact tracker admin to fix.")
+
+        # status name -> id or None if there is no such status
+        self.status_ids = {}
+
+    def status_id(self, db, name):
+        ''' db.status.lookup(name) but None instead of a KeyError,
+            remembered until a status changes
+        '''
+        if name not in self.status_ids:
+            try:
+                self.status_ids[name] = db.status.lookup(name)
+            except KeyError:
+                self.status_ids[name] = None
+        return self.status_ids[name]
+
+    def forget_status_ids(self, db, cl, nodeid, oldvalues):
+        ''' a status was created, renamed, retired or restored
+        '''
+        self.status_ids.clear()
+
+    def chatty(self, db, cl, nodeid, newvalues):
+        ''' If the issue is currently 'resolved', 'done-cbb' or None,
+            then set it to 'chatting'. If issue is 'unread' and
+            chatting_requires_two_users is true, set state
+            to 'chatting' if the person adding the new message is not
+            the same as the person who created the issue. This allows
+            somebody to submit multiple emails describing the problem
+            without changing it to 'chatting'. 'chatting' should
+            indicate at least two people are 'chatting'.
+        '''
+        if self.config_error is not None:
+            raise self.config_error
+
+        # don't fire if there's no new message (ie. chat)
+        if 'messages' not in newvalues:
+            return
+        if newvalues['messages'] == cl.get(nodeid, 'messages'):
             return
 
-    # Current author is not the initiator of the issue so
-    # we are 'chatting'.
-    if current_status in fromstates + [None]:
-        # yep, we're now chatting
-        newvalues['status'] = chatting_id
+        # get the chatting state ID
+        chatting_id = self.status_id(db, 'chatting')
+        if chatting_id is None:
+            # no chatting state, ignore all this stuff
+            return
 
+        # get the current value
+        current_status = cl.get(nodeid, 'status')
 
-def presetunread(db, cl, nodeid, newvalues):
-    ''' Make sure the status is set on new issues
-    '''
-    if 'status' in newvalues and newvalues['status']:
-        return
+        # see if there's an explicit change in this transaction
+        if 'status' in newvalues:
+            # yep, skip
+            return
 
-    # get the unread state ID
-    try:
-        unread_id = db.status.lookup('unread')
-    except KeyError:
-        # no unread state, ignore all this stuff
-        return
+        # determine the id of 'unread', 'resolved' and 'chatting'
+        fromstates = []
+        for state in 'unread resolved done-cbb'.split():
+            state_id = self.status_id(db, state)
+            if state_id is not None:
+                fromstates.append(state_id)
+
+        unread = fromstates[0] # grab the 'unread' state which is first
+
+        # ok, there's no explicit change, so check if we are in a state that
+        # should be changed. First see if we should set 'chatting' based on
+        # who opened the issue.
+        if current_status == unread and self.chatting_requires_two_users:
+            # find creator of issue and compare to currentuser making
+            # update. If the creator is same as initial author don't
+            # change to 'chatting'.
+            issue_creator = cl.get(nodeid, 'creator')
+            if issue_creator == db.getuid():
+                # person is chatting with themselves, don't set 'chatting'
+                return
+
+        # Current author is not the initiator of the issue so
+        # we are 'chatting'.
+        if current_status in fromstates + [None]:
+            # yep, we're now chatting
+            newvalues['status'] = chatting_id
+
+    def presetunread(self, db, cl, nodeid, newvalues):
+        ''' Make sure the status is set on new issues
+        '''
+        if 'status' in newvalues and newvalues['status']:
+            return
+
+        # get the unread state ID
+        unread_id = self.status_id(db, 'unread')
+        if unread_id is None:
+            # no unread state, ignore all this stuff
+            return
 
-    # ok, do it
-    newvalues['status'] = unread_id
+        # ok, do it
+        newvalues['status'] = unread_id
 
 
 def init(db):
+    auditor = StatusAuditor(db)
+
     # fire before changes are made
-    db.issue.audit('set', chatty)
-    db.issue.audit('create', presetunread)
+    db.issue.audit('set', auditor.chatty)
+    db.issue.audit('create', auditor.presetunread)
+
+    # the remembered status ids are stale once a status changes
+    for event in ('create', 'set', 'retire', 'restore'):
+        db.status.react(event, auditor.forget_status_ids)
 
 # vim: set filetype=python ts=4 sw=4 et si
 #SHA: 4de6a95a26b76d520d6ef541f7ab6d25d075edbc
@@ -21,6 +21,8 @@
 
 import re
 
+from useraddress import address_owner, update_address_index, user_addresses
+
 # regular expression thanks to: http://www.regular-expressions.info/email.html
 # this is the "99.99% solution for syntax only".
 email_regexp = (r"[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*", r"(localhost|(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9]))")
@@ -49,6 +51,38 @@ def get_addresses(user):
         for address in user['alternate_addresses'].split('\n'):
             yield address
 
+def index_user(db, cl, nodeid, oldvalues):
+    ''' add the addresses of a created or restored user to the index
+    '''
+    update_address_index(db, nodeid, set(), user_addresses(
+        cl.get(nodeid, 'address'), cl.get(nodeid, 'alternate_addresses')))
+
+def reindex_user(db, cl, nodeid, oldvalues):
+    ''' update the index after the addresses of a user changed
+    '''
+    old = user_addresses(oldvalues.get('address'),
+                         oldvalues.get('alternate_addresses'))
+    new = user_addresses(cl.get(nodeid, 'address'),
+                         cl.get(nodeid, 'alternate_addresses'))
+    update_address_index(db, nodeid, old, new)
+
+def unindex_user(db, cl, nodeid, oldvalues):
+    ''' a retired user frees its addresses
+    '''
+    update_address_index(db, nodeid, user_addresses(
+        cl.get(nodeid, 'address'), cl.get(nodeid, 'alternate_addresses')),
+        set())
+
+def audit_user_restore(db, cl, nodeid, newvalues):
+    ''' a retired user can only come back while nobody else took one of
+        its addresses
+    '''
+    for address in user_addresses(cl.get(nodeid, 'address'),
+                                  cl.get(nodeid, 'alternate_addresses')):
+        owner = address_owner(db, address)
+        if owner is not None and owner != nodeid:
+            raise ValueError('Email address %s already in use' % address)
+
 def audit_user_fields(db, cl, nodeid, newvalues):
     ''' Make sure user properties are valid.
 
@@ -67,10 +101,9 @@ def audit_user_fields(db, cl, nodeid, newvalues):
         if not valid_address(address):
             raise ValueError('Email address syntax is invalid "%s"'%address)
 
-        check_main = db.user.stringFind(address=address)
-        # make sure none of the alts are owned by anyone other than us (x!=nodeid)
-        check_alts = [x for x in db.user.filter(None, {'alternate_addresses' : address}) if x != nodeid]
-        if check_main or check_alts:
+        # make sure the address is not owned by anyone other than us
+        owner = address_owner(db, address)
+        if owner is not None and owner != nodeid:
             raise ValueError('Email address %s already in use' % address)
 
     newroles = newvalues.get('roles')
@@ -98,6 +131,15 @@ def init(db):
     # fire before changes are made
     db.user.audit('set', audit_user_fields)
     db.user.audit('create', audit_user_fields)
+    db.user.audit('restore', audit_user_restore)
+
+    # keep the address index used by audit_user_fields up to date, a
+    # tracker created before the index fills it once with
+    # scripts/build_address_index.py
+    db.user.react('create', index_user)
+    db.user.react('set', reindex_user)
+    db.user.react('retire', unindex_user)
+    db.user.react('restore', index_user)
 
 # vim: sts=4 sw=4 et si
 #SHA: 3c82fbbb589cec96d60013c792d2486d427506a2
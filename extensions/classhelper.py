@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import re
+from html import unescape
+
+from roundup.anypy.urllib_ import parse_qs, urlencode
+from roundup.rest import RestfulInstance, RoundupJSONEncoder
+
+from restquery import execute_get
+from restroles import roles_payload
+
+# Bump to make every browser drop the classhelper translations it has
+# stored, e.g. after changing the translation template.
+CLASSHELPER_TRANSLATION_VERSION = "1"
+
+# Translated by every classhelper, same as CLASSHELPER_TRANSLATION_KEYWORDS
+# in classhelper.js
+CLASSHELPER_TRANSLATION_KEYWORDS = [
+    "apply", "cancel", "next", "prev", "search", "reset",
+    "Info on {className} - {itemDesignator} - Classhelper"]
+
+# Dropdowns of data-search-with not loaded from rest/data/<class>, same
+# as ALTERNATIVE_DROPDOWN_PATHNAMES in classhelper.js
+ALTERNATIVE_DROPDOWN_PATHNAMES = {"roles": "rest/roles"}
+
+# Responses of the routes a bootstrap block builds without running the
+# route, by path. Running /rest/roles would apply its ETag handling to
+# the page request.
+LOCAL_RESPONSES = {
+    "rest/roles": lambda db: {"data": dict(roles_payload(db)[0])},
+}
+
+HELPURL_RE = re.compile(r'data-helpurl="([^"]*)"')
+
+
+def translation_version(tracker_home):
+    ''' Version marker of the classhelper translations.
+
+        Changes when CLASSHELPER_TRANSLATION_VERSION is bumped or when
+        a message catalog in locale/ or the translation template is
+        modified.
+    '''
+    files = [os.path.join(tracker_home, 'html', '_generic.translation')]
+    locale = os.path.join(tracker_home, 'locale')
+    if os.path.isdir(locale):
+        files.extend(os.path.join(locale, name)
+                     for name in sorted(os.listdir(locale)))
+
+    version = hashlib.sha1(CLASSHELPER_TRANSLATION_VERSION.encode('utf-8'))
+    for name in files:
+        try:
+            mtime = os.stat(name).st_mtime
+        except OSError:
+            continue
+        version.update(('%s:%s' % (os.path.basename(name), mtime))
+                       .encode('utf-8'))
+    return version.hexdigest()[:12]
+
+
+def bootstrap_urls(helpurl, search_with, cursor):
+    ''' The rest urls classhelper.js asks for when the popup of the
+        help link opens: the first page of the table and the dropdowns
+        of data-search-with. Built like ClassHelper.getRestURL and
+        ClassHelper.fetchDropdownsData do, relative to the tracker.
+    '''
+    classname, query = helpurl.split('?', 1)
+    form = dict((name, values[0]) for name, values in
+                parse_qs(query, keep_blank_values=True).items())
+
+    params = []
+    if cursor:
+        route = 'rest/cursor'
+        params.append(('@format', 'columns'))
+    else:
+        route = 'rest/columns'
+        params.append(('@page_index', int(form['@startwith']) + 1))
+    params.append(('@page_size', form['@pagesize']))
+    params.append(('@fields', form['properties']))
+    if form.get('@sort'):
+        params.append(('@sort', form['@sort']))
+    urls = ['%s/%s?%s' % (route, classname, urlencode(params))]
+
+    for param in search_with.split(','):
+        if '[]' not in param:
+            continue
+        param, sort = param.split('[]', 1)
+        url = ALTERNATIVE_DROPDOWN_PATHNAMES.get(param,
+                                                 'rest/data/%s' % param)
+        url += '?@verbose=2'
+        if sort:
+            url += '&@sort=%s' % sort
+        urls.append(url)
+    return urls
+
+
+def translation_keys(helpurl, search_with, popup_title):
+    ''' The keys ClassHelper.fetchTranslations collects for a classhelper.
+    '''
+    keys = [param.split('[]')[0] for param in search_with.split(',')
+            if param]
+    if popup_title:
+        keys.append(popup_title)
+    form = parse_qs(helpurl.split('?', 1)[1])
+    if 'properties' in form:
+        keys.extend(form['properties'][0].split(','))
+    keys.extend(CLASSHELPER_TRANSLATION_KEYWORDS)
+    return keys
+
+
+def bootstrap(client, helpurl, search_with, popup_title, cursor):
+    ''' The responses and translations a classhelper needs to open its
+        popup. Only successful responses are included, classhelper.js
+        asks the server for anything that is missing.
+    '''
+    rest = RestfulInstance(client, client.db)
+    # the routes set the status and headers of a rest response, they
+    # must not end up on the page
+    response_code = client.response_code
+    headers = dict(client.additional_headers)
+    responses = {}
+    try:
+        for url in bootstrap_urls(helpurl, search_with, cursor):
+            local = LOCAL_RESPONSES.get(url.split('?', 1)[0])
+            if local is not None:
+                responses[url] = local(client.db)
+                continue
+            status, output = execute_get(rest, url)
+            if status == 200:
+                responses[url] = output
+    finally:
+        client.response_code = response_code
+        client.additional_headers.clear()
+        client.additional_headers.update(headers)
+
+    translations = dict(
+        (key, client.translator.gettext(key))
+        for key in translation_keys(helpurl, search_with, popup_title))
+    return {"responses": responses, "translations": translations}
+
+
+def init(instance):
+
+    def classhelper_translation_version(request):
+        ''' Emitted in page.html, classhelper.js keys the translations
+            it stores in the browser with it.
+        '''
+        return translation_version(instance.tracker_home)
+
+    def classhelper_translation_not_modified(request):
+        ''' Set an ETag on the translation response and turn it into a
+            304 when the browser already has this version.
+
+            Returns True when the template must not render a body.
+        '''
+        client = request.client
+        properties = ''
+        if 'properties' in client.form:
+            properties = client.form['properties'].value
+
+        key = '%s\0%s\0%s' % (translation_version(instance.tracker_home),
+                              getattr(client, 'language', ''), properties)
+        etag = '"%s"' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+        client.additional_headers['ETag'] = etag
+        # the browser may keep it, but has to check the ETag on every use
+        client.additional_headers['Cache-Control'] = 'private, no-cache'
+        client.additional_headers.pop('Expires', None)
+
+        if_none_match = client.env.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            client.response_code = 304
+            return True
+        return False
+
+    def classhelper_bootstrap(request, link, search_with='',
+                              popup_title='', pagination=''):
+        ''' A <script type="application/json"> block to put inside
+            <roundup-classhelper>, next to the help link. link is the
+            output of classhelp(), the other arguments are the
+            data-search-with, data-popup-title and data-pagination
+            attributes of the element.
+
+            classhelper.js opens the popup from it without a request.
+            Empty when the user may not use the rest api, classhelper.js
+            then works as without it.
+        '''
+        client = request.client
+        match = HELPURL_RE.search(link or '')
+        if match is None or not client.db.security.hasPermission(
+                'Rest Access', client.userid):
+            return ''
+
+        data = bootstrap(client, unescape(match.group(1)),
+                         search_with, popup_title, pagination == 'cursor')
+        payload = json.dumps(data, cls=RoundupJSONEncoder,
+                             separators=(',', ':'))
+        # nothing in the payload may end the script element
+        payload = payload.replace('<', '\\u003c').replace('>', '\\u003e')
+        return ('<script type="application/json" '
+                'class="classhelper-bootstrap">%s</script>' % payload)
+
+    instance.registerUtil('classhelper_translation_version',
+                          classhelper_translation_version)
+    instance.registerUtil('classhelper_translation_not_modified',
+                          classhelper_translation_not_modified)
+    instance.registerUtil('classhelper_bootstrap', classhelper_bootstrap)
@@ -0,0 +1,23 @@
+from classcache import render
+
+
+def init(instance):
+
+    def class_options(request, classname, label, value, translate=False):
+        ''' The <option> elements of the search_select macros, from the
+            cache in lib/classcache.py. value is the id of the selected
+            item.
+        '''
+        return render(request.client,
+                      'translated' if translate else 'option',
+                      classname, label, [value] if value else [])
+
+    def class_checkboxes(request, classname, label, name, values):
+        ''' The <li> items of the search_checkboxes macro, from the
+            cache in lib/classcache.py. values are the checked ids.
+        '''
+        return render(request.client, 'checkbox', classname, label,
+                      values, name)
+
+    instance.registerUtil('class_options', class_options)
+    instance.registerUtil('class_checkboxes', class_checkboxes)
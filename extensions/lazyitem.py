@@ -0,0 +1,13 @@
+from itertools import islice
+
+
+def init(instance):
+
+    def first_items(items, count):
+        ''' The first count items of an iterable, without going through
+            the rest of it. issue.item.html uses it to render only the
+            newest messages of context/messages/reverse.
+        '''
+        return list(islice(items, count))
+
+    instance.registerUtil('first_items', first_items)
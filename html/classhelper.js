@@ -17,6 +17,8 @@
  * @property {string[] | undefined} fields
  * @property {number} pageIndex
  * @property {number} pageSize
+ * Page with the cursors of /rest/cursor instead of @page_index
+ * @property {boolean} cursor
  */
 
 
@@ -25,10 +27,17 @@ const DISABLE_CLASSHELPER = false
 
 // Let user customize the css file name
 const CSS_STYLESHEET_FILE_NAME = "@@file/classhelper.css";
+// Fetches and parses the rest api responses off the main thread, page.html
+// loads it as a plain script too for browsers without workers
+const CLASSHELPER_WORKER_FILE_NAME = "@@file/classhelper_worker.js";
 
 const CLASSHELPER_TAG_NAME = "roundup-classhelper";
 const CLASSHELPER_ATTRIBUTE_SEARCH_WITH = "data-search-with";
 const CLASSHELPER_ATTRIBUTE_POPUP_TITLE = "data-popup-title";
+const CLASSHELPER_ATTRIBUTE_PREFETCH = "data-prefetch";
+const CLASSHELPER_ATTRIBUTE_VIRTUAL_SCROLL = "data-virtual-scroll";
+const CLASSHELPER_ATTRIBUTE_SEARCH_AS_YOU_TYPE = "data-search-as-you-type";
+const CLASSHELPER_ATTRIBUTE_PAGINATION = "data-pagination";
 const CLASSHELPER_ATTRIBUTE_POPUP_TITLE_ITEM_CLASS_LOOKUP = "{className}";
 const CLASSHELPER_ATTRIBUTE_POPUP_TITLE_ITEM_DESIGNATOR_LOOKUP = "{itemDesignator}";
 const CLASSHELPER_POPUP_FEATURES = (width, height) => `popup=yes,width=${width},height=${height}`;
@@ -43,6 +52,431 @@ const ALTERNATIVE_DROPDOWN_PATHNAMES = {
     "roles": "/rest/roles"
 }
 
+// Maximum number of rest api responses kept in the shared response cache
+const CLASSHELPER_CACHE_MAX_ENTRIES = 100;
+// Time in milliseconds a cached rest api response stays valid
+const CLASSHELPER_CACHE_TTL = 60 * 1000;
+// Longest time in milliseconds a prefetch of the prev/next page waits for the browser to be idle
+const CLASSHELPER_PREFETCH_IDLE_TIMEOUT = 2000;
+
+// Name of the meta tag in page.html holding the version of the translations
+const CLASSHELPER_TRANSLATION_VERSION_META = "classhelper-translation-version";
+// Prefix of the localStorage keys the translations are stored under
+const CLASSHELPER_TRANSLATION_STORAGE_PREFIX = "classhelper-translations";
+
+// Most requests sent in one call to the /rest/batch route of interfaces.py
+const CLASSHELPER_BATCH_MAX_REQUESTS = 20;
+// Rest api paths answered with ETag and Cache-Control headers, they are left
+// out of batches so the browser cache can answer them
+const CLASSHELPER_HTTP_CACHED_PATHNAMES = ["/rest/roles"];
+
+// sessionStorage key remembering that the rest api answered the probe in enableClassHelper
+const CLASSHELPER_REST_PROBE_STORAGE_KEY = "classhelper-rest-available";
+
+// Class of the <script type="application/json"> blocks utils.classhelper_bootstrap
+// (extensions/classhelper.py) puts inside roundup-classhelper
+const CLASSHELPER_BOOTSTRAP_CLASS = "classhelper-bootstrap";
+// Time in milliseconds the responses of a bootstrap block are used, they are
+// as old as the page
+const CLASSHELPER_BOOTSTRAP_TTL = 10 * 60 * 1000;
+
+// Milliseconds without typing before a search as you type request is sent
+const CLASSHELPER_SEARCH_DEBOUNCE = 300;
+
+// Row height in pixels assumed by the virtual scrolling table until a row is measured
+const CLASSHELPER_VIRTUAL_ROW_HEIGHT = 24;
+// Rows rendered above and below the visible ones in the virtual scrolling table
+const CLASSHELPER_VIRTUAL_OVERSCAN = 10;
+// Rows rendered by the virtual scrolling table before its height is known
+const CLASSHELPER_VIRTUAL_INITIAL_ROWS = 40;
+
+// change this to true to send the timings of the classhelper phases to the
+// /rest/timings route of interfaces.py, they are always in the performance timeline
+const CLASSHELPER_SEND_TIMINGS = false;
+// Timings collected before they are sent, they are also sent when the page is hidden
+const CLASSHELPER_TIMINGS_BATCH_SIZE = 50;
+
+/**
+ * Size bounded LRU cache with a time to live for parsed rest api responses.
+ * It is shared by all the classhelpers on the page, the keys are normalized
+ * request urls, so the same page of a collection is only fetched once
+ * while it is fresh, no matter which path (popup, page change, search)
+ * requested it.
+ */
+class ClassHelperCache {
+
+    /** @type {Map.<string, {value: any, expires: number}>} */
+    entries = new Map();
+
+    /** @type {number} number of lookups served from the cache */
+    hits = 0;
+
+    /** @type {number} number of lookups that had to go to the network */
+    misses = 0;
+
+    /**
+     * @param {number} maxEntries
+     * @param {number} ttl time to live in milliseconds
+     */
+    constructor(maxEntries, ttl) {
+        this.maxEntries = maxEntries;
+        this.ttl = ttl;
+    }
+
+    /**
+     * Make equal requests map to the same key, the query parameters
+     * are sorted and the fragment is dropped.
+     * @param {URL | string} url
+     * @returns {string}
+     */
+    static normalizeURL(url) {
+        const normalized = new URL(url.toString(), window.location.href);
+        normalized.searchParams.sort();
+        normalized.hash = "";
+        return normalized.toString();
+    }
+
+    /**
+     * @param {URL | string} url
+     * @returns {any} the cached value or undefined if missing or expired
+     */
+    get(url) {
+        const key = ClassHelperCache.normalizeURL(url);
+        const entry = this.entries.get(key);
+
+        if (entry == null || entry.expires <= Date.now()) {
+            this.entries.delete(key);
+            this.misses++;
+            return undefined;
+        }
+
+        // re-insert to mark the entry as the most recently used one
+        this.entries.delete(key);
+        this.entries.set(key, entry);
+        this.hits++;
+        return entry.value;
+    }
+
+    /**
+     * @param {URL | string} url
+     * @param {any} value
+     * @param {number} [ttl] time to live in milliseconds of this entry
+     */
+    set(url, value, ttl = this.ttl) {
+        const key = ClassHelperCache.normalizeURL(url);
+        this.entries.delete(key);
+        this.entries.set(key, { value, expires: Date.now() + ttl });
+
+        // Map keeps insertion order, the first key is the least recently used
+        while (this.entries.size > this.maxEntries) {
+            this.entries.delete(this.entries.keys().next().value);
+        }
+    }
+
+    /**
+     * Drop a single cached response.
+     * @param {URL | string} url
+     */
+    invalidate(url) {
+        this.entries.delete(ClassHelperCache.normalizeURL(url));
+    }
+
+    /**
+     * Drop every cached response whose url starts with the prefix,
+     * eg. all the pages of a rest collection.
+     * @param {URL | string} prefix
+     */
+    invalidatePrefix(prefix) {
+        const normalizedPrefix = new URL(prefix.toString(), window.location.href).toString();
+        for (let key of Array.from(this.entries.keys())) {
+            if (key.startsWith(normalizedPrefix)) {
+                this.entries.delete(key);
+            }
+        }
+    }
+
+    clear() {
+        this.entries.clear();
+    }
+}
+
+/**
+ * Rows of the classhelper table for one field layout. A <template> row
+ * is built once in the popup document, every table row is a clone of it
+ * and its cells are filled by changing their text nodes in place.
+ */
+class ClassHelperRowTemplate {
+
+    /**
+     * @param {Document} doc the popup document
+     * @param {string[]} headers
+     * @param {boolean} includeCheckbox
+     */
+    constructor(doc, headers, includeCheckbox) {
+        this.document = doc;
+        this.headers = headers;
+        this.includeCheckbox = includeCheckbox;
+        this.layout = ClassHelperRowTemplate.getLayout(headers, includeCheckbox);
+
+        const row = doc.createElement("tr");
+        row.setAttribute("tabindex", 0);
+        row.classList.add("row-style");
+
+        if (includeCheckbox) {
+            const td = doc.createElement("td");
+            const checkbox = doc.createElement("input");
+            checkbox.setAttribute("type", "checkbox");
+            checkbox.setAttribute("tabindex", -1);
+            td.appendChild(checkbox);
+            row.appendChild(td);
+        }
+
+        for (let i = 0; i < headers.length; i++) {
+            const td = doc.createElement("td");
+            td.appendChild(doc.createTextNode(""));
+            row.appendChild(td);
+        }
+
+        this.template = doc.createElement("template");
+        this.template.content.appendChild(row);
+    }
+
+    /**
+     * @param {string[]} headers
+     * @param {boolean} includeCheckbox
+     * @returns {string} equal for tables that can share their rows
+     */
+    static getLayout(headers, includeCheckbox) {
+        return `${includeCheckbox}:${headers.join(",")}`;
+    }
+
+    /**
+     * @returns {HTMLTableRowElement} an empty row owned by the popup document
+     */
+    createRow() {
+        return this.document.importNode(this.template.content.firstElementChild, true);
+    }
+
+    /**
+     * @param {HTMLTableRowElement} row
+     * @param {string} id
+     * @param {string[]} cells display text of the fields
+     * @param {boolean} selected
+     */
+    fillRow(row, id, cells, selected) {
+        row.dataset.id = id;
+        let cell = row.firstElementChild;
+        if (this.includeCheckbox) {
+            cell.firstElementChild.checked = selected;
+            cell = cell.nextElementSibling;
+        }
+        for (let text of cells) {
+            const node = cell.firstChild;
+            if (node.data !== text) {
+                node.data = text;
+            }
+            cell = cell.nextElementSibling;
+        }
+    }
+
+    /**
+     * Make the rows of tbody show data, rows already there are refilled,
+     * missing ones are cloned and surplus ones removed.
+     * @param {HTMLTableSectionElement} tbody
+     * @param {Object.<string, any>[]} data
+     * @param {string[][]} cells
+     * @param {Set.<string>} selection
+     */
+    patchRows(tbody, data, cells, selection) {
+        const rows = tbody.rows;
+        // rows already in the table
+        const count = rows.length;
+        for (let i = 0; i < Math.min(count, data.length); i++) {
+            const id = data[i][this.headers[0]];
+            this.fillRow(rows[i], id, cells[i], selection.has(id));
+        }
+
+        if (data.length > count) {
+            const fragment = this.document.createDocumentFragment();
+            for (let i = count; i < data.length; i++) {
+                const id = data[i][this.headers[0]];
+                const row = this.createRow();
+                this.fillRow(row, id, cells[i], selection.has(id));
+                fragment.appendChild(row);
+            }
+            tbody.appendChild(fragment);
+        }
+
+        for (let i = data.length; i < count; i++) {
+            tbody.lastElementChild.remove();
+        }
+    }
+}
+
+/**
+ * Windowed rendering of the classhelper table body, used when the
+ * data-virtual-scroll attribute is set. Only the rows in view plus
+ * CLASSHELPER_VIRTUAL_OVERSCAN rows above and below are in the DOM,
+ * two spacer rows keep the height of the rows that are left out.
+ * Row elements are reused while scrolling instead of being recreated.
+ */
+class ClassHelperVirtualTable {
+
+    /** @type {HTMLTableRowElement[]} rows that get filled with data while scrolling */
+    pool = [];
+
+    /** index of the first and one past the last row in the DOM */
+    start = 0;
+    end = 0;
+
+    /** index of the row that has the keyboard focus, -1 if none */
+    focusedIndex = -1;
+
+    rowHeight = CLASSHELPER_VIRTUAL_ROW_HEIGHT;
+
+    /**
+     * @param {HTMLDivElement} container the scrolling popup-tablediv
+     * @param {HTMLTableSectionElement} tbody
+     * @param {string[]} headers
+     * @param {Object.<string, any>[]} data
+     * @param {string[][]} cells display text of the rows, see classhelper_worker.js
+     * @param {ClassHelperRowTemplate} rowTemplate
+     * @param {() => Set.<string>} getSelection current selection, read on every render
+     */
+    constructor(container, tbody, headers, data, cells, rowTemplate, getSelection) {
+        this.container = container;
+        this.tbody = tbody;
+        this.headers = headers;
+        this.data = data;
+        this.cells = cells;
+        this.rowTemplate = rowTemplate;
+        this.includeCheckbox = rowTemplate.includeCheckbox;
+        this.getSelection = getSelection;
+
+        const columns = headers.length + (this.includeCheckbox ? 1 : 0);
+        this.topSpacer = ClassHelperVirtualTable.createSpacer(tbody.ownerDocument, columns);
+        this.bottomSpacer = ClassHelperVirtualTable.createSpacer(tbody.ownerDocument, columns);
+
+        container.addEventListener("scroll", () => this.render());
+        tbody.addEventListener("focusin", (e) => {
+            if (e.target.dataset.index != null) {
+                this.focusedIndex = parseInt(e.target.dataset.index);
+            }
+        });
+
+        this.render(true);
+    }
+
+    static createSpacer(doc, columns) {
+        const spacer = doc.createElement("tr");
+        spacer.classList.add("virtual-spacer");
+        spacer.setAttribute("aria-hidden", "true");
+        const td = doc.createElement("td");
+        td.colSpan = columns;
+        spacer.appendChild(td);
+        return spacer;
+    }
+
+    createRow() {
+        return this.rowTemplate.createRow();
+    }
+
+    /**
+     * @param {HTMLTableRowElement} row
+     * @param {number} index
+     * @param {Set.<string>} selected
+     */
+    fillRow(row, index, selected) {
+        const id = this.data[index][this.headers[0]];
+        this.rowTemplate.fillRow(row, id, this.cells[index], selected.has(id));
+        row.dataset.index = index;
+        // the header row is row 1 of the table
+        row.setAttribute("aria-rowindex", index + 2);
+    }
+
+    /**
+     * Put the rows in view into the DOM.
+     * @param {boolean} [force] render even if the rows in view did not change
+     */
+    render(force = false) {
+        const total = this.data.length;
+        const viewportHeight = this.container.clientHeight || this.rowHeight * CLASSHELPER_VIRTUAL_INITIAL_ROWS;
+        const scrollTop = this.container.scrollTop;
+
+        const start = Math.max(0, Math.floor(scrollTop / this.rowHeight) - CLASSHELPER_VIRTUAL_OVERSCAN);
+        const end = Math.min(total, Math.ceil((scrollTop + viewportHeight) / this.rowHeight) + CLASSHELPER_VIRTUAL_OVERSCAN);
+
+        if (!force && start === this.start && end === this.end) {
+            return;
+        }
+        this.start = start;
+        this.end = end;
+
+        while (this.pool.length < end - start) {
+            this.pool.push(this.createRow());
+        }
+
+        const selected = this.getSelection();
+        const rows = this.pool.slice(0, end - start);
+        rows.forEach((row, i) => this.fillRow(row, start + i, selected));
+
+        this.topSpacer.style.height = `${start * this.rowHeight}px`;
+        this.bottomSpacer.style.height = `${(total - end) * this.rowHeight}px`;
+        this.tbody.replaceChildren(this.topSpacer, ...rows, this.bottomSpacer);
+
+        // once the table is shown use the real row height for the spacers
+        if (rows.length > 0 && rows[0].isConnected) {
+            const measured = rows[0].getBoundingClientRect().height;
+            if (measured > 0 && Math.abs(measured - this.rowHeight) > 0.5) {
+                this.rowHeight = measured;
+                this.render(true);
+                return;
+            }
+        }
+
+        const focused = this.rowAt(this.focusedIndex);
+        if (focused && focused.ownerDocument.activeElement?.parentElement === this.tbody) {
+            focused.focus({ preventScroll: true });
+        }
+    }
+
+    /**
+     * @param {number} index
+     * @returns {HTMLTableRowElement | null} the row element if it is in the DOM
+     */
+    rowAt(index) {
+        if (index < this.start || index >= this.end) {
+            return null;
+        }
+        return this.pool[index - this.start];
+    }
+
+    /**
+     * Scroll a row into view and focus it, the index wraps around
+     * at both ends like the keyboard navigation of the plain table.
+     * @param {number} index
+     */
+    focusRow(index) {
+        const total = this.data.length;
+        if (total === 0) {
+            return;
+        }
+        index = ((index % total) + total) % total;
+
+        const top = index * this.rowHeight;
+        const viewportHeight = this.container.clientHeight;
+        if (top < this.container.scrollTop) {
+            this.container.scrollTop = top;
+        } else if (top + this.rowHeight > this.container.scrollTop + viewportHeight) {
+            this.container.scrollTop = top + this.rowHeight - viewportHeight;
+        }
+
+        this.focusedIndex = index;
+        this.render();
+        this.rowAt(index)?.focus({ preventScroll: true });
+    }
+}
+
 /**
  * This is a custom web component(user named html tag) that wraps a helpurl link 
  * and provides additional functionality.
@@ -92,6 +526,10 @@ const ALTERNATIVE_DROPDOWN_PATHNAMES = {
  * the user can use "{itemDesignator}" in the title to replace in the attribute value.
  * and the current context of classhelper will replace "{itemDesignator}".
  * 
+ * The data-prefetch attribute of the web component is optional.
+ * When present the previous and next pages are fetched in the background
+ * once a page is shown, so the prev/next buttons do not wait for the network.
+ * 
  */
 class ClassHelper extends HTMLElement {
 
@@ -105,6 +543,105 @@ class ClassHelper extends HTMLElement {
      * @type {Object.<string, string>} */
     static translations = null;
 
+    /**
+     * Translations from the bootstrap blocks of the page, see
+     * ClassHelper.loadBootstrap.
+     * @type {Object.<string, string>} */
+    static bootstrapTranslations = {};
+
+    /**
+     * Responses of the rest api collection requests shared by
+     * all the classhelpers on the page.
+     * @type {ClassHelperCache} */
+    static cache = new ClassHelperCache(CLASSHELPER_CACHE_MAX_ENTRIES, CLASSHELPER_CACHE_TTL);
+
+    /**
+     * Rest api requests on their way, keyed like ClassHelper.cache.
+     * @type {Map.<string, Promise.<{ok: boolean, status: number, json: any}>>} */
+    static inflight = new Map();
+
+    /**
+     * Dropdown lists for the data-search-with params, shared by all the
+     * classhelpers on the page, keyed by request url.
+     * @type {Map.<string, Promise.<Map.<string, string>>>} */
+    static dropdowns = new Map();
+
+    /**
+     * Requests waiting to be sent together to /rest/batch at the end
+     * of the current task, see ClassHelper.fetchBatched.
+     * @type {{url: string, resolve: Function, reject: Function}[]} */
+    static batchQueue = [];
+
+    /** false once the tracker turned out to have no /rest/batch route */
+    static batchAvailable = true;
+
+    /**
+     * false once the tracker turned out to have no /rest/columns and
+     * /rest/cursor routes, see ClassHelper.getDataURL
+     */
+    static columnsAvailable = true;
+
+    /**
+     * Worker running classhelper_worker.js, undefined until the first
+     * request and null when the page has to do without one.
+     * @type {Worker | null | undefined} */
+    static worker = undefined;
+
+    /**
+     * Requests sent to ClassHelper.worker, keyed by their message id.
+     * @type {Map.<number, {apiURL: URL | string, options: RequestInit, resolve: Function, reject: Function, cleanup: Function}>} */
+    static workerRequests = new Map();
+
+    static workerRequestId = 0;
+
+    /**
+     * Dropdown lists of all the classhelpers on the page by field, the
+     * table shows the names of linked items from them.
+     * @type {Object.<string, Map.<string, string>>} */
+    static dropdownNames = {};
+
+    /**
+     * Timings waiting to be sent to /rest/timings,
+     * "<operation>:<phase>=<milliseconds>".
+     * @type {string[]} */
+    static timings = [];
+
+    /**
+     * Background requests for the adjacent pages when data-prefetch is set,
+     * keyed by normalized url.
+     * @type {Map.<string, AbortController>} */
+    prefetchControllers = new Map();
+
+    /**
+     * Windowed table body of the popup when data-virtual-scroll is set.
+     * @type {ClassHelperVirtualTable | null} */
+    virtualTable = null;
+
+    /**
+     * Cancels the running search when the next one starts.
+     * @type {AbortController | null} */
+    searchController = null;
+
+    /** pending search as you type, see CLASSHELPER_SEARCH_DEBOUNCE */
+    searchDebounceTimer = null;
+
+    /**
+     * Ids selected in the popup, in the order they were selected. The
+     * popup-preview input only shows it, see ClassHelper.renderSelection.
+     * @type {Set.<string>} */
+    selection = new Set();
+
+    /**
+     * Rows of the popup table are cloned from it.
+     * @type {ClassHelperRowTemplate | null} */
+    rowTemplate = null;
+
+    /**
+     * Url of the last search that fit on a single page, its rows are in
+     * ClassHelper.cache and narrower searches are filtered from them.
+     * @type {string | null} */
+    completeSearchURL = null;
+
     /** 
      * Stores the result from api calls made to rest api,
      * for the parameters in data-search-with attribute of this web component
@@ -141,6 +678,7 @@ class ClassHelper extends HTMLElement {
             this.helpurl.addEventListener("click", this.preventDefault);
 
             this.helpurlProps = ClassHelper.parseHelpUrlProps(this.helpurl);
+            this.helpurlProps.cursor = this.getAttribute(CLASSHELPER_ATTRIBUTE_PAGINATION) === "cursor";
 
             this.trackerBaseURL = window.location.href.substring(0, window.location.href.lastIndexOf("/"));
 
@@ -192,7 +730,11 @@ class ClassHelper extends HTMLElement {
             // we get a document Fragment in event.detail we replace it with the root
             // replaceChild method consumes the documentFragment content, subsequent calls will be no-op.
             if (event.detail.childElementCount === 1) {
+                const start = performance.now();
                 this.popupRef.document.replaceChild(event.detail, this.popupRef.document.documentElement);
+                // the virtual table can only measure its rows once they are shown
+                this.virtualTable?.render(true);
+                ClassHelper.recordTiming("openPopUp:swap", start);
             }
         }
 
@@ -232,8 +774,16 @@ class ClassHelper extends HTMLElement {
         const handleSearchEvent = (event) => {
             this.helpurlProps.pageIndex = 1;
             const searchURL = ClassHelper.getSearchURL(this.trackerBaseURL, this.helpurlProps, event.detail.value);
-            this.searchEvent(searchURL, this.helpurlProps)
+
+            // only the latest search may update the table
+            this.searchController?.abort();
+            this.searchController = new AbortController();
+
+            this.searchEvent(searchURL, this.helpurlProps, this.searchController.signal)
                 .catch(error => {
+                    if (error.name === "AbortError") {
+                        return;
+                    }
                     // Top level error handling for searchEvent method.
                     cleanUpClosure();
                     console.error(error, `request data url: ${event.detail.value}`);
@@ -250,6 +800,11 @@ class ClassHelper extends HTMLElement {
             this.selectionEvent(event.detail.value);
         }
 
+        // the submit may create or edit items of the class
+        this.closest("form")?.addEventListener("submit", () => {
+            ClassHelper.invalidateCache(this.helpurlProps.apiClassName);
+        });
+
         this.addEventListener("click", handleClickEvent);
         this.addEventListener("popupReady", handlePopupReadyEvent);
         this.addEventListener("prevPage", handlePrevPageEvent);
@@ -315,12 +870,28 @@ class ClassHelper extends HTMLElement {
         }
 
         let tracker = window.location.pathname.split('/')[1];
+
+        const storageKey = ClassHelper.getTranslationStorageKey(tracker);
+        const stored = ClassHelper.loadStoredTranslations(storageKey);
+        const bootstrapped = Object.keys(ClassHelper.bootstrapTranslations).length > 0;
+        Object.assign(stored, ClassHelper.bootstrapTranslations);
+        Object.assign(ClassHelper.translations, stored);
+
+        const missing = Array.from(keys.values()).filter(key => !(key in stored));
+        if (missing.length === 0) {
+            if (bootstrapped) {
+                ClassHelper.storeTranslations(storageKey, stored);
+            }
+            return;
+        }
+
         let url = new URL(window.location.origin + "/" + tracker + '/');
         url.searchParams.append("@template", "translation");
-        url.searchParams.append("properties", Array.from(keys.values()).join(','));
+        url.searchParams.append("properties", missing.join(','));
 
         let resp, json;
 
+        let start = performance.now();
         try {
             resp = await fetch(url);
         } catch (error) {
@@ -328,7 +899,9 @@ class ClassHelper extends HTMLElement {
             message += `url: ${url.toString()}\n`;
             throw new Error(message, { cause: error });
         }
+        ClassHelper.recordTiming("fetchTranslations:fetch", start);
 
+        start = performance.now();
         try {
             json = await resp.json();
         } catch (error) {
@@ -336,6 +909,7 @@ class ClassHelper extends HTMLElement {
             message += `url: ${url.toString()}\n`;
             throw new Error(message, { cause: error });
         }
+        ClassHelper.recordTiming("fetchTranslations:parse", start);
 
         if (!resp.ok) {
             let message = `Unexpected response\n`;
@@ -347,15 +921,680 @@ class ClassHelper extends HTMLElement {
 
         for (let entry of Object.entries(json)) {
             ClassHelper.translations[entry[0]] = entry[1];
+            stored[entry[0]] = entry[1];
         }
+
+        ClassHelper.storeTranslations(storageKey, stored);
     }
 
-    async fetchDropdownsData() {
-        // Singleton implementation
-        if (this.dropdownsData != null) {
+    /**
+     * The stored translations are only valid for one tracker, language
+     * and server side version, see extensions/classhelper.py.
+     * @param {string} tracker
+     * @returns {string | null} null when the page has no version to key on
+     */
+    static getTranslationStorageKey(tracker) {
+        const meta = document.querySelector(`meta[name="${CLASSHELPER_TRANSLATION_VERSION_META}"]`);
+        if (!meta?.content) {
+            return null;
+        }
+        // the meta tag carries the language the server translates to
+        const language = meta.lang || document.documentElement.lang;
+        return `${CLASSHELPER_TRANSLATION_STORAGE_PREFIX}:${tracker}:${language}:${meta.content}`;
+    }
+
+    /**
+     * @param {string | null} storageKey
+     * @returns {Object.<string, string>} empty when nothing is stored
+     */
+    static loadStoredTranslations(storageKey) {
+        if (storageKey == null) {
+            return {};
+        }
+        try {
+            return JSON.parse(window.localStorage.getItem(storageKey)) ?? {};
+        } catch (error) {
+            // storage disabled by the user or a broken entry, fetch them again
+            return {};
+        }
+    }
+
+    /**
+     * Store the translations and drop the ones of older versions.
+     * @param {string | null} storageKey
+     * @param {Object.<string, string>} translations
+     */
+    static storeTranslations(storageKey, translations) {
+        if (storageKey == null) {
             return;
         }
-        this.dropdownsData = {};
+        try {
+            const versionPrefix = storageKey.substring(0, storageKey.lastIndexOf(":") + 1);
+            for (let i = window.localStorage.length - 1; i >= 0; i--) {
+                const key = window.localStorage.key(i);
+                if (key.startsWith(versionPrefix) && key !== storageKey) {
+                    window.localStorage.removeItem(key);
+                }
+            }
+            window.localStorage.setItem(storageKey, JSON.stringify(translations));
+        } catch (error) {
+            console.warn("Classhelper could not store translations.", error);
+        }
+    }
+
+    /**
+     * Read the bootstrap blocks rendered by utils.classhelper_bootstrap.
+     * Their responses go to ClassHelper.cache, so opening a popup and
+     * loading its dropdowns makes no request. The translations are
+     * picked up by ClassHelper.fetchTranslations.
+     * @returns {boolean} true when the page has a bootstrap block
+     */
+    static loadBootstrap() {
+        const blocks = document.querySelectorAll(`${CLASSHELPER_TAG_NAME} script.${CLASSHELPER_BOOTSTRAP_CLASS}`);
+        // the urls in the blocks are relative to the tracker
+        const trackerURL = window.location.href.substring(0, window.location.href.lastIndexOf("/") + 1);
+        for (let block of blocks) {
+            let bootstrap;
+            try {
+                bootstrap = JSON.parse(block.textContent);
+            } catch (error) {
+                console.warn("Classhelper ignoring a broken bootstrap block.", error);
+                continue;
+            }
+            for (let [url, json] of Object.entries(bootstrap.responses ?? {})) {
+                const apiURL = new URL(url, trackerURL);
+                ClassHelper.shapeResponse(apiURL, null, json);
+                ClassHelper.cache.set(apiURL, { ok: true, status: 200, json }, CLASSHELPER_BOOTSTRAP_TTL);
+            }
+            Object.assign(ClassHelper.bootstrapTranslations, bootstrap.translations);
+        }
+        return blocks.length > 0;
+    }
+
+    /**
+     * Hit and miss counters of the shared rest api response cache.
+     * @returns {{hits: number, misses: number, size: number}}
+     */
+    static get cacheStats() {
+        return {
+            hits: ClassHelper.cache.hits,
+            misses: ClassHelper.cache.misses,
+            size: ClassHelper.cache.entries.size
+        };
+    }
+
+    /**
+     * Drop the cached responses of a rest api class, or all of them
+     * when no class name is given.
+     * @param {string} [className]
+     */
+    static invalidateCache(className) {
+        if (className == null) {
+            ClassHelper.cache.clear();
+            return;
+        }
+        const trackerBaseURL = window.location.href.substring(0, window.location.href.lastIndexOf("/"));
+        for (let route of ["data", "columns", "cursor"]) {
+            ClassHelper.cache.invalidatePrefix(`${trackerBaseURL}/rest/${route}/${className}?`);
+        }
+    }
+
+    /**
+     * The rest/data url of a rest/columns or rest/cursor url. Those routes
+     * come with the interfaces.py of this repository, a tracker that only
+     * copied the html files does not have them. A cursor url becomes the
+     * first page.
+     * @param {URL | string} apiURL
+     * @returns {URL | null} null when apiURL is not one of those routes
+     */
+    static getDataURL(apiURL) {
+        const url = new URL(apiURL.toString(), document.baseURI);
+        const match = url.pathname.match(/\/rest\/(columns|cursor)\//);
+        if (match == null) {
+            return null;
+        }
+        url.pathname = url.pathname.replace(match[0], "/rest/data/");
+        if (match[1] === "cursor") {
+            for (let param of ["@format", "@after", "@before"]) {
+                url.searchParams.delete(param);
+            }
+            url.searchParams.set("@page_index", 1);
+        }
+        return url;
+    }
+
+    /**
+     * Same as ClassHelper.fetchCachedURL, but a rest/columns or rest/cursor
+     * request the tracker does not know (404) is made again to rest/data,
+     * and once that works all the later ones go to rest/data right away.
+     * The rest of the classhelper handles rows and columns alike.
+     * @param {URL | string} apiURL
+     * @param {RequestInit} [options] passed on to fetch, eg. an abort signal
+     * @returns {Promise<{ok: boolean, status: number, json: any}>}
+     * @throws {Error} when fetching or parsing data from roundup rest api fails
+     */
+    static async fetchCached(apiURL, options = {}) {
+        if (!ClassHelper.columnsAvailable) {
+            apiURL = ClassHelper.getDataURL(apiURL) ?? apiURL;
+        }
+        const result = await ClassHelper.fetchCachedURL(apiURL, options);
+        if (result.status !== 404) {
+            return result;
+        }
+        const dataURL = ClassHelper.getDataURL(apiURL);
+        if (dataURL == null) {
+            return result;
+        }
+        // a class that does not exist is a 404 on rest/data as well
+        const fallback = await ClassHelper.fetchCachedURL(dataURL, options);
+        if (fallback.ok) {
+            ClassHelper.columnsAvailable = false;
+        }
+        return fallback;
+    }
+
+    /**
+     * Fetch and parse json from the roundup rest api. Successful responses
+     * are kept in ClassHelper.cache and served from there while fresh.
+     * A request for a url that is already on its way (eg. a prefetch)
+     * waits for that response instead of making a new one.
+     * Requests without an abort signal are batched, see ClassHelper.fetchBatched.
+     * @param {URL | string} apiURL
+     * @param {RequestInit} [options] passed on to fetch, eg. an abort signal
+     * @returns {Promise<{ok: boolean, status: number, json: any}>}
+     * @throws {Error} when fetching or parsing data from roundup rest api fails
+     */
+    static async fetchCachedURL(apiURL, options = {}) {
+        const cached = ClassHelper.cache.get(apiURL);
+        if (cached !== undefined) {
+            return cached;
+        }
+
+        const key = ClassHelperCache.normalizeURL(apiURL);
+        const inflight = ClassHelper.inflight.get(key);
+        if (inflight) {
+            try {
+                return await inflight;
+            } catch (error) {
+                // the request we were waiting for was cancelled by its owner,
+                // go on with our own request.
+                if (error.name !== "AbortError") {
+                    throw error;
+                }
+            }
+        }
+
+        const request = options.signal ? ClassHelper.fetchJSON(apiURL, options) : ClassHelper.fetchBatched(apiURL);
+        ClassHelper.inflight.set(key, request);
+        try {
+            const result = await request;
+            if (result.ok) {
+                ClassHelper.cache.set(apiURL, result);
+            }
+            return result;
+        } finally {
+            if (ClassHelper.inflight.get(key) === request) {
+                ClassHelper.inflight.delete(key);
+            }
+        }
+    }
+
+    /**
+     * Shape a response the way classhelper_worker.js does, on the main thread.
+     * Pages that do not load classhelper_worker.js as a plain script only get
+     * the columns turned into rows, the tables then work out the cell text,
+     * see ClassHelper.getCells.
+     * @param {URL | string} apiURL
+     * @param {string | null} body body of the request
+     * @param {any} json parsed response, changed in place
+     */
+    static shapeResponse(apiURL, body, json) {
+        if (typeof classhelperShapeResponse === "function") {
+            classhelperShapeResponse(apiURL.toString(), body ?? null, json, ClassHelper.dropdownNames);
+            return;
+        }
+        const responses = json?.data?.responses;
+        if (Array.isArray(responses) && body) {
+            responses.forEach(response => ClassHelper.rowsFromColumns(response.body?.data));
+            return;
+        }
+        ClassHelper.rowsFromColumns(json?.data);
+    }
+
+    /**
+     * Turn the columns sent by the routes of interfaces.py into the
+     * collection of row objects, in place.
+     * @param {any} data the data of a collection response
+     */
+    static rowsFromColumns(data) {
+        if (!data?.columns) {
+            return;
+        }
+        const columns = Object.entries(data.columns);
+        const collection = new Array(data["@rows"]);
+        for (let i = 0; i < collection.length; i++) {
+            const row = {};
+            for (let [field, values] of columns) {
+                row[field] = values[i];
+            }
+            collection[i] = row;
+        }
+        delete data.columns;
+        delete data["@rows"];
+        data.collection = collection;
+    }
+
+    /**
+     * Display text of a field value when classhelper_worker.js is not
+     * loaded on the page, links show their id.
+     * @param {any} value
+     * @returns {string}
+     */
+    static cellText(value) {
+        if (value == null) {
+            return "";
+        }
+        if (Array.isArray(value)) {
+            return value.map(ClassHelper.cellText).join(", ");
+        }
+        if (typeof value === "object") {
+            return String(value.id ?? "");
+        }
+        return String(value);
+    }
+
+    /**
+     * Measure a phase as "classhelper:<operation>:<phase>" in the performance
+     * timeline, and queue it for /rest/timings when CLASSHELPER_SEND_TIMINGS is set.
+     * @param {string} name "<operation>:<phase>", eg. "openPopUp:fetch"
+     * @param {number} start performance.now() when the phase started
+     * @param {number} [end] performance.now() when the phase ended
+     */
+    static recordTiming(name, start, end = performance.now()) {
+        try {
+            performance.measure(`classhelper:${name}`, { start, end });
+        } catch (error) {
+            // browsers without the options of performance.measure
+        }
+
+        if (!CLASSHELPER_SEND_TIMINGS) {
+            return;
+        }
+        ClassHelper.timings.push(`${name}=${(end - start).toFixed(2)}`);
+        if (ClassHelper.timings.length >= CLASSHELPER_TIMINGS_BATCH_SIZE) {
+            ClassHelper.flushTimings();
+        }
+    }
+
+    /**
+     * Send the queued timings to /rest/timings. This is fetch with keepalive
+     * instead of navigator.sendBeacon, the csrf protection of the rest api
+     * needs the X-Requested-With header a beacon can not send.
+     */
+    static flushTimings() {
+        if (ClassHelper.timings.length === 0) {
+            return;
+        }
+        const timings = ClassHelper.timings;
+        ClassHelper.timings = [];
+
+        fetch(new URL("rest/timings", document.baseURI), {
+            method: "POST",
+            keepalive: true,
+            headers: {
+                "Content-Type": "application/json",
+                // required by the csrf protection of the rest api
+                "X-Requested-With": "rest",
+            },
+            body: JSON.stringify({ timings })
+        }).catch(error => {
+            // timings are not worth bothering the user
+            console.warn("Classhelper failed to send timings.", error);
+        });
+
+        // every measure of these names is in the batch, drop them from the
+        // timeline so a page that stays open does not keep collecting them
+        const names = new Set(timings.map(timing => timing.substring(0, timing.lastIndexOf("="))));
+        for (let name of names) {
+            performance.clearMeasures(`classhelper:${name}`);
+        }
+    }
+
+    /**
+     * Display text of the rows for the headers, for rows that did not
+     * come with it from ClassHelper.shapeResponse.
+     * @param {string[]} headers
+     * @param {Object.<string, any>[]} data
+     * @returns {string[][]}
+     */
+    static getCells(headers, data) {
+        if (typeof classhelperCellText !== "function") {
+            return data.map(row => headers.map(header => ClassHelper.cellText(row[header])));
+        }
+        return data.map(row => headers.map(header => classhelperCellText(row[header], ClassHelper.dropdownNames[header])));
+    }
+
+    /**
+     * @param {string} field
+     * @param {Map.<string, string>} list id to name
+     */
+    static setDropdownNames(field, list) {
+        ClassHelper.dropdownNames[field] = list;
+        ClassHelper.worker?.postMessage({ type: "names", field, entries: Array.from(list) });
+    }
+
+    /**
+     * Start the worker on first use.
+     * @returns {Worker | null} null when workers are not available
+     */
+    static getWorker() {
+        if (ClassHelper.worker !== undefined) {
+            return ClassHelper.worker;
+        }
+        ClassHelper.worker = null;
+        if (typeof Worker === "undefined") {
+            return null;
+        }
+        try {
+            const worker = new Worker(new URL(CLASSHELPER_WORKER_FILE_NAME, document.baseURI));
+            worker.addEventListener("message", ClassHelper.handleWorkerMessage);
+            worker.addEventListener("error", ClassHelper.handleWorkerError);
+            for (let [field, list] of Object.entries(ClassHelper.dropdownNames)) {
+                worker.postMessage({ type: "names", field, entries: Array.from(list) });
+            }
+            ClassHelper.worker = worker;
+        } catch (error) {
+            // eg. blocked by a content security policy
+            console.warn("Classhelper parsing responses on the main thread.", error);
+        }
+        return ClassHelper.worker;
+    }
+
+    /**
+     * @param {MessageEvent} event
+     */
+    static handleWorkerMessage(event) {
+        const { id, ...reply } = event.data;
+        const request = ClassHelper.workerRequests.get(id);
+        if (request == null) {
+            return;
+        }
+        ClassHelper.workerRequests.delete(id);
+        request.cleanup();
+
+        if (reply.stage == null) {
+            request.resolve(reply);
+            return;
+        }
+        if (reply.name === "AbortError") {
+            request.reject(new DOMException(reply.message, "AbortError"));
+            return;
+        }
+        let message = reply.stage === "fetch" ? "Error fetching data from roundup rest api\n" : "Error parsing json from roundup rest api\n";
+        message += `url: ${request.apiURL.toString()}\n`;
+        request.reject(new Error(message, { cause: reply.message }));
+    }
+
+    /**
+     * The worker could not be started, eg. the script did not load.
+     * Its requests and all the later ones run on the main thread.
+     * @param {ErrorEvent} event
+     */
+    static handleWorkerError(event) {
+        console.warn("Classhelper parsing responses on the main thread.", event.message);
+        ClassHelper.worker?.terminate();
+        ClassHelper.worker = null;
+
+        const requests = Array.from(ClassHelper.workerRequests.values());
+        ClassHelper.workerRequests.clear();
+        for (let request of requests) {
+            request.cleanup();
+            ClassHelper.fetchJSON(request.apiURL, request.options).then(request.resolve, request.reject);
+        }
+    }
+
+    /**
+     * ClassHelper.fetchJSON in the worker.
+     * @param {Worker} worker
+     * @param {URL | string} apiURL
+     * @param {RequestInit} options
+     * @returns {Promise<{ok: boolean, status: number, json: any}>}
+     */
+    static fetchInWorker(worker, apiURL, options) {
+        const { signal, ...init } = options;
+        return new Promise((resolve, reject) => {
+            if (signal?.aborted) {
+                reject(new DOMException("The request was aborted.", "AbortError"));
+                return;
+            }
+            const id = ++ClassHelper.workerRequestId;
+            const abort = () => worker.postMessage({ type: "abort", id });
+            signal?.addEventListener("abort", abort, { once: true });
+            const cleanup = () => signal?.removeEventListener("abort", abort);
+            ClassHelper.workerRequests.set(id, { apiURL, options, resolve, reject, cleanup });
+            // the worker resolves relative urls against its own script
+            worker.postMessage({ id, url: new URL(apiURL.toString(), document.baseURI).toString(), init });
+        });
+    }
+
+    /**
+     * Fetch, parse and shape a rest api response, see classhelper_worker.js.
+     * This runs in the worker when there is one.
+     * @param {URL | string} apiURL
+     * @param {RequestInit} [options]
+     * @returns {Promise<{ok: boolean, status: number, json: any}>}
+     * @throws {Error} when fetching or parsing data from roundup rest api fails,
+     * an AbortError is passed through unchanged.
+     */
+    static async fetchJSON(apiURL, options = {}) {
+        const worker = ClassHelper.getWorker();
+        if (worker != null) {
+            const { timing, ...result } = await ClassHelper.fetchInWorker(worker, apiURL, options);
+            // the worker has its own time origin, only its durations are comparable
+            const end = performance.now();
+            for (let [phase, duration] of Object.entries(timing ?? {})) {
+                ClassHelper.recordTiming(`request:${phase}`, end - duration, end);
+            }
+            return result;
+        }
+
+        /** @type {Response} */
+        let resp, json;
+
+        let start = performance.now();
+        try {
+            resp = await fetch(apiURL, options);
+        } catch (error) {
+            if (error.name === "AbortError") {
+                throw error;
+            }
+            let message = `Error fetching data from roundup rest api`;
+            message += `url: ${apiURL.toString()}\n`;
+            throw new Error(message, { cause: error });
+        }
+        ClassHelper.recordTiming("request:fetch", start);
+
+        start = performance.now();
+        try {
+            json = await resp.json();
+        } catch (error) {
+            if (error.name === "AbortError") {
+                throw error;
+            }
+            let message = "Error parsing json from roundup rest api\n";
+            message += `url: ${apiURL.toString()}\n`;
+            throw new Error(message, { cause: error });
+        }
+
+        ClassHelper.recordTiming("request:parse", start);
+
+        start = performance.now();
+        ClassHelper.shapeResponse(apiURL, options.body, json);
+        ClassHelper.recordTiming("request:shape", start);
+        return { ok: resp.ok, status: resp.status, json };
+    }
+
+    /**
+     * Same as ClassHelper.fetchJSON for a GET request, but all the requests
+     * made during one task go to the server in a single /rest/batch call.
+     * @param {URL | string} apiURL
+     * @returns {Promise<{ok: boolean, status: number, json: any}>}
+     * @throws {Error} when fetching or parsing data from roundup rest api fails
+     */
+    static fetchBatched(apiURL) {
+        return new Promise((resolve, reject) => {
+            ClassHelper.batchQueue.push({ url: apiURL.toString(), resolve, reject });
+            if (ClassHelper.batchQueue.length === 1) {
+                queueMicrotask(ClassHelper.flushBatch);
+            }
+        });
+    }
+
+    static flushBatch() {
+        const queue = ClassHelper.batchQueue;
+        ClassHelper.batchQueue = [];
+
+        const trackerBaseURL = window.location.href.substring(0, window.location.href.lastIndexOf("/"));
+        const batchable = [];
+        for (let request of queue) {
+            const pathname = new URL(request.url).pathname;
+            const httpCached = CLASSHELPER_HTTP_CACHED_PATHNAMES.some(path => pathname.endsWith(path));
+            if (ClassHelper.batchAvailable && !httpCached && request.url.startsWith(trackerBaseURL + "/")) {
+                batchable.push(request);
+            } else {
+                ClassHelper.fetchJSON(request.url).then(request.resolve, request.reject);
+            }
+        }
+
+        for (let i = 0; i < batchable.length; i += CLASSHELPER_BATCH_MAX_REQUESTS) {
+            ClassHelper.sendBatch(trackerBaseURL, batchable.slice(i, i + CLASSHELPER_BATCH_MAX_REQUESTS));
+        }
+    }
+
+    /**
+     * @param {string} trackerBaseURL
+     * @param {{url: string, resolve: Function, reject: Function}[]} requests
+     */
+    static async sendBatch(trackerBaseURL, requests) {
+        const fetchEach = () => {
+            for (let request of requests) {
+                ClassHelper.fetchJSON(request.url).then(request.resolve, request.reject);
+            }
+        };
+
+        // a batch of one is no better than the request itself
+        if (requests.length === 1) {
+            fetchEach();
+            return;
+        }
+
+        const url = `${trackerBaseURL}/rest/batch`;
+        let result;
+        try {
+            result = await ClassHelper.fetchJSON(url, {
+                method: "POST",
+                headers: {
+                    "Content-Type": "application/json",
+                    // required by the csrf protection of the rest api
+                    "X-Requested-With": "rest",
+                },
+                body: JSON.stringify({
+                    requests: requests.map(request => request.url.substring(trackerBaseURL.length + 1))
+                })
+            });
+        } catch (error) {
+            requests.forEach(request => request.reject(error));
+            return;
+        }
+
+        if (!result.ok) {
+            if (result.status === 404 || result.status === 405) {
+                // the tracker has no batch route, stop trying
+                ClassHelper.batchAvailable = false;
+            }
+            fetchEach();
+            return;
+        }
+
+        result.json.data.responses.forEach((response, i) => {
+            requests[i].resolve({
+                ok: response.status >= 200 && response.status < 300,
+                status: response.status,
+                json: response.body
+            });
+        });
+    }
+
+    /**
+     * Fetch the given pages in the background when the data-prefetch
+     * attribute is set, the result lands in ClassHelper.cache.
+     * The requests start when the browser is idle and have a low priority.
+     * @param {(string | undefined)[]} urls
+     */
+    prefetchPages(urls) {
+        if (!this.hasAttribute(CLASSHELPER_ATTRIBUTE_PREFETCH)) {
+            return;
+        }
+
+        for (let url of urls) {
+            if (!url) {
+                continue;
+            }
+
+            const key = ClassHelperCache.normalizeURL(url);
+            if (this.prefetchControllers.has(key)) {
+                continue;
+            }
+
+            const controller = new AbortController();
+            this.prefetchControllers.set(key, controller);
+
+            const prefetch = () => {
+                if (controller.signal.aborted) {
+                    return;
+                }
+                ClassHelper.fetchCached(url, { signal: controller.signal, priority: "low" })
+                    .catch(error => {
+                        if (error.name !== "AbortError") {
+                            console.warn("Classhelper failed to prefetch page.", error);
+                        }
+                    })
+                    .finally(() => {
+                        if (this.prefetchControllers.get(key) === controller) {
+                            this.prefetchControllers.delete(key);
+                        }
+                    });
+            };
+
+            if ("requestIdleCallback" in window) {
+                window.requestIdleCallback(prefetch, { timeout: CLASSHELPER_PREFETCH_IDLE_TIMEOUT });
+            } else {
+                setTimeout(prefetch, 0);
+            }
+        }
+    }
+
+    /**
+     * Abort the background page requests, except the one for the
+     * page the user is navigating to, that one is picked up by fetchCached.
+     * @param {URL | string} [keepURL]
+     */
+    cancelPrefetches(keepURL) {
+        const keep = keepURL ? ClassHelperCache.normalizeURL(keepURL) : null;
+        for (let [key, controller] of Array.from(this.prefetchControllers)) {
+            if (key !== keep) {
+                controller.abort();
+                this.prefetchControllers.delete(key);
+            }
+        }
+    }
+
+    async fetchDropdownsData() {
+        // Lists already loaded are kept, ClassHelper.fetchDropdown makes
+        // asking again for a list that is loading or failed cheap.
+        if (this.dropdownsData == null) {
+            this.dropdownsData = {};
+        }
 
         if (this.dataset.searchWith == null) {
             return;
@@ -363,12 +1602,17 @@ class ClassHelper extends HTMLElement {
 
         const params = this.dataset.searchWith.split(',');
 
+        const requests = [];
         for (let param of params) {
             if (param.includes("[]")) {
                 const segments = param.split("[]");
                 param = segments[0];
                 const sortOrder = segments[1];
 
+                if (this.dropdownsData[param]) {
+                    continue;
+                }
+
                 let url = this.trackerBaseURL;
                 if (ALTERNATIVE_DROPDOWN_PATHNAMES[param]) {
                     url += ALTERNATIVE_DROPDOWN_PATHNAMES[param];
@@ -381,51 +1625,76 @@ class ClassHelper extends HTMLElement {
                     url += `&@sort=${sortOrder}`;
                 }
 
-                let resp, json;
-                try {
-                    resp = await fetch(url);
-                } catch (error) {
-                    let message = `Error fetching translations from roundup rest api\n`;
-                    message += `url: ${url.toString()}\n`;
-                    throw new Error(message, { cause: error });
-                }
+                requests.push(ClassHelper.fetchDropdown(url)
+                    .then(list => {
+                        this.dropdownsData[param] = list;
+                        ClassHelper.setDropdownNames(param, list);
+                    }));
+            }
+        }
+
+        if (requests.length === 0) {
+            return;
+        }
+        const start = performance.now();
+        await Promise.all(requests);
+        ClassHelper.recordTiming("fetchDropdownsData:fetch", start);
+    }
+
+    /**
+     * Fetch the dropdown list at url once for the whole page, classhelpers
+     * asking for the same url get the same Map.
+     * @param {string} url
+     * @returns {Promise.<Map.<string, string>>} id to display value
+     * @throws {Error} when fetching or parsing data from roundup rest api fails
+     */
+    static fetchDropdown(url) {
+        if (ClassHelper.dropdowns.has(url)) {
+            return ClassHelper.dropdowns.get(url);
+        }
+
+        const request = ClassHelper.fetchDropdownList(url);
+        ClassHelper.dropdowns.set(url, request);
+        // let the next classhelper try again instead of sharing the failure
+        request.catch(() => ClassHelper.dropdowns.delete(url));
 
-                try {
-                    json = await resp.json();
-                } catch (error) {
-                    let message = `Error parsing json from roundup rest api\n`;
-                    message += `url: ${url.toString()}\n`;
-                    throw new Error(message, { cause: error });
-                }
+        return request;
+    }
 
-                if (!resp.ok) {
-                    let message = `Unexpected response\n`;
-                    message += `url: ${url.toString()}\n`;
-                    message += `response status: ${resp.status}\n`;
-                    message += `response body: ${JSON.stringify(json)}\n`;
-                    throw new Error(message);
-                }
+    /**
+     * @param {string} url
+     * @returns {Promise.<Map.<string, string>>}
+     */
+    static async fetchDropdownList(url) {
+        // only a bootstrap block puts dropdown lists in the cache
+        const { ok, status, json } = ClassHelper.cache.get(url) ?? await ClassHelper.fetchBatched(url);
 
-                let list = new Map();
+        if (!ok) {
+            let message = `Unexpected response\n`;
+            message += `url: ${url.toString()}\n`;
+            message += `response status: ${status}\n`;
+            message += `response body: ${JSON.stringify(json)}\n`;
+            throw new Error(message);
+        }
 
-                if (json.data.collection.length > 0) {
-                    let idKey = "id";
-                    let valueKey = Object.keys(json.data.collection[0]).find(key => key !== "id" && key !== "link");
+        let list = new Map();
 
-                    if (!valueKey) {
-                        let message = `No suitable key found for value in dropdown data\n`;
-                        message += `url: ${url.toString()}\n`;
-                        throw new Error("No value key found in dropdown data for: " + url);
-                    }
+        if (json.data.collection.length > 0) {
+            let idKey = "id";
+            let valueKey = Object.keys(json.data.collection[0]).find(key => key !== "id" && key !== "link");
 
-                    for (let entry of json.data.collection) {
-                        list.set(entry[idKey], entry[valueKey]);
-                    }
+            if (!valueKey) {
+                let message = `No suitable key found for value in dropdown data\n`;
+                message += `url: ${url.toString()}\n`;
+                throw new Error("No value key found in dropdown data for: " + url);
+            }
 
-                }
-                this.dropdownsData[param] = list;
+            for (let entry of json.data.collection) {
+                list.set(entry[idKey], entry[valueKey]);
             }
+
         }
+        return list;
     }
 
     /**
@@ -525,11 +1794,18 @@ class ClassHelper extends HTMLElement {
      * @returns {URL}
      */
     static getRestURL(trackerBaseURL, props) {
-        const restDataPath = "rest/data";
+        // the items come as columns, see classhelper_worker.js
+        const cursor = props.cursor && ClassHelper.columnsAvailable;
+        const restDataPath = cursor ? "rest/cursor" : ClassHelper.columnsAvailable ? "rest/columns" : "rest/data";
         const base = trackerBaseURL + "/" + restDataPath + "/" + props.apiClassName;
         let url = new URL(base);
 
-        url.searchParams.append("@page_index", props.pageIndex);
+        // cursor pages start at the first item, the next and prev links carry the cursors
+        if (cursor) {
+            url.searchParams.append("@format", "columns");
+        } else {
+            url.searchParams.append("@page_index", props.pageIndex);
+        }
         url.searchParams.append("@page_size", props.pageSize);
         let fields = props.fields.join(',');
         url.searchParams.append("@fields", fields);
@@ -552,6 +1828,24 @@ class ClassHelper extends HTMLElement {
         return url;
     }
 
+    /**
+     * offset of the first row of a response in the whole collection,
+     * used to number its rows
+     * @param {any} data the data of a collection response
+     * @param {URL} selfPageURL
+     * @param {HelpUrlProps} props
+     * @returns {number}
+     */
+    static getPageOffset(data, selfPageURL, props) {
+        // /rest/cursor tells where its page starts, after a search that
+        // need not be a multiple of the page size
+        if (data["@offset"] !== undefined) {
+            return data["@offset"];
+        }
+        const index = parseInt(selfPageURL.searchParams.get("@page_index") ?? 1);
+        return (index - 1) * props.pageSize;
+    }
+
     getSearchFragment(formData) {
         const fragment = document.createDocumentFragment();
         const form = document.createElement("form");
@@ -637,8 +1931,8 @@ class ClassHelper extends HTMLElement {
         const search = document.createElement("button");
         search.textContent = ClassHelper.translations["search"];
         search.classList.add("search-button"); // Add class for styling
-        search.addEventListener("click", (e) => {
-            e.preventDefault();
+        const submitSearch = () => {
+            clearTimeout(this.searchDebounceTimer);
             let fd = new FormData(form);
 
             let hasError = this.popupRef.document.getElementsByClassName("search-error").item(0);
@@ -655,13 +1949,29 @@ class ClassHelper extends HTMLElement {
                     value: fd
                 }
             }));
+        };
+
+        search.addEventListener("click", (e) => {
+            e.preventDefault();
+            submitSearch();
         });
 
+        if (this.hasAttribute(CLASSHELPER_ATTRIBUTE_SEARCH_AS_YOU_TYPE)) {
+            const delay = parseInt(this.getAttribute(CLASSHELPER_ATTRIBUTE_SEARCH_AS_YOU_TYPE));
+            const debounce = isNaN(delay) ? CLASSHELPER_SEARCH_DEBOUNCE : delay;
+            // "input" fires for text fields and dropdowns alike
+            form.addEventListener("input", () => {
+                clearTimeout(this.searchDebounceTimer);
+                this.searchDebounceTimer = setTimeout(submitSearch, debounce);
+            });
+        }
+
         const reset = document.createElement("button");
         reset.textContent = ClassHelper.translations["reset"];
         reset.classList.add("reset-button"); // Add class for styling
         reset.addEventListener("click", (e) => {
             e.preventDefault();
+            clearTimeout(this.searchDebounceTimer);
             form.reset();
             let fd = new FormData(form);
             this.dispatchEvent(new CustomEvent("search", {
@@ -684,7 +1994,13 @@ class ClassHelper extends HTMLElement {
         return fragment;
     }
 
-    getPaginationFragment(prevUrl, nextUrl, index, size, total) {
+    /**
+     * @param {string} [prevUrl]
+     * @param {string} [nextUrl]
+     * @param {number} offset offset of the first row, see ClassHelper.getPageOffset
+     * @param {number} total number of rows on the page
+     */
+    getPaginationFragment(prevUrl, nextUrl, offset, total) {
         const fragment = document.createDocumentFragment();
 
         const container = document.createElement("div");
@@ -696,12 +2012,8 @@ class ClassHelper extends HTMLElement {
         let startNumber = 0, endNumber = 0;
 
         if (total > 0) {
-            startNumber = (parseInt(index) - 1) * parseInt(size) + 1;
-            if (total < size) {
-                endNumber = startNumber + total - 1;
-            } else {
-                endNumber = parseInt(index) * parseInt(size);
-            }
+            startNumber = offset + 1;
+            endNumber = offset + total;
         }
 
         info.textContent = `${startNumber} - ${endNumber}`;
@@ -741,7 +2053,15 @@ class ClassHelper extends HTMLElement {
         return fragment;
     }
 
-    getAccumulatorFragment(preSelectedValues) {
+    /**
+     * @param {string} value comma separated ids
+     * @returns {Set.<string>}
+     */
+    static parseSelection(value) {
+        return new Set(value.split(",").map(id => id.trim()).filter(id => id !== ""));
+    }
+
+    getAccumulatorFragment() {
         const fragment = document.createDocumentFragment();
         const container = document.createElement("div");
         container.id = "popup-control";
@@ -755,9 +2075,11 @@ class ClassHelper extends HTMLElement {
         preview.classList.add("popup-preview");
         preview.type = "text";
         preview.name = "preview";
-        if (preSelectedValues.length > 0) {
-            preview.value = preSelectedValues.join(',');
-        }
+        preview.value = Array.from(this.selection).join(",");
+        // the user may also type ids into the preview
+        preview.addEventListener("input", () => {
+            this.selection = ClassHelper.parseSelection(preview.value);
+        });
 
         const cancel = document.createElement("button");
         cancel.textContent = ClassHelper.translations["cancel"];
@@ -771,6 +2093,7 @@ class ClassHelper extends HTMLElement {
         apply.classList.add("popup-apply");
         apply.textContent = ClassHelper.translations["apply"];
         apply.addEventListener("click", () => {
+            this.renderSelection();
             this.dispatchEvent(new CustomEvent("valueSelected", {
                 detail: {
                     value: preview.value
@@ -786,103 +2109,85 @@ class ClassHelper extends HTMLElement {
     }
 
     /**
-     * 
-     * @param {string[]} headers 
-     * @param {Object.<string, any>[]} data 
-     * @returns 
+     * The row template of the popup for the headers, reused while the
+     * popup and the field layout stay the same.
+     * @param {string[]} headers
+     * @returns {ClassHelperRowTemplate}
      */
-    getTableFragment(headers, data, preSelectedValues) {
-        let includeCheckbox = !this.popupRef.document.body.classList.contains(CLASSHELPER_TABLE_SELECTION_NONE);
-
-        const fragment = document.createDocumentFragment();
-
-        const container = document.createElement('div');
-        container.id = "popup-tablediv";
-        container.classList.add("popup-tablediv");
-
-        const table = document.createElement('table');
-        table.classList.add("popup-table");
-        const thead = document.createElement('thead');
-        const tbody = document.createElement('tbody');
-        const tfoot = document.createElement('tfoot');
+    getRowTemplate(headers) {
+        const doc = this.popupRef.document;
+        const includeCheckbox = !doc.body.classList.contains(CLASSHELPER_TABLE_SELECTION_NONE);
+        if (this.rowTemplate?.document !== doc ||
+            this.rowTemplate.layout !== ClassHelperRowTemplate.getLayout(headers, includeCheckbox)) {
+            this.rowTemplate = new ClassHelperRowTemplate(doc, headers, includeCheckbox);
+        }
+        return this.rowTemplate;
+    }
 
-        // Create table headers
-        const headerRow = document.createElement('tr');
+    /**
+     * The table head and foot with the translated headers.
+     * @param {Document} doc
+     * @param {string[]} headers
+     * @param {boolean} includeCheckbox
+     * @returns {HTMLTableRowElement}
+     */
+    static getHeaderRow(doc, headers, includeCheckbox) {
+        const headerRow = doc.createElement('tr');
 
         if (includeCheckbox) {
-            let thx = document.createElement("th");
+            let thx = doc.createElement("th");
             thx.textContent = "X";
             thx.classList.add("table-header");
             headerRow.appendChild(thx);
         }
 
         headers.forEach(header => {
-            const th = document.createElement('th');
+            const th = doc.createElement('th');
             th.textContent = ClassHelper.translations[header];
             headerRow.appendChild(th);
         });
-        thead.appendChild(headerRow);
+        return headerRow;
+    }
 
-        // Create table body with data
-        data.forEach((entry) => {
-            const row = document.createElement('tr');
-            row.dataset.id = entry[headers[0]];
-            row.setAttribute("tabindex", 0);
-            row.classList.add("row-style");
-
-            if (includeCheckbox) {
-                const td = document.createElement('td');
-                const checkbox = document.createElement("input");
-                checkbox.setAttribute("type", "checkbox");
-                checkbox.checked = false;
-                checkbox.setAttribute("tabindex", -1);
-                td.appendChild(checkbox)
-                row.appendChild(td);
-                if (preSelectedValues.includes(entry[headers[0]])) {
-                    checkbox.checked = true;
-                }
-            }
+    /**
+     * The table is built in the popup document from the row template,
+     * see ClassHelperRowTemplate.
+     * @param {string[]} headers 
+     * @param {Object.<string, any>[]} data 
+     * @param {string[][]} [cells] display text of the rows, from the response
+     * @returns {DocumentFragment}
+     */
+    getTableFragment(headers, data, cells = ClassHelper.getCells(headers, data)) {
+        if (this.hasAttribute(CLASSHELPER_ATTRIBUTE_VIRTUAL_SCROLL)) {
+            return this.getVirtualTableFragment(headers, data, cells);
+        }
+        this.virtualTable = null;
 
-            headers.forEach(header => {
-                const td = document.createElement('td');
-                td.textContent = entry[header];
-                row.appendChild(td);
-            });
-            tbody.appendChild(row);
-        });
+        const rowTemplate = this.getRowTemplate(headers);
+        const doc = rowTemplate.document;
 
-        if (includeCheckbox) {
-            tbody.addEventListener("click", (e) => {
-                let id, tr;
-                if (e.target.tagName === "INPUT" ) {
-                    tr = e.target.parentElement.parentElement;
-                    id = tr.dataset.id;
-	        } else if (e.target.tagName === "TD") {
-                    tr = e.target.parentElement;
-                    id = tr.dataset.id;
-                } else if (e.target.tagName === "TR") {
-                    tr = e.target;
-                    id = tr.dataset.id;
-                }
+        const fragment = doc.createDocumentFragment();
 
-              if (e.target.tagName !== "INPUT") {
-		/* checkbox is only child of the first td of the table row */
-		let checkbox = tr.children.item(0).children.item(0);
-		checkbox.checked = !checkbox.checked;
-                }
+        const container = doc.createElement('div');
+        container.id = "popup-tablediv";
+        container.classList.add("popup-tablediv");
+        container.dataset.layout = rowTemplate.layout;
 
-                this.dispatchEvent(new CustomEvent("selection", {
-                    detail: {
-                        value: id
-                    }
-                }));
-            });
+        const table = doc.createElement('table');
+        table.classList.add("popup-table");
+        const thead = doc.createElement('thead');
+        const tbody = doc.createElement('tbody');
+        const tfoot = doc.createElement('tfoot');
+
+        thead.appendChild(ClassHelper.getHeaderRow(doc, headers, rowTemplate.includeCheckbox));
+        rowTemplate.patchRows(tbody, data, cells, this.selection);
 
+        if (rowTemplate.includeCheckbox) {
+            tbody.addEventListener("click", (e) => this.handleTableClick(e));
         }
 
         // Create table footer with the same column values as headers
-        const footerRow = headerRow.cloneNode(true);
-        tfoot.appendChild(footerRow);
+        tfoot.appendChild(ClassHelper.getHeaderRow(doc, headers, rowTemplate.includeCheckbox));
 
         // Assemble the table
         table.appendChild(thead);
@@ -896,6 +2201,113 @@ class ClassHelper extends HTMLElement {
         return fragment;
     }
 
+    /**
+     * Show a new page in the popup table. A plain table with the same
+     * fields keeps its rows and only their content changes, otherwise
+     * the table is replaced.
+     * @param {string[]} headers
+     * @param {Object.<string, any>[]} data
+     * @param {string[][]} [cells] display text of the rows, from the response
+     */
+    renderTable(headers, data, cells = ClassHelper.getCells(headers, data)) {
+        const doc = this.popupRef.document;
+        const oldTable = doc.getElementById("popup-tablediv");
+
+        if (!this.hasAttribute(CLASSHELPER_ATTRIBUTE_VIRTUAL_SCROLL) &&
+            oldTable.dataset.layout === this.getRowTemplate(headers).layout) {
+            this.rowTemplate.patchRows(oldTable.querySelector("tbody"), data, cells, this.selection);
+            oldTable.scrollTop = 0;
+            return;
+        }
+
+        doc.body.replaceChild(this.getTableFragment(headers, data, cells), oldTable);
+    }
+
+    /**
+     * toggles the checkbox of the clicked row and fires the selection event
+     * @param {MouseEvent} e
+     */
+    handleTableClick(e) {
+        let id, tr;
+        if (e.target.tagName === "INPUT") {
+            tr = e.target.parentElement.parentElement;
+            id = tr.dataset.id;
+        } else if (e.target.tagName === "TD") {
+            tr = e.target.parentElement;
+            id = tr.dataset.id;
+        } else if (e.target.tagName === "TR") {
+            tr = e.target;
+            id = tr.dataset.id;
+        }
+
+        if (tr == null || tr.classList.contains("virtual-spacer")) {
+            return;
+        }
+
+        if (e.target.tagName !== "INPUT") {
+            /* checkbox is only child of the first td of the table row */
+            let checkbox = tr.children.item(0).children.item(0);
+            checkbox.checked = !checkbox.checked;
+        }
+
+        this.dispatchEvent(new CustomEvent("selection", {
+            detail: {
+                value: id
+            }
+        }));
+    }
+
+    /**
+     * same table as getTableFragment but the body only holds the rows
+     * in view, see ClassHelperVirtualTable
+     * @param {string[]} headers 
+     * @param {Object.<string, any>[]} data 
+     * @param {string[][]} cells
+     * @returns {DocumentFragment}
+     */
+    getVirtualTableFragment(headers, data, cells) {
+        const rowTemplate = this.getRowTemplate(headers);
+        const includeCheckbox = rowTemplate.includeCheckbox;
+        const doc = rowTemplate.document;
+
+        const fragment = doc.createDocumentFragment();
+
+        const container = doc.createElement('div');
+        container.id = "popup-tablediv";
+        container.classList.add("popup-tablediv", "virtual-scroll");
+
+        const table = doc.createElement('table');
+        table.classList.add("popup-table");
+        table.setAttribute("aria-rowcount", data.length + 1);
+        const thead = doc.createElement('thead');
+        const tbody = doc.createElement('tbody');
+
+        const headerRow = ClassHelper.getHeaderRow(doc, headers, includeCheckbox);
+        headerRow.setAttribute("aria-rowindex", 1);
+        thead.appendChild(headerRow);
+
+        if (includeCheckbox) {
+            tbody.addEventListener("click", (e) => this.handleTableClick(e));
+        }
+
+        // rows scrolled out of view and back in again get their checkbox
+        // state from the current selection, not from the page load
+        const getSelection = () => this.selection;
+
+        const tfoot = doc.createElement('tfoot');
+        tfoot.appendChild(ClassHelper.getHeaderRow(doc, headers, includeCheckbox));
+
+        table.appendChild(thead);
+        table.appendChild(tbody);
+        table.appendChild(tfoot);
+        container.appendChild(table);
+        fragment.appendChild(container);
+
+        this.virtualTable = new ClassHelperVirtualTable(container, tbody, headers, data, cells, rowTemplate, getSelection);
+
+        return fragment;
+    }
+
     /**
      * main method called when classhelper is clicked
      * @param {URL | string} apiURL
@@ -906,8 +2318,6 @@ class ClassHelper extends HTMLElement {
      */
     async openPopUp(apiURL, props) {
 
-        /** @type {Response} */
-        let resp, json;
         /** @type {any} */
         let collection;
         /** @type {string} */
@@ -922,26 +2332,19 @@ class ClassHelper extends HTMLElement {
 			  { cause: "Abort requested." });
         }
 
-        try {
-            resp = await fetch(apiURL);
-        } catch (error) {
-            let message = `Error fetching data from roundup rest api`;
-            message += `url: ${apiURL.toString()}\n`;
-            throw new Error(message, { cause: error });
-        }
-
-        try {
-            json = await resp.json();
-        } catch (error) {
-            let message = "Error parsing json from roundup rest api\n";
-            message += `url: ${apiURL.toString()}\n`;
-            throw new Error(message, { cause: error });
-        }
+        // the search form needs the dropdowns, lists that are still
+        // missing are requested in the same batch as the table
+        let start = performance.now();
+        const [{ ok, status, json }] = await Promise.all([
+            ClassHelper.fetchCached(apiURL),
+            this.fetchDropdownsData().catch(error => console.error(error))
+        ]);
+        ClassHelper.recordTiming("openPopUp:fetch", start);
 
-        if (!resp.ok) {
+        if (!ok) {
             let message = `Unexpected response\n`;
             message += `url: ${apiURL.toString()}\n`;
-            message += `response status: ${resp.status}\n`;
+            message += `response status: ${status}\n`;
             message += `response body: ${JSON.stringify(json)}\n`;
             throw new Error(message);
         }
@@ -956,6 +2359,8 @@ class ClassHelper extends HTMLElement {
             nextPageURL = links.next[0].uri;
         }
 
+        this.completeSearchURL = (prevPageURL || nextPageURL) ? null : apiURL.toString();
+
         if (props.formProperty) {
             // Find preselected values
             const input = document.getElementsByName(props.formProperty).item(0);
@@ -963,6 +2368,7 @@ class ClassHelper extends HTMLElement {
                 preSelectedValues = input.value.split(',');
             }
         }
+        this.selection = ClassHelper.parseSelection(preSelectedValues.join(","));
 
         const popupFeatures = CLASSHELPER_POPUP_FEATURES(props.width, props.height);
         this.popupRef = window.open(CLASSHELPER_POPUP_URL, CLASSHELPER_POPUP_TARGET, popupFeatures);
@@ -971,11 +2377,14 @@ class ClassHelper extends HTMLElement {
             throw new Error("Browser Failed to open Popup Window");
         }
 
-        // Create the popup root level page
-        const page = document.createDocumentFragment();
-        const html = document.createElement("html");
-        const head = document.createElement("head");
-        const body = document.createElement("body");
+        // Create the popup root level page, in the popup document so the
+        // table does not have to be moved over from this one
+        start = performance.now();
+        const popupDocument = this.popupRef.document;
+        const page = popupDocument.createDocumentFragment();
+        const html = popupDocument.createElement("html");
+        const head = popupDocument.createElement("head");
+        const body = popupDocument.createElement("body");
 
         body.classList.add("flex-container");
         if (!props.formProperty) {
@@ -1008,11 +2417,11 @@ class ClassHelper extends HTMLElement {
             }
         }
 
-        const titleTag = document.createElement("title");
+        const titleTag = popupDocument.createElement("title");
         titleTag.textContent = titleText;
         head.appendChild(titleTag);
 
-        const styleSheet = document.createElement("link");
+        const styleSheet = popupDocument.createElement("link");
         styleSheet.rel = "stylesheet";
         styleSheet.type = "text/css";
         styleSheet.href = this.trackerBaseURL + '/' + CSS_STYLESHEET_FILE_NAME;
@@ -1023,24 +2432,26 @@ class ClassHelper extends HTMLElement {
             body.appendChild(searchFrag);
         }
 
-        const paginationFrag = this.getPaginationFragment(prevPageURL, nextPageURL, props.pageIndex, props.pageSize, collection.length);
+        const pageOffset = ClassHelper.getPageOffset(json.data, new URL(apiURL.toString()), props);
+        const paginationFrag = this.getPaginationFragment(prevPageURL, nextPageURL, pageOffset, collection.length);
         body.appendChild(paginationFrag);
 
-        const tableFrag = this.getTableFragment(props.fields, collection, preSelectedValues);
+        const tableFrag = this.getTableFragment(props.fields, collection, json.data.cells);
         body.appendChild(tableFrag);
 
-        const separator = document.createElement("div");
+        const separator = popupDocument.createElement("div");
         separator.classList.add("separator");
         body.appendChild(separator);
 
         if (props.formProperty) {
-            const accumulatorFrag = this.getAccumulatorFragment(preSelectedValues);
+            const accumulatorFrag = this.getAccumulatorFragment();
             body.appendChild(accumulatorFrag);
         }
 
         html.appendChild(head);
         html.appendChild(body);
         page.appendChild(html);
+        ClassHelper.recordTiming("openPopUp:build", start);
 
         const dispatchPopupReady = () => this.dispatchEvent(new CustomEvent("popupReady", { detail: page }));
 
@@ -1056,8 +2467,23 @@ class ClassHelper extends HTMLElement {
             this.popupRef.removeEventListener("load", dispatchPopupReady);
         }
 
+        this.popupRef.addEventListener("pagehide", () => this.cancelPrefetches());
+
+        this.prefetchPages([prevPageURL, nextPageURL]);
+
         this.popupRef.addEventListener("keydown", (e) => {
-            if (e.key === "ArrowDown") {
+            if ((e.key === "ArrowDown" || e.key === "ArrowUp") && this.virtualTable) {
+                // rows outside the view are not in the DOM, move by index instead of by sibling
+                if (e.target.tagName === "TR" || e.target.tagName != "INPUT" && e.target.tagName != "SELECT") {
+                    e.preventDefault();
+                    const step = e.key === "ArrowDown" ? 1 : -1;
+                    if (e.target.tagName === "TR") {
+                        this.virtualTable.focusRow(parseInt(e.target.dataset.index) + step);
+                    } else {
+                        this.virtualTable.focusRow(step === 1 ? 0 : -1);
+                    }
+                }
+            } else if (e.key === "ArrowDown") {
                 if (e.target.tagName === "TR") {
                     e.preventDefault();
                     if (e.target.nextElementSibling != null) {
@@ -1130,8 +2556,6 @@ class ClassHelper extends HTMLElement {
      */
     async pageChange(apiURL, props) {
 
-        /** @type {Response} */
-        let resp, json;
         /** @type {any} */
         let collection;
         /** @type {string} */
@@ -1140,29 +2564,17 @@ class ClassHelper extends HTMLElement {
         let nextPageURL;
         /** @type {URL} */
         let selfPageURL;
-        /** @type {string[]} */
-        let accumulatorValues = [];
 
-        try {
-            resp = await fetch(apiURL);
-        } catch (error) {
-            let message = `Error fetching data from roundup rest api`;
-            message += `url: ${apiURL.toString()}\n`;
-            throw new Error(message, { cause: error });
-        }
+        this.cancelPrefetches(apiURL);
 
-        try {
-            json = await resp.json();
-        } catch (error) {
-            let message = "Error parsing json from roundup rest api\n";
-            message += `url: ${apiURL.toString()}\n`;
-            throw new Error(message, { cause: error });
-        }
+        let start = performance.now();
+        const { ok, status, json } = await ClassHelper.fetchCached(apiURL);
+        ClassHelper.recordTiming("pageChange:fetch", start);
 
-        if (!resp.ok) {
+        if (!ok) {
             let message = `Unexpected response\n`;
             message += `url: ${apiURL.toString()}\n`;
-            message += `response status: ${resp.status}\n`;
+            message += `response status: ${status}\n`;
             message += `response body: ${JSON.stringify(json)}\n`;
             throw new Error(message);
         }
@@ -1180,22 +2592,20 @@ class ClassHelper extends HTMLElement {
             selfPageURL = new URL(links.self[0].uri);
         }
 
-        const preview = this.popupRef.document.getElementById("popup-preview");
-        if (preview) {
-            accumulatorValues = preview.value.split(",");
-        }
-
+        start = performance.now();
         const popupDocument = this.popupRef.document;
         const popupBody = this.popupRef.document.body;
-        const pageIndex = selfPageURL.searchParams.get("@page_index");
+        const pageOffset = ClassHelper.getPageOffset(json.data, selfPageURL, props);
 
         const oldPaginationFrag = popupDocument.getElementById("popup-pagination");
-        const newPaginationFrag = this.getPaginationFragment(prevPageURL, nextPageURL, pageIndex, props.pageSize, collection.length);
+        const newPaginationFrag = this.getPaginationFragment(prevPageURL, nextPageURL, pageOffset, collection.length);
         popupBody.replaceChild(newPaginationFrag, oldPaginationFrag);
 
-        let oldTableFrag = popupDocument.getElementById("popup-tablediv");
-        let newTableFrag = this.getTableFragment(props.fields, collection, accumulatorValues);
-        popupBody.replaceChild(newTableFrag, oldTableFrag);
+        this.renderTable(props.fields, collection, json.data.cells);
+        this.virtualTable?.render(true);
+        ClassHelper.recordTiming("pageChange:swap", start);
+
+        this.prefetchPages([prevPageURL, nextPageURL]);
     }
 
     /** method when a value is selected in 
@@ -1203,6 +2613,9 @@ class ClassHelper extends HTMLElement {
      * @param {string} value
      */
     valueSelected(props, value) {
+        // the selection may go with a change to the items, ask the server again
+        ClassHelper.invalidateCache(props.apiClassName);
+
         if (!props.formProperty) {
             return;
         }
@@ -1212,15 +2625,98 @@ class ClassHelper extends HTMLElement {
         this.popupRef.close();
     }
 
+    /**
+     * When the search at apiURL only narrows down the last search that fit
+     * on a single page, filter the rows of that search instead of asking
+     * the server. Text filters of the rest api match case insensitive
+     * substrings, so a filter that contains the last one can only drop
+     * rows: "jo" to "joh" narrows, "john" to "jo" does not.
+     * @param {URL} apiURL
+     * @param {HelpUrlProps} props
+     * @returns {{ok: boolean, status: number, json: any} | null} null when the server has to be asked
+     */
+    refineCompleteSearch(apiURL, props) {
+        if (this.completeSearchURL == null) {
+            return null;
+        }
+        const complete = ClassHelper.cache.get(
+            (!ClassHelper.columnsAvailable && ClassHelper.getDataURL(this.completeSearchURL)) || this.completeSearchURL);
+        if (complete === undefined) {
+            return null;
+        }
+
+        const previous = new URL(this.completeSearchURL).searchParams;
+        const current = new URL(apiURL.toString()).searchParams;
+
+        // paging, fields and sort order have to be the same
+        const options = (params) => Array.from(params).filter(([key]) => key.startsWith("@")).sort().join("&");
+        if (options(previous) !== options(current)) {
+            return null;
+        }
+
+        const filters = new Map();
+        for (let [key, value] of current) {
+            if (key.startsWith("@")) {
+                continue;
+            }
+            const before = previous.get(key);
+            if (before === value) {
+                continue;
+            }
+            // dropdowns match ids, not substrings, and the rows need the field to filter on
+            if (this.dropdownsData?.[key] || !props.fields.includes(key)) {
+                return null;
+            }
+            if (before != null && !value.toLowerCase().includes(before.toLowerCase())) {
+                return null;
+            }
+            filters.set(key, value.toLowerCase());
+        }
+        for (let key of previous.keys()) {
+            if (!key.startsWith("@") && !current.has(key)) {
+                return null;
+            }
+        }
+
+        const rows = complete.json.data.collection;
+        for (let key of filters.keys()) {
+            if (!rows.every(row => typeof row[key] === "string")) {
+                return null;
+            }
+        }
+
+        const matches = rows.map(row => {
+            for (let [key, value] of filters) {
+                if (!row[key].toLowerCase().includes(value)) {
+                    return false;
+                }
+            }
+            return true;
+        });
+        const collection = rows.filter((_row, i) => matches[i]);
+        const cells = complete.json.data.cells?.filter((_row, i) => matches[i]);
+
+        return {
+            ok: true,
+            status: 200,
+            json: {
+                data: {
+                    collection: collection,
+                    cells: cells,
+                    "@links": { self: [{ uri: apiURL.toString() }] }
+                }
+            }
+        };
+    }
+
     /** method when search is performed within classhelper, here we need to update the classhelper table with search results
      * @param {URL} apiURL
      * @param {HelpUrlProps} props
+     * @param {AbortSignal} [signal] aborted when a newer search has started
      * @throws {Error} when fetching or parsing data from roundup rest api fails
      */
-    async searchEvent(apiURL, props) {
+    async searchEvent(apiURL, props, signal) {
 
-        /** @type {Response} */
-        let resp, json;
         /** @type {any} */
         let collection;
         /** @type {string} */
@@ -1229,26 +2725,20 @@ class ClassHelper extends HTMLElement {
         let nextPageURL;
         /** @type {URL} */
         let selfPageURL;
-        /** @type {string[]} */
-        let accumulatorValues = [];
 
-        try {
-            resp = await fetch(apiURL);
-        } catch (error) {
-            let message = `Error fetching data from roundup rest api`;
-            message += `url: ${apiURL.toString()}\n`;
-            throw new Error(message, { cause: error });
-        }
+        this.cancelPrefetches();
 
-        try {
-            json = await resp.json();
-        } catch (error) {
-            let message = "Error parsing json from roundup rest api\n";
-            message += `url: ${apiURL.toString()}\n`;
-            throw new Error(message, { cause: error });
+        let start = performance.now();
+        const refined = this.refineCompleteSearch(apiURL, props);
+        const { ok, status, json } = refined ?? await ClassHelper.fetchCached(apiURL, { signal });
+
+        // a newer search was started while we were waiting for this one
+        if (signal?.aborted) {
+            return;
         }
+        ClassHelper.recordTiming("searchEvent:fetch", start);
 
-        if (!resp.ok && resp.status === 400) {
+        if (!ok && status === 400) {
             // In the error message we will have the field name that caused the error.
             // and the value that caused the error, in a double quoted string
             // <some text> "(value)" <some text> "(key)", this regex is a capture group
@@ -1279,15 +2769,15 @@ class ClassHelper extends HTMLElement {
             }
         }
 
-        if (!resp.ok && resp.status === 403) {
+        if (!ok && status === 403) {
             this.popupRef.alert(json.error.msg);
             return;
         }
 
-        if (!resp.ok) {
+        if (!ok) {
             let message = `Unexpected response\n`;
             message += `url: ${apiURL.toString()}\n`;
-            message += `response status: ${resp.status}\n`;
+            message += `response status: ${status}\n`;
             message += `response body: ${JSON.stringify(json)}\n`;
             throw new Error(message);
         }
@@ -1305,14 +2795,14 @@ class ClassHelper extends HTMLElement {
             selfPageURL = new URL(links.self[0].uri);
         }
 
-        const preview = this.popupRef.document.getElementById("popup-preview");
-        if (preview) {
-            accumulatorValues = preview.value.split(",");
+        if (!refined) {
+            this.completeSearchURL = (prevPageURL || nextPageURL) ? null : apiURL.toString();
         }
 
+        start = performance.now();
         const popupDocument = this.popupRef.document;
         const popupBody = this.popupRef.document.body;
-        const pageIndex = selfPageURL.searchParams.get("@page_index");
+        const pageOffset = ClassHelper.getPageOffset(json.data, selfPageURL, props);
 
         // remove any previous error messages
         let errors = Array.from(popupDocument.getElementsByClassName("search-error"));
@@ -1322,36 +2812,41 @@ class ClassHelper extends HTMLElement {
         });
 
         const oldPaginationFrag = popupDocument.getElementById("popup-pagination");
-        let newPaginationFrag = this.getPaginationFragment(prevPageURL, nextPageURL, pageIndex, props.pageSize, collection.length);
+        let newPaginationFrag = this.getPaginationFragment(prevPageURL, nextPageURL, pageOffset, collection.length);
         popupBody.replaceChild(newPaginationFrag, oldPaginationFrag);
 
 
-        let oldTableFrag = popupDocument.getElementById("popup-tablediv");
-        let newTableFrag = this.getTableFragment(props.fields, collection, accumulatorValues);
-        popupBody.replaceChild(newTableFrag, oldTableFrag);
+        this.renderTable(props.fields, collection, json.data.cells);
+        this.virtualTable?.render(true);
+        ClassHelper.recordTiming("searchEvent:swap", start);
+
+        this.prefetchPages([prevPageURL, nextPageURL]);
     }
 
     /** method when an entry in classhelper table is selected
      * @param {string} value
      */
     selectionEvent(value) {
-        const preview = this.popupRef.document.getElementById("popup-preview");
-        if (!preview) {
+        if (this.popupRef.document.getElementById("popup-preview") == null) {
             return;
         }
 
-        if (preview.value == "" || preview.value == null) {
-            preview.value = value
+        value = value.toString();
+        if (this.selection.has(value)) {
+            this.selection.delete(value);
         } else {
-            const values = preview.value.split(',');
-            const exists = values.findIndex(v => v == value.toString());
+            this.selection.add(value);
+        }
 
-            if (exists > -1) {
-                values.splice(exists, 1);
-                preview.value = values.join(',');
-            } else {
-                preview.value += ',' + value;
-            }
+        // one join per click is cheap, the preview is never behind
+        this.renderSelection();
+    }
+
+    /** show the selection in the popup-preview input */
+    renderSelection() {
+        const preview = this.popupRef.document.getElementById("popup-preview");
+        if (preview) {
+            preview.value = Array.from(this.selection).join(",");
         }
     }
 }
@@ -1365,22 +2860,76 @@ function enableClassHelper() {
       return;
     }
 
-    /** make api call if error then do not register*/
+    const classhelpers = document.getElementsByTagName(CLASSHELPER_TAG_NAME);
+    if (classhelpers.length > 0) {
+        registerClassHelper();
+        return;
+    }
+
+    // Most pages have no classhelper, only register when one shows up
+    const observer = new MutationObserver(() => {
+        if (classhelpers.length > 0) {
+            observer.disconnect();
+            registerClassHelper();
+        }
+    });
+    observer.observe(document.documentElement, { childList: true, subtree: true });
+}
+
+function registerClassHelper() {
+    const define = () => {
+        customElements.define(CLASSHELPER_TAG_NAME, ClassHelper);
+        if (CLASSHELPER_SEND_TIMINGS) {
+            // the last timings of a page, a beacon would need the page to unload
+            document.addEventListener("visibilitychange", () => {
+                if (document.visibilityState === "hidden") {
+                    ClassHelper.flushTimings();
+                }
+            });
+        }
+        ClassHelper.fetchTranslations()
+        .catch(error => {
+            console.warn("Classhelper failed in translating.")
+            console.error(error);
+        });
+    };
+
+    // utils.classhelper_bootstrap only renders a bootstrap block for
+    // users allowed to use the rest api, no need to probe it
+    if (ClassHelper.loadBootstrap()) {
+        define();
+        return;
+    }
+
     // http://localhost/demo/rest
+    const restURL = new URL("rest", document.baseURI).toString();
+    const probeKey = `${CLASSHELPER_REST_PROBE_STORAGE_KEY}:${restURL}`;
+
+    // Only a working rest api is remembered, a failed probe is tried again
+    // on the next page as the user may have logged in meanwhile.
+    try {
+        if (window.sessionStorage.getItem(probeKey) === "true") {
+            define();
+            return;
+        }
+    } catch (error) {
+        // storage disabled by the user, probe every time
+    }
 
-    fetch("rest")
+    /** make api call if error then do not register*/
+    fetch(restURL)
         .then(resp => resp.json())
         .then(json => {
             if (json.error) {
                 console.log(json.error);
                 return;
             }
-            customElements.define(CLASSHELPER_TAG_NAME, ClassHelper);
-            ClassHelper.fetchTranslations()
-            .catch(error => {
-                console.warn("Classhelper failed in translating.")
-                console.error(error);
-            });
+            try {
+                window.sessionStorage.setItem(probeKey, "true");
+            } catch (error) {
+                // storage disabled by the user or full
+            }
+            define();
         }).catch(err => {
             console.error(err);
         });
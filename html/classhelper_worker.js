@@ -0,0 +1,148 @@
+// Classhelper Data Worker
+
+/**
+ * Fetches and parses the rest api responses of classhelper.js and shapes
+ * them into what the popup table renders, in a Web Worker so a large page
+ * does not block the issue form the user is typing in.
+ *
+ * page.html also loads this file as a plain script, classhelper.js uses
+ * the same functions on the main thread when workers are not available.
+ *
+ * Messages from classhelper.js:
+ *   {id, url, init}          fetch url, init is passed on to fetch
+ *   {type: "abort", id}      abort the request id
+ *   {type: "names", field, entries}
+ *                            the [id, name] pairs of the dropdown of field
+ * Replies: {id, ok, status, json, timing} or {id, stage, name, message} on
+ * failure, stage is "fetch" or "parse". timing has the milliseconds of the
+ * fetch, parse and shape phases.
+ */
+
+/**
+ * Display text of a field value, links show the name from the dropdown
+ * list of the field when there is one.
+ * @param {any} value
+ * @param {Map.<string, string>} [names] id to name
+ * @returns {string}
+ */
+function classhelperCellText(value, names) {
+    if (value == null) {
+        return "";
+    }
+    if (Array.isArray(value)) {
+        return value.map(item => classhelperCellText(item, names)).join(", ");
+    }
+    if (typeof value === "object") {
+        const name = names?.get(value.id);
+        if (name != null) {
+            return name;
+        }
+        // verbose responses carry the label of the linked item
+        const label = Object.keys(value).find(key => key !== "id" && key !== "link");
+        return String(label ? value[label] : value.id ?? "");
+    }
+    return String(value);
+}
+
+/**
+ * Shape the data of a collection response in place:
+ * the columns sent by the routes of interfaces.py become the collection
+ * of row objects, and data.cells gets the display text of every row for
+ * the fields, in order.
+ * @param {any} data
+ * @param {string[] | null} fields
+ * @param {Object.<string, Map.<string, string>>} names dropdown lists by field
+ */
+function classhelperShapeData(data, fields, names) {
+    if (data == null || typeof data !== "object") {
+        return;
+    }
+    if (data.columns) {
+        const columns = Object.entries(data.columns);
+        const collection = new Array(data["@rows"]);
+        for (let i = 0; i < collection.length; i++) {
+            const row = {};
+            for (let [field, values] of columns) {
+                row[field] = values[i];
+            }
+            collection[i] = row;
+        }
+        delete data.columns;
+        delete data["@rows"];
+        data.collection = collection;
+    }
+    if (fields && Array.isArray(data.collection)) {
+        const lists = fields.map(field => names[field]);
+        data.cells = data.collection.map(
+            row => fields.map((field, i) => classhelperCellText(row[field], lists[i])));
+    }
+}
+
+/**
+ * Shape a response of the rest api in place, the sub-responses of
+ * a /rest/batch response too.
+ * @param {string} url
+ * @param {string | null} body body of the request, the uris of a batch
+ * @param {any} json
+ * @param {Object.<string, Map.<string, string>>} names dropdown lists by field
+ */
+function classhelperShapeResponse(url, body, json, names) {
+    const fieldsOf = (uri) => new URL(uri, "http://localhost/").searchParams.get("@fields")?.split(",") ?? null;
+
+    const responses = json?.data?.responses;
+    if (Array.isArray(responses) && body) {
+        const uris = JSON.parse(body).requests ?? [];
+        responses.forEach((response, i) => {
+            if (uris[i]) {
+                classhelperShapeData(response.body?.data, fieldsOf(uris[i]), names);
+            }
+        });
+        return;
+    }
+    classhelperShapeData(json?.data, fieldsOf(url), names);
+}
+
+if (typeof WorkerGlobalScope !== "undefined" && self instanceof WorkerGlobalScope) {
+    /** @type {Object.<string, Map.<string, string>>} */
+    const names = {};
+    /** @type {Map.<number, AbortController>} */
+    const controllers = new Map();
+
+    self.onmessage = async (event) => {
+        const message = event.data;
+        if (message.type === "names") {
+            names[message.field] = new Map(message.entries);
+            return;
+        }
+        if (message.type === "abort") {
+            controllers.get(message.id)?.abort();
+            return;
+        }
+
+        const { id, url, init } = message;
+        const controller = new AbortController();
+        controllers.set(id, controller);
+
+        let stage = "fetch";
+        const timing = {};
+        try {
+            let start = performance.now();
+            const resp = await fetch(url, { ...init, signal: controller.signal });
+            timing.fetch = performance.now() - start;
+
+            stage = "parse";
+            start = performance.now();
+            const json = await resp.json();
+            timing.parse = performance.now() - start;
+
+            start = performance.now();
+            classhelperShapeResponse(url, init.body ?? null, json, names);
+            timing.shape = performance.now() - start;
+            self.postMessage({ id, ok: resp.ok, status: resp.status, json, timing });
+        } catch (error) {
+            self.postMessage({ id, stage, name: error.name, message: error.message });
+        } finally {
+            controllers.delete(id);
+        }
+    };
+}
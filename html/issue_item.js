@@ -0,0 +1,190 @@
+// Issue Item Utilities
+
+/**
+ * issue.item.html renders only the newest messages and a stub of the
+ * history. The links in there load the rest in pages from the
+ * /rest/messages and /rest/journal routes of interfaces.py. Without
+ * javascript they go to the page rendered with everything instead.
+ */
+
+/**
+ * fetch a page of a paged rest route
+ * @param {string} url url of the page
+ * @returns {Promise<object>} the collection, @total_size and @links
+ */
+async function fetch_page(url) {
+    const resp = await fetch(url, { credentials: "same-origin" });
+    const json = await resp.json();
+    if (!resp.ok) {
+        throw new Error(json.error ? json.error.msg : resp.statusText);
+    }
+    return json.data;
+}
+
+/**
+ * url of the page after this one, null on the last page
+ * @param {object} data a page returned by fetch_page
+ * @returns {string | null}
+ */
+function next_page_url(data) {
+    const links = data["@links"];
+    return links && links.next ? links.next[0].uri : null;
+}
+
+/**
+ * @param {string} tag
+ * @param {string} text
+ * @param {object} attributes
+ * @returns {HTMLElement}
+ */
+function make_element(tag, text, attributes) {
+    const element = document.createElement(tag);
+    if (text) {
+        element.textContent = text;
+    }
+    for (const name in attributes || {}) {
+        element.setAttribute(name, attributes[name]);
+    }
+    return element;
+}
+
+/**
+ * two table rows for a message, like the ones of issue.item.html but
+ * with the summary in place of the content
+ * @param {object} message an entry returned by /rest/messages
+ * @returns {DocumentFragment}
+ */
+function message_rows(message) {
+    const fragment = document.createDocumentFragment();
+    const header = make_element("tr");
+    const link = make_element("th");
+    link.appendChild(make_element("a", "msg" + message.id + " (view)",
+        { href: "msg" + message.id }));
+    header.appendChild(link);
+    header.appendChild(make_element("th", "Author: " + (message.author || "")));
+    header.appendChild(make_element("th", "Date: " + (message.date || "")));
+    header.appendChild(make_element("th"));
+    fragment.appendChild(header);
+
+    const content = make_element("tr");
+    const cell = make_element("td", null, { colspan: "4", "class": "content" });
+    cell.appendChild(make_element("pre", message.summary || ""));
+    content.appendChild(cell);
+    fragment.appendChild(content);
+    return fragment;
+}
+
+/**
+ * a table row for a journal entry, like the ones of context/history
+ * @param {object} entry an entry returned by /rest/journal
+ * @returns {HTMLTableRowElement}
+ */
+function journal_row(entry) {
+    let args = entry.args;
+    if (args && typeof args === "object") {
+        if ("class" in args && "id" in args && "key" in args) {
+            args = args["class"] + args.id + " " + args.key;
+        } else {
+            args = Object.keys(args).map(name => name + ": " + args[name])
+                .join(", ");
+        }
+    }
+    const row = make_element("tr");
+    for (const text of [entry.date, entry.user, entry.action, args]) {
+        row.appendChild(make_element("td", text));
+    }
+    return row;
+}
+
+/**
+ * load older messages, one page per click, above the link row
+ * @param {HTMLAnchorElement} link the "Show older messages" link
+ */
+async function load_older_messages(link) {
+    const row = link.closest("tr");
+    let url = link.dataset.next;
+    if (!url) {
+        // the newest page is rendered by the template already
+        url = link.dataset.url + "?@page_size=" + link.dataset.pageSize +
+            "&@page_index=2";
+    }
+    const data = await fetch_page(url);
+    for (const message of data.collection) {
+        row.parentNode.insertBefore(message_rows(message), row);
+    }
+    const next = next_page_url(data);
+    if (next) {
+        link.dataset.next = next;
+    } else {
+        row.remove();
+    }
+}
+
+/**
+ * turn the history stub into the history table, adding a page of
+ * journal entries per click
+ * @param {HTMLAnchorElement} link the "Show history" or "more" link
+ */
+async function load_history(link) {
+    const table = link.closest("table");
+    const data = await fetch_page(link.dataset.next || link.dataset.url);
+    if (!link.dataset.next) {
+        link.closest("th").textContent = "History";
+        const header = make_element("tr");
+        for (const text of ["Date", "User", "Action", "Args"]) {
+            header.appendChild(make_element("th", text));
+        }
+        table.tBodies[0].appendChild(header);
+    }
+
+    let more = table.querySelector("tr.more-history");
+    for (const entry of data.collection) {
+        table.tBodies[0].insertBefore(journal_row(entry), more);
+    }
+    const next = next_page_url(data);
+    if (!next) {
+        if (more) {
+            more.remove();
+        }
+        return;
+    }
+    if (!more) {
+        more = make_element("tr", null, { "class": "more-history" });
+        const cell = make_element("th", null, { colspan: "4" });
+        const moreLink = make_element("a", "Show more history",
+            { href: link.getAttribute("href") });
+        cell.appendChild(moreLink);
+        more.appendChild(cell);
+        table.tBodies[0].appendChild(more);
+    }
+    more.querySelector("a").dataset.next = next;
+}
+
+document.addEventListener("click", (event) => {
+    const link = event.target.closest("a");
+    if (!link) {
+        return;
+    }
+    let load = null;
+    if (link.closest("tr.older-messages") && link.dataset.url) {
+        load = load_older_messages;
+    } else if (link.closest("table.history") &&
+        (link.dataset.url || link.dataset.next)) {
+        load = load_history;
+    }
+    if (!load) {
+        return;
+    }
+    event.preventDefault();
+    if (link.dataset.loading) {
+        return;
+    }
+    link.dataset.loading = "true";
+    load(link).catch(error => {
+        // fall back to the page rendered with everything
+        console.error(error);
+        window.location.href = link.href;
+    }).finally(() => {
+        delete link.dataset.loading;
+    });
+});
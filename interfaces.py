@@ -1,13 +1,819 @@
+import base64
+import cProfile
+import functools
+import hashlib
+import pstats
+import re
+import threading
+import time
+
+from roundup import date, hyperdb
+from roundup.anypy.urllib_ import urlencode, urlparse
+from roundup.cgi import client
+from roundup.cgi.exceptions import NotFound, Unauthorised
+from roundup.exceptions import UsageError
 from roundup.rest import Routing, RestfulInstance,  _data_decorator
 
+from histogram import Histogram
+from restquery import QueryInput, execute_get
+from restroles import roles_payload
+
+# Most sub-requests accepted by one call to /rest/batch
+BATCH_MAX_REQUESTS = 20
+
+# Default page sizes of /rest/journal and /rest/messages
+JOURNAL_PAGE_SIZE = 50
+MESSAGES_PAGE_SIZE = 20
+
+# Default page size of /rest/cursor
+CURSOR_PAGE_SIZE = 10
+
+# Parameters of /rest/cursor that do not change which items match
+CURSOR_PAGE_PARAMS = ('@page_size', '@page_index', '@fields', '@attrs',
+                      '@verbose', '@after', '@before', '@format')
+
+# Seconds a browser may use its copy of /rest/roles without asking again
+ROLES_MAX_AGE = 600
+
+# Most timings accepted by one call to /rest/timings, the most timing
+# names kept, and the longest duration in milliseconds taken as real
+TIMINGS_MAX_ENTRIES = 200
+TIMINGS_MAX_NAMES = 100
+TIMINGS_MAX_DURATION = 10 * 60 * 1000
+
+# Timings sent by classhelper.js are "<operation>:<phase>=<milliseconds>"
+TIMING_RE = re.compile(r'^([A-Za-z]+:[A-Za-z]+)=([0-9]+(?:\.[0-9]+)?)$')
+
+# timing name -> Histogram of the durations sent to this process
+_timings = {}
+
+# Most requests of a route one call to /rest/metrics/profile can ask for,
+# and the functions listed by default in its stats
+PROFILE_MAX_REQUESTS = 1000
+PROFILE_STATS_LIMIT = 30
+
+# Names of the route functions of this file that _metered wraps
+_metered_routes = set()
+
+# route function name -> {"errors": count, "wall": Histogram of the
+# milliseconds, "db": Histogram of the milliseconds spent reading and
+# filtering items, "size": Histogram of the bytes of the response}
+_route_metrics = {}
+
+# route function name -> {"remaining": requests still to profile,
+# "profiled": requests profiled, "stats": pstats.Stats of them or None}
+_route_profiles = {}
+
+# cProfile can not profile two requests at once, a request arriving while
+# another one is profiled just runs
+_profile_lock = threading.Lock()
+
+
+def _etag_matches(etag, if_none_match):
+    """If-None-Match uses the weak comparison, W/ prefixes are ignored."""
+    if if_none_match.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+
+def _require_admin(rest):
+    """Routes that show data about the whole tracker are for admins."""
+    if not rest.db.user.has_role(rest.db.getuid(), 'Admin'):
+        raise Unauthorised('Only admins may see this.')
+
+
+def _db_seconds(db):
+    """Seconds the db spent reading and filtering items so far, as
+       counted by the backend for @stats.
+    """
+    stats = getattr(db, 'stats', None) or {}
+    return stats.get('get_items', 0) + stats.get('filtering', 0)
+
+
+def _run_profiled(name, call):
+    """call(), under cProfile when a profile of the route name still
+       wants requests.
+    """
+    profile = _route_profiles.get(name)
+    if profile is None or profile['remaining'] <= 0 or \
+            not _profile_lock.acquire(False):
+        return call()
+    try:
+        if profile['remaining'] <= 0:
+            return call()
+        profile['remaining'] -= 1
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(call)
+        finally:
+            if profile['stats'] is None:
+                profile['stats'] = pstats.Stats(profiler)
+            else:
+                profile['stats'].add(profiler)
+            profile['profiled'] += 1
+    finally:
+        _profile_lock.release()
+
+
+def _metered(func):
+    """Record the wall time and db time of every request of a route in
+       _route_metrics, see /rest/metrics. Goes between Routing.route and
+       _data_decorator, so errors are counted too.
+
+       The rest api encodes the response after the route returns, its
+       size is recorded by Client.write from the body that is sent.
+    """
+    # the route function _data_decorator wraps
+    name = func.wrapped_func.__name__
+    _metered_routes.add(name)
+
+    @functools.wraps(func)
+    def metered(self, *args, **kwargs):
+        # Client.handle_rest starts with None, the sub-requests of
+        # /rest/batch and the routes run by a page render are not sent
+        # on their own
+        if getattr(self.client, 'metered_route', '') is None:
+            self.client.metered_route = name
+
+        db_start = _db_seconds(self.db)
+        start = time.perf_counter()
+        output = _run_profiled(name, lambda: func(self, *args, **kwargs))
+        wall = (time.perf_counter() - start) * 1000
+        db = (_db_seconds(self.db) - db_start) * 1000
+
+        metrics = _route_metrics.get(name)
+        if metrics is None:
+            metrics = _route_metrics.setdefault(name, {
+                "errors": 0, "wall": Histogram(), "db": Histogram(),
+                "size": Histogram()})
+        metrics["wall"].add(wall)
+        metrics["db"].add(db)
+        if 'error' in output:
+            metrics["errors"] += 1
+        return output
+    return metered
+
+
+def _profile_stats(stats, sort, limit):
+    """The limit functions of pstats.Stats stats taking the most time,
+       sort is "cumtime" or "tottime".
+    """
+    column = {"cumtime": 3, "tottime": 2}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][column],
+                  reverse=True)
+    return [{
+        "function": "%s:%d(%s)" % key,
+        "calls": ncalls,
+        "primitive_calls": pcalls,
+        "tottime": round(tottime * 1000, 3),
+        "cumtime": round(cumtime * 1000, 3),
+    } for key, (pcalls, ncalls, tottime, cumtime, _callers)
+        in rows[:limit]]
+
+
+def _page(input, default_size, max_size):
+    """@page_size and @page_index of a paged request as ints."""
+    try:
+        size = int(input['@page_size'].value) if '@page_size' in input \
+            else default_size
+        index = int(input['@page_index'].value) if '@page_index' in input \
+            else 1
+    except ValueError:
+        raise UsageError("@page_size and @page_index must be integers.")
+    if size < 1 or index < 1:
+        raise UsageError("@page_size and @page_index must be positive.")
+    if size > max_size:
+        raise UsageError("Page size %s must be less than admin limit on "
+                         "query result size: %s." % (size, max_size))
+    return size, index
+
+
+def _viewable_item(rest, class_name, item_id):
+    """The class of an item the user may view, like get_element."""
+    if class_name not in rest.db.classes:
+        raise NotFound('Class %s not found' % class_name)
+    class_obj = rest.db.getclass(class_name)
+    if not item_id.isdigit() or not class_obj.hasnode(item_id):
+        raise NotFound('Item %s%s not found' % (class_name, item_id))
+    if not rest.db.security.hasPermission(
+        'View', rest.db.getuid(), class_name, itemid=item_id
+    ):
+        raise Unauthorised(
+            'Permission to view %s%s denied' % (class_name, item_id))
+    return class_obj
+
+
+def _paged(rest, path, items, total, size, index):
+    """A collection in the shape get_collection returns."""
+    result = {"collection": items, "@total_size": total}
+    if index * size < total:
+        result["@links"] = {"next": [{
+            "rel": "next",
+            "uri": "%s/%s?@page_size=%s&@page_index=%s" % (
+                rest.base_path, path, size, index + 1)}]}
+    return result
+
+
+def _journal_value(rest, prop, value, timezone):
+    """Text of an old property value stored in the journal."""
+    uid = rest.db.getuid()
+    check = rest.db.security.hasPermission
+
+    def label(classname, itemid):
+        linkcl = rest.db.getclass(classname)
+        labelprop = linkcl.labelprop(default_to_id=1)
+        if linkcl.hasnode(itemid) and check(
+            'View', uid, classname, itemid=itemid, property=labelprop
+        ):
+            if labelprop != 'id':
+                return str(linkcl.get(itemid, labelprop))
+        return classname + itemid
+
+    if value is None:
+        return ''
+    if isinstance(prop, hyperdb.Link):
+        return label(prop.classname, value)
+    if isinstance(prop, hyperdb.Multilink):
+        # a list of ('+', [ids]) and ('-', [ids]) changes
+        return ', '.join('%s%s' % (sign, label(prop.classname, itemid))
+                         for sign, itemids in value
+                         for itemid in itemids)
+    if isinstance(prop, hyperdb.Password):
+        return '*encrypted*'
+    if isinstance(prop, hyperdb.Date):
+        return str(date.Date(value).local(timezone)).replace(".", " ")
+    return str(value)
+
+
+def _viewable_journal(rest, class_obj, item_id):
+    """The journal entries of an item the user may see, like the
+       history of the item page: the args of a set keep only the
+       properties the user may view that are not quiet, a link or
+       unlink needs the linked item to be viewable. A set left with
+       nothing to show is dropped.
+    """
+    uid = rest.db.getuid()
+    check = rest.db.security.hasPermission
+    class_name = class_obj.classname
+    props = class_obj.getprops()
+    journal = []
+    for entry in class_obj.history(item_id):
+        args = entry[4]
+        if isinstance(args, dict):
+            # a copy, the backend may hand out its cached journal
+            args = dict((name, value) for name, value in args.items()
+                        if name in props and not props[name].quiet
+                        and check('View', uid, class_name, property=name,
+                                  itemid=item_id))
+            # a create has no args to begin with and stays
+            if entry[4] and not args:
+                continue
+        elif isinstance(args, tuple) and len(args) == 3:
+            linkcl, linkid, key = args
+            if linkcl not in rest.db.classes:
+                continue
+            linkclass = rest.db.getclass(linkcl)
+            linkprop = linkclass.getprops().get(key)
+            if linkprop is None or linkprop.quiet \
+               or not linkclass.hasnode(linkid) \
+               or not check('View', uid, linkcl, itemid=linkid):
+                continue
+        journal.append(tuple(entry[:4]) + (args,))
+    return journal
+
+
+def _cursor_token(position, itemid):
+    """Opaque cursor pointing at the item itemid at position."""
+    token = '%s:%s' % (position, itemid)
+    return base64.urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+
+
+def _cursor_position(token, ids):
+    """Position in ids of the item a cursor points at. When items were
+       added or removed since the cursor was made, the item is looked
+       up by its id, and when it is gone the old position is used.
+    """
+    try:
+        position, itemid = base64.urlsafe_b64decode(
+            token.encode('ascii')).decode('ascii').split(':')
+        position = int(position)
+    except (TypeError, ValueError, UnicodeError):
+        raise UsageError("Invalid cursor %s." % token)
+    if 0 <= position < len(ids) and ids[position] == itemid:
+        return position
+    try:
+        return ids.index(itemid)
+    except ValueError:
+        return max(0, min(position, len(ids)))
+
+
+def _strip_links(value):
+    """A property value without the link urls of linked items."""
+    if isinstance(value, dict):
+        return dict((k, _strip_links(v)) for k, v in value.items()
+                    if k != 'link')
+    if isinstance(value, list):
+        return [_strip_links(v) for v in value]
+    return value
+
+
+def _to_columns(data):
+    """Turn the collection of a collection response into one array per
+       field, without the link urls. A field an item does not have
+       (e.g. no View permission) is null in its column.
+    """
+    data = dict(data)
+    rows = data.pop('collection')
+    fields = []
+    for row in rows:
+        for name in row:
+            if name != 'link' and name not in fields:
+                fields.append(name)
+    data['columns'] = dict((name, [_strip_links(row.get(name))
+                                   for row in rows])
+                           for name in fields)
+    data['@rows'] = len(rows)
+    return data
+
+
+class Client(client.Client):
+
+    # name of the route function of this file that answers the rest
+    # request, set by _metered
+    metered_route = ''
+
+    def handle_rest(self):
+        self.metered_route = None
+        client.Client.handle_rest(self)
+
+    def write(self, content):
+        """A 304 has no body. handle_rest only leaves out the body of
+           a 204, so the body of a 304 from a rest route is dropped here.
+
+           Records the size of the body of a route of this file, before
+           compression, in _route_metrics.
+        """
+        if self.response_code == 304:
+            self.additional_headers.pop('Content-Length', None)
+            content = b''
+        metrics = _route_metrics.get(self.metered_route)
+        if metrics is not None:
+            metrics["size"].add(len(content))
+        client.Client.write(self, content)
+
+
 class RestfulInstance:
 
     @Routing.route("/roles", 'GET')
+    @_metered
     @_data_decorator
     def get_roles(self, input):
         """Return all defined roles. The User class property
            roles is a string but simulate it as a MultiLink
            to an actual Roles class.
         """
-        return 200, {"collection": [ {"id": rolename, "name": rolename}
-                  for rolename in list(self.db.security.role.keys())]}
\ No newline at end of file
+        payload, digest = roles_payload(self.db)
+
+        # Conditional requests only make sense for a plain GET, not for
+        # a sub-request of /rest/batch.
+        if self.client.env.get('REQUEST_METHOD') == 'GET':
+            headers = self.client.request.headers
+            # the same roles are formatted differently for these
+            variant = '%s\0%s' % (
+                input['@pretty'].value if '@pretty' in input else '',
+                headers.get('Accept', ''))
+            etag = '"%s-%s"' % (digest, hashlib.sha1(
+                variant.encode('utf-8')).hexdigest()[:8])
+            self.client.setHeader("ETag", etag)
+            self.client.setHeader("Cache-Control",
+                                  "private, max-age=%d" % ROLES_MAX_AGE)
+
+            if_none_match = headers.get('If-None-Match')
+            if if_none_match and _etag_matches(etag, if_none_match):
+                # Client.write sends a 304 without the body
+                return 304, {}
+
+        # a copy, the decorator may add @stats to it
+        return 200, dict(payload)
+
+    @Routing.route("/batch", 'POST')
+    @_metered
+    @_data_decorator
+    def post_batch(self, input):
+        """Run several GET requests in one round trip.
+
+           The body is {"requests": ["rest/data/user?@fields=...", ...]}
+           with uris relative to the tracker. Every sub-request runs as
+           if it was sent on its own by the same user, so the usual
+           permission checks apply. The responses come back in the
+           same order as {"status": ..., "body": ...} objects.
+        """
+        if 'requests' not in input:
+            raise UsageError("Missing the list of requests.")
+        uris = input['requests'].value
+        if not isinstance(uris, list):
+            uris = [uris]
+        if len(uris) > BATCH_MAX_REQUESTS:
+            raise UsageError("At most %s requests can be batched, got %s."
+                             % (BATCH_MAX_REQUESTS, len(uris)))
+
+        responses = []
+        for uri in uris:
+            path = urlparse(uri).path.strip('/')
+            if not path.startswith('rest/') or path == 'rest/batch':
+                output = self.error_obj(400, "Can not batch %s." % uri)
+                status = self.client.response_code
+            else:
+                status, output = execute_get(self, uri)
+            responses.append({"status": status, "body": output})
+
+        return 200, {"responses": responses}
+
+    @Routing.route("/journal/<:class_name>/<:item_id>", 'GET')
+    @_metered
+    @_data_decorator
+    def get_journal(self, class_name, item_id, input):
+        """Page through the journal of an item, newest entry first.
+
+           The entries are the ones the history of the item page shows:
+           journal entries of properties the user may not view or that
+           are quiet are left out. Each is an object with the date (in
+           the timezone of the user), the user, the action and the args:
+           old property values as text for a set, or the linked item
+           for a link or unlink.
+        """
+        class_obj = _viewable_item(self, class_name, item_id)
+        size, index = _page(input, JOURNAL_PAGE_SIZE,
+                            self.max_response_row_size)
+
+        # filtered before paging, so @total_size counts what is shown
+        history = _viewable_journal(self, class_obj, item_id)
+        history.sort(key=lambda entry: entry[:3])
+        history.reverse()
+        page = history[(index - 1) * size:index * size]
+
+        timezone = self.db.getUserTimezone()
+        props = class_obj.getprops()
+        usernames = {}
+        entries = []
+        for _id, evt_date, userid, action, args in page:
+            if userid not in usernames:
+                try:
+                    usernames[userid] = self.db.user.get(userid, 'username')
+                except IndexError:
+                    usernames[userid] = userid
+            if isinstance(args, dict):
+                args = dict((name, _journal_value(self, props[name], value,
+                                                  timezone))
+                            for name, value in args.items())
+            elif isinstance(args, tuple) and len(args) == 3:
+                linkcl, linkid, key = args
+                args = {"class": linkcl, "id": linkid, "key": str(key)}
+            else:
+                args = str(args)
+            entries.append({
+                "date": str(evt_date.local(timezone)).replace(".", " "),
+                "user": usernames[userid],
+                "action": action,
+                "args": args,
+            })
+
+        return 200, _paged(self, "journal/%s/%s" % (class_name, item_id),
+                                entries, len(history), size, index)
+
+    @Routing.route("/messages/<:class_name>/<:item_id>", 'GET')
+    @_metered
+    @_data_decorator
+    def get_messages(self, class_name, item_id, input):
+        """Page through the messages of an item, newest first.
+
+           Only the summary of each message is returned, with the id,
+           author and date, so even pages of very long messages stay
+           small. Messages the user may not view are left out of the
+           pages and of @total_size.
+        """
+        class_obj = _viewable_item(self, class_name, item_id)
+        prop = class_obj.getprops().get('messages')
+        if not isinstance(prop, hyperdb.Multilink):
+            raise UsageError("Class %s has no messages." % class_name)
+        uid = self.db.getuid()
+        if not self.db.security.hasPermission(
+            'View', uid, class_name, itemid=item_id, property='messages'
+        ):
+            raise Unauthorised('Permission to view %s%s.messages denied'
+                               % (class_name, item_id))
+        size, index = _page(input, MESSAGES_PAGE_SIZE,
+                            self.max_response_row_size)
+
+        check = self.db.security.hasPermission
+        # the order the item page shows them in, only the messages the
+        # user may view are paged and counted
+        msg_ids = [msg_id for msg_id in sorted(
+                       class_obj.get(item_id, 'messages'), key=int,
+                       reverse=True)
+                   if check('View', uid, prop.classname, itemid=msg_id)]
+        msg_class = self.db.getclass(prop.classname)
+        msg_props = msg_class.getprops()
+        timezone = self.db.getUserTimezone()
+        messages = []
+        for msg_id in msg_ids[(index - 1) * size:index * size]:
+            message = {"id": msg_id}
+            for name in 'author', 'date', 'summary':
+                if name not in msg_props or not check(
+                    'View', uid, prop.classname, itemid=msg_id, property=name
+                ):
+                    continue
+                value = msg_class.get(msg_id, name)
+                if name == 'author' and value:
+                    value = self.db.user.get(value, 'username')
+                elif name == 'date' and value:
+                    value = str(value.local(timezone)).replace(".", " ")
+                message[name] = value
+            messages.append(message)
+
+        return 200, _paged(self, "messages/%s/%s" % (class_name, item_id),
+                                messages, len(msg_ids), size, index)
+
+    @Routing.route("/cursor/<:class_name>", 'GET')
+    @_metered
+    @_data_decorator
+    def get_cursor_collection(self, class_name, input):
+        """Page through a collection with cursors instead of offsets.
+
+           Takes the filter, @sort, @fields, @verbose and @page_size
+           parameters of /rest/data/<class>. The next and prev links
+           carry an opaque @after or @before cursor in place of
+           @page_index.
+
+           A cursor holds the position and the id of an item, nothing
+           is kept on the server between requests. The ids of the items
+           matching the filter are listed in sort order, with the View
+           permission checks of /rest/data/<class>, and the page starts
+           next to the cursor's item, found by its id when items were
+           added or removed meanwhile. Only the items of the page are
+           formatted, so a deep page costs about the same as the first.
+        """
+        if class_name not in self.db.classes:
+            raise NotFound('Class %s not found' % class_name)
+
+        size = CURSOR_PAGE_SIZE
+        verbose = 1
+        display_props = set()
+        after = before = None
+        filters = []
+        for field in input.value:
+            if field.name == '@page_size':
+                try:
+                    size = int(field.value)
+                except ValueError:
+                    raise UsageError("@page_size must be an integer.")
+            elif field.name == '@verbose':
+                verbose = int(field.value)
+            elif field.name in ('@fields', '@attrs'):
+                names = field.value.split(',')
+                if len(names) == 1:
+                    names = field.value.split(':')
+                display_props.update(self.transitive_props(class_name, names))
+            elif field.name == '@after':
+                after = field.value
+            elif field.name == '@before':
+                before = field.value
+            elif field.name not in CURSOR_PAGE_PARAMS:
+                filters.append((field.name, field.value))
+        if size < 1 or size >= self.max_response_row_size:
+            raise UsageError("Page size %s must be between 1 and the admin "
+                             "limit on query result size: %s."
+                             % (size, self.max_response_row_size))
+
+        # get_collection without a page size lists the ids of all the
+        # matching items, up to the admin limit on the query result size
+        output = self.get_collection(class_name,
+                                     QueryInput(urlencode(filters)))
+        if 'error' in output:
+            error = output['error']
+            raise {403: Unauthorised, 404: NotFound}.get(
+                error['status'], UsageError)(error['msg'])
+        if output['data']['@total_size'] < 0:
+            # the cursors could not reach the items past the limit
+            raise UsageError("More than %s items match, the admin limit "
+                             "on query result size. Narrow the filter."
+                             % (self.max_response_row_size - 1))
+        ids = [item['id'] for item in output['data']['collection']
+               if 'id' in item]
+
+        if after is not None:
+            start = _cursor_position(after, ids) + 1
+        elif before is not None:
+            start = max(0, _cursor_position(before, ids) - size)
+        else:
+            start = 0
+        start = min(start, len(ids))
+        page = ids[start:start + size]
+
+        class_obj = self.db.getclass(class_name)
+        class_path = '%s/%s/' % (self.data_path, class_name)
+        if verbose > 1:
+            display_props.add(class_obj.labelprop())
+        collection = []
+        for item_id in page:
+            item = {'id': item_id, 'link': class_path + item_id}
+            if display_props:
+                # format_item does the permission checks
+                item.update(self.format_item(class_obj.getnode(item_id),
+                            item_id, props=display_props, verbose=verbose))
+            collection.append(item)
+
+        def link(rel, cursor):
+            params = [(field.name, field.value) for field in input.value
+                      if field.name not in ('@after', '@before')]
+            if cursor:
+                params.append(cursor)
+            return [{'rel': rel, 'uri': '%s/cursor/%s?%s' % (
+                self.base_path, class_name, urlencode(params))}]
+
+        links = {'self': link('self', start and (
+            '@after', _cursor_token(start - 1, ids[start - 1])))}
+        if start + size < len(ids):
+            links['next'] = link('next', (
+                '@after', _cursor_token(start + size - 1, page[-1])))
+        if start > 0:
+            links['prev'] = link('prev', (
+                '@before', _cursor_token(start, ids[start])
+                if start < len(ids) else _cursor_token(start, '')))
+
+        self.client.setHeader("X-Count-Total", str(len(ids)))
+        result = {"collection": collection, "@links": links,
+                  "@offset": start, "@total_size": len(ids)}
+        if '@format' in input and input['@format'].value == 'columns':
+            result = _to_columns(result)
+        return 200, result
+
+    @Routing.route("/columns/<:class_name>", 'GET')
+    @_metered
+    @_data_decorator
+    def get_columns(self, class_name, input):
+        """/rest/data/<class> with the items as columns.
+
+           Takes the same parameters. The items come back as one array
+           per field in "columns", with "@rows" items, and without the
+           link urls of the items and the linked items. That is much
+           less to send and parse for a large page.
+        """
+        output = self.get_collection(class_name, input)
+        if 'error' in output:
+            error = output['error']
+            raise {403: Unauthorised, 404: NotFound}.get(
+                error['status'], UsageError)(error['msg'])
+
+        data = _to_columns(output['data'])
+        for links in data.get('@links', {}).values():
+            for link in links:
+                link['uri'] = link['uri'].replace(
+                    '%s/%s?' % (self.data_path, class_name),
+                    '%s/columns/%s?' % (self.base_path, class_name), 1)
+        return 200, data
+
+    @Routing.route("/timings", 'POST')
+    @_metered
+    @_data_decorator
+    def post_timings(self, input):
+        """Collect the timings measured by classhelper.js when its
+           CLASSHELPER_SEND_TIMINGS is on.
+
+           The body is {"timings": ["openPopUp:fetch=12.5", ...]}, the
+           durations in milliseconds. They are added to a histogram per
+           name, kept in the memory of this process.
+        """
+        if 'timings' not in input:
+            raise UsageError("Missing the list of timings.")
+        timings = input['timings'].value
+        if not isinstance(timings, list):
+            timings = [timings]
+        if len(timings) > TIMINGS_MAX_ENTRIES:
+            raise UsageError("At most %s timings can be sent, got %s."
+                             % (TIMINGS_MAX_ENTRIES, len(timings)))
+
+        parsed = []
+        for timing in timings:
+            match = TIMING_RE.match(timing)
+            if match is None:
+                raise UsageError("Invalid timing %s." % timing)
+            duration = float(match.group(2))
+            if duration <= TIMINGS_MAX_DURATION:
+                parsed.append((match.group(1), duration))
+
+        accepted = 0
+        for name, duration in parsed:
+            if name not in _timings:
+                # names come from the browser, do not let them grow
+                # without bound
+                if len(_timings) >= TIMINGS_MAX_NAMES:
+                    continue
+                _timings[name] = Histogram()
+            _timings[name].add(duration)
+            accepted += 1
+
+        return 200, {"accepted": accepted}
+
+    @Routing.route("/timings", 'GET')
+    @_metered
+    @_data_decorator
+    def get_timings(self, input):
+        """The histograms of the classhelper timings with their p50,
+           p95 and p99, by "<operation>:<phase>" name. Admins only.
+
+           @reset=1 empties them after they are returned.
+        """
+        _require_admin(self)
+        result = dict((name, histogram.as_dict())
+                      for name, histogram in sorted(_timings.items()))
+        if '@reset' in input and input['@reset'].value == '1':
+            _timings.clear()
+        return 200, {"timings": result}
+
+    @Routing.route("/metrics", 'GET')
+    @_data_decorator
+    def get_metrics(self, input):
+        """The number of requests and errors of every route of this file,
+           with histograms of their wall time and db time in milliseconds
+           and of their response size in bytes. Admins only.
+
+           Kept in the memory of this process since it started or since
+           @reset=1, which empties them after they are returned. Also
+           lists the profiles of /rest/metrics/profile/<route>.
+        """
+        _require_admin(self)
+        routes = {}
+        for name, metrics in sorted(_route_metrics.items()):
+            routes[name] = {
+                "requests": metrics["wall"].count,
+                "errors": metrics["errors"],
+                "wall": metrics["wall"].as_dict(),
+                "db": metrics["db"].as_dict(),
+                "size": metrics["size"].as_dict(),
+            }
+        profiles = dict((name, {"remaining": profile['remaining'],
+                                "profiled": profile['profiled']})
+                        for name, profile in sorted(_route_profiles.items()))
+        if '@reset' in input and input['@reset'].value == '1':
+            _route_metrics.clear()
+        return 200, {"routes": routes, "profiles": profiles}
+
+    @Routing.route("/metrics/profile/<:route>", 'POST')
+    @_data_decorator
+    def post_metrics_profile(self, route, input):
+        """Run the next requests of the route function route (e.g.
+           get_roles) under cProfile. Admins only.
+
+           The body is {"requests": 20}. A profile already running for
+           the route is dropped. Its stats are summed up at
+           GET /rest/metrics/profile/<route>.
+        """
+        _require_admin(self)
+        if route not in _metered_routes:
+            raise NotFound('Route %s not found' % route)
+        try:
+            requests = int(input['requests'].value)
+        except (KeyError, ValueError):
+            raise UsageError("requests must be the number of requests "
+                             "to profile.")
+        if not 0 < requests <= PROFILE_MAX_REQUESTS:
+            raise UsageError("requests must be between 1 and %s."
+                             % PROFILE_MAX_REQUESTS)
+
+        _route_profiles[route] = {"remaining": requests, "profiled": 0,
+                                  "stats": None}
+        return 200, {"route": route, "remaining": requests}
+
+    @Routing.route("/metrics/profile/<:route>", 'GET')
+    @_data_decorator
+    def get_metrics_profile(self, route, input):
+        """The cProfile stats of the requests of route profiled so far,
+           summed up. Admins only.
+
+           The @limit (default PROFILE_STATS_LIMIT) functions taking the
+           most time are listed, @sort=cumtime (default) or tottime.
+           Times are in milliseconds.
+        """
+        _require_admin(self)
+        profile = _route_profiles.get(route)
+        if profile is None:
+            raise NotFound('No profile of %s' % route)
+        sort = input['@sort'].value if '@sort' in input else 'cumtime'
+        if sort not in ('cumtime', 'tottime'):
+            raise UsageError("@sort must be cumtime or tottime.")
+        try:
+            limit = int(input['@limit'].value) if '@limit' in input \
+                else PROFILE_STATS_LIMIT
+        except ValueError:
+            raise UsageError("@limit must be an integer.")
+
+        stats = profile['stats']
+        return 200, {
+            "route": route,
+            "remaining": profile['remaining'],
+            "profiled": profile['profiled'],
+            "total_time": round(stats.total_tt * 1000, 3) if stats else 0,
+            "functions": _profile_stats(stats, sort, limit) if stats else [],
+        }
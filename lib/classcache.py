@@ -0,0 +1,124 @@
+''' Cache of the option lists page.html renders for whole classes.
+
+    The search_select and search_checkboxes macros walk every item of a
+    class on each page render. The rendered HTML of the items is kept
+    here, keyed by the class, the permissions of the user and a change
+    counter of the class.
+
+    detectors/classcache.py bumps the counter of a class when one of its
+    items is created, changed, retired or restored. The counters are
+    small files in the database directory, so every process of a
+    multi-process server sees the changes of the others.
+
+    This module lives in lib/ because the tracker re-executes detectors
+    and extensions, but imports a module from lib/ only once per process.
+'''
+
+import os
+
+from roundup.anypy.html import html_escape
+from roundup.cgi.templating import HTMLClass
+
+COUNTER_DIR = 'classcounters'
+
+# Most rendered lists kept, the oldest one is dropped beyond that
+CACHE_MAX_ENTRIES = 200
+
+# (kind, classname, label property, name, language, permission key) ->
+# (counter, items). Each item is (itemid, start, end), the HTML of the
+# item is start + end, or start + the selected attribute + end.
+_fragments = {}
+
+
+def counter_path(database, classname):
+    return os.path.join(database, COUNTER_DIR, classname)
+
+
+def get_counter(database, classname):
+    ''' The current counter of classname, 0 if it never changed.
+    '''
+    try:
+        with open(counter_path(database, classname)) as f:
+            return int(f.read() or 0)
+    except (IOError, OSError, ValueError):
+        return 0
+
+
+def bump_counter(database, classname):
+    ''' Move the counter of classname on. The new value is written to a
+        temporary file that replaces the old one, so readers never see
+        a half written counter.
+    '''
+    path = counter_path(database, classname)
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    temp = '%s.%s' % (path, os.getpid())
+    with open(temp, 'w') as f:
+        f.write(str(get_counter(database, classname) + 1))
+    os.replace(temp, path)
+
+
+def permission_key(db, userid, classname):
+    ''' What decides which items of classname the user may see: the
+        roles, and the user itself when a View permission of the class
+        has a check function that may look at the user.
+    '''
+    roles = tuple(sorted(db.user.get_roles(userid)))
+    for perm in db.security.permission.get('View', []):
+        if perm.klass == classname and perm.check:
+            return roles + (userid,)
+    return roles
+
+
+def render_items(client, kind, classname, label, name):
+    ''' Render the items of classname the way the page.html macro of
+        kind does. Only done on a cache miss.
+    '''
+    items = []
+    for item in HTMLClass(client, classname).list():
+        text = str(item[label])
+        if kind == 'translated':
+            text = client._(text)
+        text = html_escape(text)
+        if kind == 'checkbox':
+            id = html_escape('%s-%s' % (name, item.id), True)
+            items.append((item.id,
+                          '<li>\n  <input type="checkbox" name="%s" id="%s"'
+                          ' value="%s"' % (html_escape(name, True), id,
+                                           item.id),
+                          ' />\n  <label for="%s">%s</label>\n </li>'
+                          % (id, text)))
+        else:
+            items.append((item.id, '<option value="%s"' % item.id,
+                          '>%s</option>' % text))
+    return items
+
+
+def cached_items(client, kind, classname, label, name=''):
+    db = client.db
+    key = (kind, classname, label, name,
+           getattr(client, 'language', '') if kind == 'translated' else '',
+           permission_key(db, client.userid, classname))
+    counter = get_counter(db.config.DATABASE, classname)
+
+    cached = _fragments.get(key)
+    if cached is not None and cached[0] == counter:
+        return cached[1]
+
+    items = render_items(client, kind, classname, label, name)
+    _fragments.pop(key, None)
+    while len(_fragments) >= CACHE_MAX_ENTRIES:
+        del _fragments[next(iter(_fragments))]
+    _fragments[key] = (counter, items)
+    return items
+
+
+def render(client, kind, classname, label, selected, name=''):
+    ''' HTML of the items, with the ids in selected marked.
+    '''
+    attribute = (' checked="checked"' if kind == 'checkbox'
+                 else ' selected="selected"')
+    return '\n'.join(start + (attribute if itemid in selected else '') + end
+                     for itemid, start, end in
+                     cached_items(client, kind, classname, label, name))
@@ -0,0 +1,227 @@
+''' Timings of the auditors and reactors of the tracker.
+
+    detectors/detectortimings.py wraps every auditor and reactor in a
+    timer when it is switched on in detectors/config.ini. The calls of a
+    transaction are logged to roundup.detectortimings when it commits,
+    and added to the totals of the process. The totals are saved to a
+    small file per process in the database directory, so
+    scripts/detector_timings.py can report them for all the processes
+    of a server.
+
+    This module lives in lib/ because the tracker re-executes detectors
+    on every db open, but imports a module from lib/ only once per
+    process.
+'''
+
+import json
+import logging
+import os
+import time
+
+from roundup.support import PrioList
+
+TIMINGS_DIR = 'detectortimings'
+
+# Slowest calls of a detector kept with their newvalues keys
+SLOWEST_CALLS = 5
+
+logger = logging.getLogger('roundup.detectortimings')
+
+# (kind, classname, event, detector name) -> DetectorStats of this
+# process since it started
+_totals = {}
+
+
+class DetectorStats:
+    ''' Calls of one detector, times in milliseconds.
+    '''
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        # [milliseconds, nodeid, sorted newvalues keys], slowest first
+        self.slowest = []
+
+    def add(self, duration, nodeid, keys):
+        self.calls += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.keep_slowest([[duration, nodeid, keys]])
+
+    def keep_slowest(self, calls):
+        self.slowest = sorted(self.slowest + calls, key=lambda call: call[0],
+                              reverse=True)[:SLOWEST_CALLS]
+
+    def merge(self, other):
+        self.calls += other.calls
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.keep_slowest(other.slowest)
+
+    def as_dict(self):
+        return {"calls": self.calls, "total": self.total, "max": self.max,
+                "slowest": self.slowest}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.calls = data["calls"]
+        stats.total = data["total"]
+        stats.max = data["max"]
+        stats.slowest = data["slowest"]
+        return stats
+
+
+def timings_path(database, pid):
+    return os.path.join(database, TIMINGS_DIR, '%s.json' % pid)
+
+
+def save_totals(database):
+    ''' Write the totals of this process, replacing its file so readers
+        never see a half written one.
+    '''
+    path = timings_path(database, os.getpid())
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    temp = path + '.tmp'
+    with open(temp, 'w') as f:
+        json.dump([list(key) + [stats.as_dict()]
+                   for key, stats in _totals.items()], f)
+    os.replace(temp, path)
+
+
+def load_totals(database):
+    ''' The totals of all the processes that saved theirs.
+    '''
+    totals = {}
+    directory = os.path.join(database, TIMINGS_DIR)
+    if not os.path.isdir(directory):
+        return totals
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            continue
+        for entry in entries:
+            key, stats = tuple(entry[:4]), DetectorStats.from_dict(entry[4])
+            if key in totals:
+                totals[key].merge(stats)
+            else:
+                totals[key] = stats
+    return totals
+
+
+def reset_totals(database):
+    ''' Remove the saved totals. A running process keeps its own and
+        saves them again on its next transaction.
+    '''
+    directory = os.path.join(database, TIMINGS_DIR)
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            os.remove(os.path.join(directory, name))
+
+
+def report_lines(stats, sort='total'):
+    ''' One line per detector, the one taking the most time first.
+        sort is "total", "max" or "calls".
+    '''
+    lines = ['%8s %10s %10s %10s  %s' % ('calls', 'total ms', 'max ms',
+                                         'mean ms', 'detector')]
+    for key, entry in sorted(stats.items(),
+                             key=lambda item: getattr(item[1], sort),
+                             reverse=True):
+        lines.append('%8d %10.2f %10.2f %10.2f  %s %s.%s %s' % (
+            entry.calls, entry.total, entry.max, entry.total / entry.calls,
+            key[0], key[1], key[2], key[3]))
+        for duration, nodeid, keys in entry.slowest:
+            lines.append('%41.2f    %s%s: %s' % (
+                duration, key[1], nodeid or '', ', '.join(keys) or '-'))
+    return lines
+
+
+def end_transaction(database, stats):
+    ''' Run by the commit: log the calls of the transaction and add them
+        to the totals.
+    '''
+    for line in report_lines(stats):
+        logger.info(line)
+    for key, entry in stats.items():
+        if key in _totals:
+            _totals[key].merge(entry)
+        else:
+            _totals[key] = entry
+    try:
+        save_totals(database)
+    except (IOError, OSError) as error:
+        logger.warning('Can not save the detector timings: %s', error)
+
+
+def record(db, key, duration, nodeid, values):
+    ''' Add a call to the stats of the transaction of db, queuing
+        end_transaction on the first one.
+    '''
+    # commit and rollback both start a new transactions list, so the
+    # stats are remembered together with that list
+    transaction = getattr(db, 'detectortimings', None)
+    if transaction is None or transaction[0] is not db.transactions:
+        transaction = db.detectortimings = (db.transactions, {})
+        db.transactions.append((end_transaction,
+                                (db.config.DATABASE, transaction[1])))
+    stats = transaction[1].get(key)
+    if stats is None:
+        stats = transaction[1][key] = DetectorStats()
+    # reactors of a retire or restore get no values
+    stats.add(duration, nodeid, sorted(values) if values else [])
+
+
+def timed(key, detector):
+    ''' detector wrapped to record its calls under key. The time of a
+        detector includes the detectors its own changes fire.
+    '''
+    def timed_detector(db, cl, nodeid, values):
+        start = time.perf_counter()
+        try:
+            return detector(db, cl, nodeid, values)
+        finally:
+            record(db, key, (time.perf_counter() - start) * 1000, nodeid,
+                   values)
+    timed_detector.__name__ = key[3]
+    return timed_detector
+
+
+class TimedPrioList(PrioList):
+    ''' The auditors or reactors of an event of a class, the ones
+        registered later are timed too.
+    '''
+    def __init__(self, detectors, kind, classname, event):
+        PrioList.__init__(self, key=detectors.key)
+        self.kind = kind
+        self.classname = classname
+        self.event = event
+        for item in detectors.list:
+            self.append(item)
+
+    def append(self, item):
+        priority, name, detector = item
+        key = (self.kind, self.classname, self.event, name)
+        PrioList.append(self, (priority, name, timed(key, detector)))
+
+
+def instrument(db):
+    ''' Time every auditor and reactor of db, the ones already registered
+        and the ones detectors register after this.
+    '''
+    for classname in db.getclasses():
+        cl = db.getclass(classname)
+        for kind, lists in (('auditor', cl.auditors),
+                            ('reactor', cl.reactors)):
+            for event, detectors in list(lists.items()):
+                if not isinstance(detectors, TimedPrioList):
+                    lists[event] = TimedPrioList(detectors, kind,
+                                                 classname, event)
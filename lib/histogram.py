@@ -0,0 +1,81 @@
+''' Latency histograms with logarithmic buckets.
+
+    A histogram only keeps a count per bucket, so it stays small however
+    many values are added. A percentile is the upper bound of the bucket
+    it falls in, which is at most BUCKET_GROWTH times the exact value.
+
+    Values are durations in milliseconds, or any other positive
+    amount like the response sizes in bytes of /rest/metrics.
+
+    This module lives in lib/ so the histograms of interfaces.py stay
+    in one place for the life of the process.
+'''
+
+import math
+
+# Upper bound of the first bucket, smaller values are counted there
+BUCKET_START = 0.01
+
+# Every bucket is this much wider than the one before, about 9%
+BUCKET_GROWTH = 2 ** 0.125
+
+PERCENTILES = (50, 95, 99)
+
+
+def bucket_bound(index):
+    ''' The upper bound of bucket index.
+    '''
+    return BUCKET_START * BUCKET_GROWTH ** index
+
+
+class Histogram:
+    ''' Count of values by bucket.
+    '''
+    def __init__(self):
+        # bucket index -> count
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        if value <= BUCKET_START:
+            index = 0
+        else:
+            index = int(math.ceil(math.log(value / BUCKET_START,
+                                           BUCKET_GROWTH)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        ''' The value percent of the values are at or below, None
+            when there are none.
+        '''
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(self.count * percent / 100.0)))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(bucket_bound(index), self.max)
+
+    def as_dict(self):
+        ''' Summary for a json response, the buckets are [upper bound,
+            count] pairs of the buckets that have a count.
+        '''
+        result = {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count
+            else None,
+            "max": round(self.max, 3),
+            "buckets": [[round(bucket_bound(index), 3), self.buckets[index]]
+                        for index in sorted(self.buckets)],
+        }
+        for percent in PERCENTILES:
+            value = self.percentile(percent)
+            result["p%s" % percent] = None if value is None \
+                else round(value, 3)
+        return result
@@ -0,0 +1,55 @@
+''' Run GET requests through the rest routes from within the tracker.
+
+    Used by the /rest/batch route of interfaces.py for its sub-requests
+    and by extensions/classhelper.py to embed responses in a page.
+
+    This module lives in lib/ so both can import it, interfaces.py is
+    executed by the tracker and can not be imported.
+'''
+
+from roundup.anypy.urllib_ import parse_qs, urlparse
+from roundup.cgi.exceptions import NotFound
+from roundup.exceptions import Reject
+from roundup.rest import Routing
+
+
+class QueryInput:
+    """Query string of a request, emulating the parts of the
+       FieldStorage interface the rest routes use:
+       input.value, input['name'].value and 'name' in input.
+    """
+    class FsValue:
+        def __init__(self, name, value):
+            self.name = name
+            self.value = value
+
+    def __init__(self, query):
+        self.value = [self.FsValue(name, value)
+                      for name, values in parse_qs(
+                          query, keep_blank_values=True).items()
+                      for value in values]
+
+    def __getitem__(self, name):
+        for field in self.value:
+            if field.name == name:
+                return field
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return any(field.name == name for field in self.value)
+
+
+def execute_get(rest, uri):
+    """Run the GET request uri, relative to the tracker (eg.
+       "rest/data/user?@fields=username"), as the user of the
+       RestfulInstance rest. Returns the status and the output.
+    """
+    parts = urlparse(uri)
+    try:
+        output = Routing.execute(rest, parts.path.strip('/'), 'GET',
+                                 QueryInput(parts.query))
+    except NotFound as msg:
+        output = rest.error_obj(404, msg)
+    except Reject as msg:
+        output = rest.error_obj(405, msg.args[0])
+    return rest.client.response_code, output
@@ -0,0 +1,29 @@
+''' The payload of the /rest/roles route of interfaces.py.
+
+    The roles are defined in the schema, so the payload and the hash of
+    the role names are built once and stay the same for the life of the
+    tracker instance.
+
+    This module lives in lib/ so interfaces.py and extensions/classhelper.py
+    can both import it. The extension embeds the payload in a page without
+    running the route, whose ETag handling is only for a real request.
+'''
+
+import hashlib
+
+# /rest/roles payload and the hash of the role names, keyed by the role
+# names
+_roles_cache = {}
+
+
+def roles_payload(db):
+    ''' (payload, hash of the role names) of the roles of db. The
+        payload is shared, copy it before changing it.
+    '''
+    roles = tuple(db.security.role.keys())
+    if roles not in _roles_cache:
+        payload = {"collection": [{"id": rolename, "name": rolename}
+                                  for rolename in roles]}
+        digest = hashlib.sha1('\0'.join(roles).encode('utf-8')).hexdigest()
+        _roles_cache[roles] = (payload, digest)
+    return _roles_cache[roles]
@@ -0,0 +1,77 @@
+''' The useraddress index of the email addresses of the users.
+
+    The index has one useraddress item per lowercased address, linking
+    to the user that has it. detectors/userauditor.py checks that an
+    address is unique with a key lookup in it, and its reactors keep it
+    up to date when users are created, changed, retired or restored.
+
+    A tracker created before the index existed has to fill it once with
+    scripts/build_address_index.py.
+
+    This module lives in lib/ so the detector and the script can both
+    import it.
+'''
+
+
+def normalize_address(address):
+    return address.strip().lower()
+
+
+def user_addresses(address, alternate_addresses):
+    ''' the set of normalized addresses of a user
+    '''
+    addresses = [address] + (alternate_addresses or '').split('\n')
+    return set(normalize_address(a) for a in addresses if a and a.strip())
+
+
+def address_owner(db, address):
+    ''' id of the user that has address in the useraddress index, None
+        if nobody has it. The address is the key of the index, so this
+        is a single lookup instead of a search through all users.
+    '''
+    try:
+        entry = db.useraddress.lookup(normalize_address(address))
+    except KeyError:
+        return None
+    return db.useraddress.get(entry, 'user')
+
+
+def update_address_index(db, userid, old, new):
+    ''' move the index entries of userid from the old to the new set
+        of normalized addresses. Returns the new addresses another user
+        already has, they are left to that user.
+    '''
+    for address in old - new:
+        try:
+            entry = db.useraddress.lookup(address)
+        except KeyError:
+            continue
+        if db.useraddress.get(entry, 'user') == userid:
+            db.useraddress.destroy(entry)
+    taken = []
+    for address in sorted(new - old):
+        try:
+            entry = db.useraddress.lookup(address)
+        except KeyError:
+            db.useraddress.create(address=address, user=userid)
+            continue
+        if db.useraddress.get(entry, 'user') != userid:
+            taken.append(address)
+    return taken
+
+
+def build_address_index(db):
+    ''' Fill the index from scratch with the addresses of all users
+        that are not retired. Returns (address, userid) for each
+        address a user shares with a user of a lower id, only the
+        first user gets it in the index.
+    '''
+    for entry in db.useraddress.getnodeids(retired=None):
+        db.useraddress.destroy(entry)
+    shared = []
+    for userid in sorted(db.user.list(), key=int):
+        for address in update_address_index(db, userid, set(), user_addresses(
+                db.user.get(userid, 'address'),
+                db.user.get(userid, 'alternate_addresses'))):
+            shared.append((address, userid))
+    return shared
@@ -50,6 +50,13 @@ user.setkey("username")
 db.security.addPermission(name='Register', klass='user',
                           description='User is allowed to register new user')
 
+# Lowercased email addresses of the users, used by detectors/userauditor.py
+# to check that an address is unique. Its reactors keep it up to date.
+useraddress = Class(db, "useraddress",
+                address=String(),
+                user=Link('user'))
+useraddress.setkey("address")
+
 # FileClass automatically gets this property in addition to the Class ones:
 #   content = String()    [saved to disk in <tracker home>/db/files/]
 #   type = String()       [MIME type of the content, default 'text/plain']
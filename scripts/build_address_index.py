@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Fill the useraddress index of a tracker from its users.
+
+detectors/userauditor.py checks that email addresses are unique against
+the useraddress class, and its reactors keep the class up to date. A
+tracker created before the class existed has to fill it once:
+
+    python3 scripts/build_address_index.py -i TRACKER_HOME
+
+Running it again rebuilds the index from scratch. Addresses that users
+shared before the index existed are listed, only the user with the
+lowest id keeps them in the index.
+"""
+
+import argparse
+import os
+import sys
+
+from roundup import instance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-i', dest='tracker_home',
+                        default=os.environ.get('TRACKER_HOME'),
+                        help='tracker home, like roundup-admin -i '
+                        '(default: $TRACKER_HOME)')
+    args = parser.parse_args()
+    if not args.tracker_home:
+        parser.error('no tracker home, use -i or set TRACKER_HOME')
+
+    sys.path.insert(0, os.path.join(args.tracker_home, 'lib'))
+    import useraddress
+
+    db = instance.open(args.tracker_home).open('admin')
+    try:
+        shared = useraddress.build_address_index(db)
+        db.commit()
+        count = len(db.useraddress.list())
+    finally:
+        db.close()
+
+    print('%d addresses indexed' % count)
+    for address, userid in shared:
+        print('%s of user%s is already used by another user'
+              % (address, userid))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Report the auditor and reactor timings of a tracker.
+
+The timings are collected by detectors/detectortimings.py when it is
+switched on in detectors/config.ini. Every server process saves its
+totals in the database directory, this adds them up:
+
+    python3 scripts/detector_timings.py -i TRACKER_HOME [report] [--sort max]
+    python3 scripts/detector_timings.py -i TRACKER_HOME reset
+
+Times are in milliseconds. Under each detector its slowest calls are
+listed with the item and the newvalues keys it got.
+"""
+
+import argparse
+import os
+import sys
+
+from roundup.configuration import CoreConfig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-i', dest='tracker_home',
+                        default=os.environ.get('TRACKER_HOME'),
+                        help='tracker home, like roundup-admin -i '
+                        '(default: $TRACKER_HOME)')
+    parser.add_argument('command', nargs='?', default='report',
+                        choices=['report', 'reset'])
+    parser.add_argument('--sort', default='total',
+                        choices=['total', 'max', 'calls'],
+                        help='order of the detectors')
+    args = parser.parse_args()
+    if not args.tracker_home:
+        parser.error('no tracker home, use -i or set TRACKER_HOME')
+
+    sys.path.insert(0, os.path.join(args.tracker_home, 'lib'))
+    import detectortimings
+
+    database = CoreConfig(args.tracker_home).DATABASE
+    if args.command == 'reset':
+        detectortimings.reset_totals(database)
+        return
+
+    totals = detectortimings.load_totals(database)
+    if not totals:
+        raise SystemExit('No timings, is [detectortimings] enabled in '
+                         'detectors/config.ini?')
+    print('\n'.join(detectortimings.report_lines(totals, args.sort)))
+
+
+if __name__ == '__main__':
+    main()
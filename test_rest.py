@@ -0,0 +1,219 @@
+import base64
+import json
+import time
+import unittest
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+TRACKER_URL = "http://localhost:8080/demo/"
+CREDENTIALS = "admin:admin"
+# the user with the User role roundup-demo creates
+USER_CREDENTIALS = "demo:demo"
+
+
+def rest_get(path, headers=None, credentials=CREDENTIALS):
+    """GET path of the rest api as admin, returns the status, the
+       headers and the body of the response. With credentials None the
+       request is anonymous.
+    """
+    return rest_request("GET", path, headers=headers,
+                        credentials=credentials)
+
+
+def rest_send(method, path, data, headers=None):
+    """Send data as json to path of the rest api as admin, with the
+       headers the csrf checks of the tracker ask for.
+    """
+    headers = dict(headers or {})
+    headers.update({
+        "Content-Type": "application/json",
+        "Origin": TRACKER_URL.split("/demo/")[0],
+        "Referer": TRACKER_URL,
+        "X-Requested-With": "rest",
+    })
+    return rest_request(method, path, json.dumps(data).encode("utf-8"),
+                        headers)
+
+
+def rest_request(method, path, body=None, headers=None,
+                 credentials=CREDENTIALS):
+    request = Request(TRACKER_URL + path, data=body, method=method,
+                      headers=dict(headers or {}))
+    if credentials:
+        request.add_header("Authorization", "Basic " + base64.b64encode(
+            credentials.encode("ascii")).decode("ascii"))
+    try:
+        with urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as error:
+        # urllib raises for everything but a 2xx, a 304 included
+        with error:
+            return error.code, error.headers, error.read()
+
+
+class TestRoles(unittest.TestCase):
+
+    def test_etag(self):
+        status, headers, body = rest_get("rest/roles")
+        self.assertEqual(status, 200)
+        self.assertIn("max-age", headers["Cache-Control"])
+        names = [role["name"] for role in
+                 json.loads(body)["data"]["collection"]]
+        self.assertIn("admin", [name.lower() for name in names])
+        self.assertTrue(headers["ETag"])
+
+    def test_if_none_match(self):
+        etag = rest_get("rest/roles")[1]["ETag"]
+
+        status, headers, body = rest_get(
+            "rest/roles", {"If-None-Match": etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(headers["ETag"], etag)
+
+        # weak comparison, and one of a list of tags
+        status, _headers, body = rest_get(
+            "rest/roles", {"If-None-Match": '"other", W/' + etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
+    def test_if_none_match_stale(self):
+        status, _headers, body = rest_get(
+            "rest/roles", {"If-None-Match": '"stale"'})
+        self.assertEqual(status, 200)
+        self.assertIn("collection", json.loads(body)["data"])
+
+    def test_if_none_match_other_format(self):
+        etag = rest_get("rest/roles")[1]["ETag"]
+
+        # the compact output is a different representation
+        status, headers, body = rest_get(
+            "rest/roles?@pretty=false", {"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+        self.assertIn("collection", json.loads(body)["data"])
+
+    def test_next_request_after_not_modified(self):
+        # a 304 must not change how later requests are handled
+        etag = rest_get("rest/roles")[1]["ETag"]
+        self.assertEqual(
+            rest_get("rest/roles", {"If-None-Match": etag})[0], 304)
+        status, _headers, body = rest_get("rest/data/status?@verbose=2")
+        self.assertEqual(status, 200)
+        self.assertTrue(json.loads(body)["data"]["collection"])
+
+
+def create(class_name, **props):
+    status, _headers, body = rest_send("POST", "rest/data/" + class_name,
+                                       props)
+    assert status == 201, body
+    return json.loads(body)["data"]["id"]
+
+
+def unique(name):
+    return "%s%d" % (name, time.time() * 1000000)
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        # a user with a journal entry that changes every property
+        name = unique("journal")
+        self.userid = create("user", username=name, password="secret",
+                             address=name + "@example.com",
+                             alternate_addresses=name + "@example.org",
+                             phone="123", realname="Journal User")
+        path = "rest/data/user/" + self.userid
+        etag = rest_get(path)[1]["ETag"]
+        status, _headers, body = rest_send("PUT", path, {
+            "password": "changed",
+            "address": "new-" + name + "@example.com",
+            "alternate_addresses": "new-" + name + "@example.org",
+            "phone": "456",
+            "realname": "Journal User Renamed",
+        }, {"If-Match": etag})
+        self.assertEqual(status, 200, body)
+
+    def journal(self, credentials):
+        status, _headers, body = rest_get(
+            "rest/journal/user/" + self.userid, credentials=credentials)
+        self.assertEqual(status, 200, body)
+        return json.loads(body)["data"]
+
+    def changed(self, journal):
+        return set(name for entry in journal["collection"]
+                   if entry["action"] == "set"
+                   for name in entry["args"])
+
+    def test_admin(self):
+        journal = self.journal(CREDENTIALS)
+        self.assertTrue({"address", "alternate_addresses", "password",
+                         "phone", "realname"} <= self.changed(journal))
+        self.assertEqual(journal["@total_size"], len(journal["collection"]))
+
+    def test_other_user(self):
+        # only the properties /rest/data shows to the user
+        status, _headers, body = rest_get(
+            "rest/data/user/" + self.userid, credentials=USER_CREDENTIALS)
+        self.assertEqual(status, 200, body)
+        viewable = set(json.loads(body)["data"]["attributes"])
+
+        journal = self.journal(USER_CREDENTIALS)
+        changed = self.changed(journal)
+        self.assertTrue(changed)
+        self.assertTrue(changed <= viewable, changed - viewable)
+        for name in "address", "alternate_addresses", "password":
+            self.assertNotIn(name, changed)
+        for entry in journal["collection"]:
+            self.assertTrue(entry["args"] or entry["action"] != "set")
+        # left out entries are not counted either
+        self.assertEqual(journal["@total_size"], len(journal["collection"]))
+
+    def test_anonymous(self):
+        status = rest_get("rest/journal/user/" + self.userid,
+                          credentials=None)[0]
+        self.assertEqual(status, 403)
+
+
+class TestMessages(unittest.TestCase):
+
+    def setUp(self):
+        self.msgids = [create("msg", content="message %s" % n,
+                              author="admin") for n in range(3)]
+        self.issueid = create("issue", title=unique("messages"),
+                              messages=self.msgids)
+
+    def test_user(self):
+        status, _headers, body = rest_get(
+            "rest/messages/issue/%s?@page_size=2" % self.issueid,
+            credentials=USER_CREDENTIALS)
+        self.assertEqual(status, 200, body)
+        data = json.loads(body)["data"]
+        self.assertEqual(data["@total_size"], 3)
+        self.assertEqual([message["id"] for message in data["collection"]],
+                         self.msgids[:0:-1])
+        self.assertEqual(data["collection"][0]["summary"], "message 2")
+        self.assertEqual(data["collection"][0]["author"], "admin")
+        self.assertIn("next", data["@links"])
+
+        status, _headers, body = rest_get(
+            "rest/messages/issue/%s?@page_size=2&@page_index=2"
+            % self.issueid, credentials=USER_CREDENTIALS)
+        data = json.loads(body)["data"]
+        self.assertEqual([message["id"] for message in data["collection"]],
+                         self.msgids[:1])
+        self.assertNotIn("@links", data)
+
+    def test_anonymous(self):
+        status = rest_get("rest/messages/issue/" + self.issueid,
+                          credentials=None)[0]
+        self.assertEqual(status, 403)
+
+    def test_no_messages(self):
+        status = rest_get("rest/messages/user/1",
+                          credentials=USER_CREDENTIALS)[0]
+        self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
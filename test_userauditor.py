@@ -0,0 +1,127 @@
+import os
+import sys
+import unittest
+
+from roundup import instance
+
+# The tracker files of this repository are copied into the demo tracker,
+# see Development Setup in README.md, so by default this is the tracker.
+TRACKER_HOME = os.environ.get("TRACKER_HOME",
+                              os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestAddressIndex(unittest.TestCase):
+    """The useraddress index kept by detectors/userauditor.py. Nothing
+       is committed, every test rolls its changes back.
+    """
+
+    def setUp(self):
+        sys.path.insert(0, os.path.join(TRACKER_HOME, "lib"))
+        import useraddress
+        self.useraddress = useraddress
+        self.db = instance.open(TRACKER_HOME).open("admin")
+
+    def tearDown(self):
+        self.db.rollback()
+        self.db.close()
+        sys.path.remove(os.path.join(TRACKER_HOME, "lib"))
+
+    def create_user(self, username, **props):
+        return self.db.user.create(username=username, roles="User", **props)
+
+    def indexed(self, userid):
+        return sorted(self.db.useraddress.get(entry, "address")
+                      for entry in self.db.useraddress.filter(
+                          None, {"user": userid}))
+
+    def owner(self, address):
+        return self.useraddress.address_owner(self.db, address)
+
+    def test_create(self):
+        userid = self.create_user("addr-create", address="Create@Example.com",
+                                  alternate_addresses="other@example.com")
+        self.assertEqual(self.indexed(userid),
+                         ["create@example.com", "other@example.com"])
+        self.assertEqual(self.owner("CREATE@example.com"), userid)
+
+    def test_duplicate(self):
+        self.create_user("addr-dup1", address="dup@example.com")
+        with self.assertRaises(ValueError):
+            self.create_user("addr-dup2", address="dup@example.com")
+
+    def test_duplicate_case(self):
+        self.create_user("addr-case1", address="case@example.com")
+        with self.assertRaises(ValueError):
+            self.create_user("addr-case2", address="Case@Example.COM")
+        with self.assertRaises(ValueError):
+            self.create_user("addr-case3", address="third@example.com",
+                             alternate_addresses=" CASE@example.com ")
+
+    def test_substring_is_no_duplicate(self):
+        self.create_user("addr-sub1", address="longer.sub@example.com")
+        self.create_user("addr-sub2", address="sub@example.com")
+
+    def test_change_case_of_own_address(self):
+        userid = self.create_user("addr-own", address="own@example.com")
+        self.db.user.set(userid, address="OWN@example.com")
+        self.assertEqual(self.indexed(userid), ["own@example.com"])
+
+    def test_rename(self):
+        userid = self.create_user("addr-old", address="old@example.com")
+        self.db.user.set(userid, address="new@example.com")
+        self.assertEqual(self.indexed(userid), ["new@example.com"])
+        self.assertIsNone(self.owner("old@example.com"))
+
+        # the old address is free for others now
+        self.create_user("addr-taker", address="old@example.com")
+        with self.assertRaises(ValueError):
+            self.create_user("addr-other", address="new@example.com")
+
+    def test_alternate_addresses(self):
+        userid = self.create_user("addr-alt", address="alt@example.com",
+                                  alternate_addresses="a1@example.com")
+        other = self.create_user("addr-alt2", address="alt2@example.com")
+
+        with self.assertRaises(ValueError):
+            self.db.user.set(other, alternate_addresses="A1@example.com")
+        with self.assertRaises(ValueError):
+            self.db.user.set(other, address="a1@example.com")
+
+        self.db.user.set(userid, alternate_addresses="a2@example.com\n"
+                         "a3@example.com")
+        self.assertEqual(self.indexed(userid), [
+            "a2@example.com", "a3@example.com", "alt@example.com"])
+        self.db.user.set(other, alternate_addresses="a1@example.com")
+        self.assertEqual(self.owner("a1@example.com"), other)
+
+    def test_retire_and_restore(self):
+        userid = self.create_user("addr-retire", address="retire@example.com",
+                                  alternate_addresses="r1@example.com")
+        self.db.user.retire(userid)
+        self.assertEqual(self.indexed(userid), [])
+
+        self.db.user.restore(userid)
+        self.assertEqual(self.indexed(userid),
+                         ["r1@example.com", "retire@example.com"])
+
+    def test_restore_taken_address(self):
+        userid = self.create_user("addr-gone", address="gone@example.com")
+        self.db.user.retire(userid)
+        other = self.create_user("addr-heir", address="Gone@example.com")
+        self.assertEqual(self.owner("gone@example.com"), other)
+
+        with self.assertRaises(ValueError):
+            self.db.user.restore(userid)
+        self.assertEqual(self.owner("gone@example.com"), other)
+
+    def test_build_address_index(self):
+        userid = self.create_user("addr-build", address="build@example.com",
+                                  alternate_addresses="b1@example.com")
+        shared = self.useraddress.build_address_index(self.db)
+        self.assertNotIn(userid, [owner for _address, owner in shared])
+        self.assertEqual(self.indexed(userid),
+                         ["b1@example.com", "build@example.com"])
+
+
+if __name__ == "__main__":
+    unittest.main()